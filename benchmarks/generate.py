@@ -0,0 +1,133 @@
+"""
+Benchmark Data
+Deterministic problem libraries and session histories of any size
+    
+    python benchmarks/generate.py DIR --problems 10000 --sessions 1000000
+
+The same size and seed always produce the same files, so timings taken
+on different commits compare like with like. Records are generated and
+written one at a time, so even the 1M-session scale needs little memory.
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import random
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.data_handler import json_format
+
+TOPICS = ("Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting", "Greedy",
+          "Depth-First Search", "Binary Search", "Tree", "Graph", "Two Pointers", "Stack",
+          "Heap", "Sliding Window", "Backtracking", "Linked List", "Trie", "Bit Manipulation")
+PLATFORMS = ("LeetCode", "HackerRank", "Codeforces", "AtCoder")
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+STATUSES = ("Not Started", "In Progress", "Solved", "Reviewed")
+WORDS = ("two", "sum", "longest", "substring", "merge", "intervals", "binary", "tree", "path",
+         "maximum", "minimum", "window", "graph", "valid", "palindrome", "number", "islands")
+NOTES = ("try a hash map", "off by one on the right bound", "sort first", "use a monotonic stack",
+         "memoize the recursion", "two pointers from both ends", "BFS level by level")
+
+# Fixed reference time, so the data does not depend on when it is generated
+END = datetime(2026, 1, 1)
+
+
+def generate_problems(count, rng):
+    for problem_id in range(1, count + 1):
+        added = (END - timedelta(seconds=rng.randrange(2 * 365 * 86400),
+                                 microseconds=rng.randrange(1000000))).isoformat()
+        yield {
+            'id': problem_id,
+            'title': ' '.join(rng.sample(WORDS, 3)).title() + f" {problem_id}",
+            'difficulty': rng.choice(DIFFICULTIES),
+            'topics': rng.sample(TOPICS, rng.randint(1, 3)),
+            'platform': rng.choice(PLATFORMS),
+            'url': f"https://example.com/problems/{problem_id}",
+            'status': rng.choice(STATUSES),
+            'date_added': added,
+            'date_modified': added
+        }
+
+
+def generate_sessions(count, problem_count, rng):
+    for session_id in range(1, count + 1):
+        start = END - timedelta(seconds=rng.randrange(365 * 86400),
+                                microseconds=rng.randrange(1000000))
+        duration = rng.randint(60, 2 * 3600)
+        pauses = []
+        if rng.random() < 0.2:
+            pause = start + timedelta(seconds=rng.randrange(duration))
+            pauses.append({'pause_time': pause.isoformat(),
+                           'resume_time': (pause + timedelta(seconds=rng.randint(10, 600))).isoformat()})
+        notes = []
+        if rng.random() < 0.3:
+            notes.append({'timestamp': (start + timedelta(seconds=30)).isoformat(),
+                          'text': rng.choice(NOTES)})
+        solved = rng.random() < 0.6
+        
+        yield {
+            'id': session_id,
+            'problem_id': rng.randint(1, problem_count),
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(seconds=duration)).isoformat(),
+            'duration_seconds': duration,
+            'pauses': pauses,
+            'solved': solved,
+            'hints_used': rng.choice((0, 0, 0, 1, 2)),
+            'notes': notes,
+            'solution_code': "def solve(nums):\n    return sorted(nums)\n" if solved else ""
+        }
+
+
+def write_array(filename, records):
+    """Write records as a compact JSON array, one element at a time"""
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as file:
+        file.write(b'[')
+        for index, record in enumerate(records):
+            if index:
+                file.write(b',')
+            file.write(json_format.dumps(record, pretty=False))
+        file.write(b']')
+    os.replace(temp_filename, filename)
+
+
+def generate(data_dir, problems, sessions, seed=0):
+    """
+    Write problems.json and sessions.json into data_dir
+    
+    Args:
+        data_dir (str): Directory to create the files in
+        problems (int): Number of problems
+        sessions (int): Number of sessions, spread over the last year
+        seed (int): Random seed
+    """
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    
+    # Journals, snapshots and indexes of earlier data would be replayed over the new files
+    for name in os.listdir(data_dir):
+        if name.startswith(('problems.json', 'sessions.json', 'user_stats.json', 'codetrack.db')):
+            os.remove(os.path.join(data_dir, name))
+    
+    write_array(os.path.join(data_dir, 'problems.json'), generate_problems(problems, rng))
+    write_array(os.path.join(data_dir, 'sessions.json'),
+                generate_sessions(sessions, max(problems, 1), rng))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CodeTrack benchmark data")
+    parser.add_argument('data_dir')
+    parser.add_argument('--problems', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    generate(args.data_dir, args.problems, args.sessions, args.seed)
+
+
+if __name__ == "__main__":
+    main()
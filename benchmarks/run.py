@@ -0,0 +1,291 @@
+"""
+Benchmark Suite
+Times the library, session and analytics operations on generated data
+    
+    python benchmarks/run.py --scale 1k 100k
+    python benchmarks/run.py --scale 100k --output new.json --baseline old.json
+
+Each scale is a deterministic dataset (see generate.py) that is written
+once to --data-dir and reused by later runs. Every operation runs
+--repeat times (fast ones are called repeatedly per run, as timeit
+does); the best time per call gives ops/sec, and the peak RSS is the
+process high-water mark while the operation ran. Results are written as
+JSON; with --baseline, operations slower than the baseline by more than
+--threshold are flagged and the script exits with status 1.
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime
+import subprocess
+import argparse
+import platform
+import tempfile
+import time
+import json
+import io
+import sys
+import os
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+for path in (ROOT_DIR, BENCHMARK_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+from generate import generate
+from modules.problem_manager import ProblemManager
+from modules.session_tracker import SessionTracker
+from modules.analytics import Analytics
+from utils.storage import SQLiteDatabase, migrate_json_to_sqlite
+
+# Scale name -> (problems, sessions)
+SCALES = {
+    '1k': (1000, 1000),
+    '100k': (10000, 100000),
+    '1m': (100000, 1000000),
+}
+
+# Store name -> how main.py would open that data
+STORES = ('json', 'snapshot', 'sqlite')
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    """Start a new high-water mark, where the kernel allows it (Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+def measure(operation, repeat, min_time=0.01):
+    """
+    Best and mean seconds per call of operation() over repeat runs, and the peak RSS
+    
+    Fast operations are called several times per run (as timeit's
+    autorange does) so that each run takes at least min_time seconds.
+    """
+    reset_peak_rss()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 10**6:
+            break
+        number *= 10
+    
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        times.append((time.perf_counter() - start) / number)
+    
+    best = min(times)
+    return {
+        'best': best,
+        'mean': sum(times) / len(times),
+        'calls': number,
+        'ops_per_sec': 1 / best if best > 0 else None,
+        'peak_rss': peak_rss()
+    }
+
+
+def open_managers(data_dir, store):
+    if store == 'sqlite':
+        db = SQLiteDatabase(os.path.join(data_dir, 'codetrack.db'))
+        pm = ProblemManager(os.path.join(data_dir, 'problems.json'), storage=db.problems)
+        st = SessionTracker(os.path.join(data_dir, 'sessions.json'), storage=db.sessions,
+                            index_notes=True, lazy=True, columnar=True)
+    else:
+        snapshot = store == 'snapshot'
+        pm = ProblemManager(os.path.join(data_dir, 'problems.json'), snapshot=snapshot)
+        st = SessionTracker(os.path.join(data_dir, 'sessions.json'), index_notes=snapshot,
+                            lazy=snapshot, snapshot=snapshot)
+    return pm, st
+
+
+def operations(pm, st, analytics):
+    """Benchmark name -> operation, in the order they run"""
+    problem_id = pm.problems[len(pm.problems) // 2].id if pm.problems else 1
+    quiet = io.StringIO()
+    
+    def silent(method):
+        def run():
+            with redirect_stdout(quiet):
+                method()
+            quiet.seek(0)
+            quiet.truncate()
+        return run
+    
+    def analytics_init():
+        stats = Analytics(pm, st).stats
+        pm.unsubscribe(stats)
+        st.unsubscribe(stats)
+    
+    ops = {
+        'load_problems': pm.load_problems,
+        'load_sessions': st.load_sessions,
+        'filter_problems': lambda: pm.filter_problems(difficulty="Hard", topics=["Graph", "Tree"]),
+        'filter_problems_all': lambda: pm.filter_problems(topics=["Array", "Hash Table"],
+                                                          match='all'),
+        'search_problems': lambda: pm.search_problems("binary tree"),
+        'search_sessions': lambda: st.search_sessions("monotonic stack"),
+        'get_session_history': lambda: st.get_session_history(problem_id),
+        'analytics_init': analytics_init,
+    }
+    
+    # Every public Analytics method; the display ones print to a buffer
+    for name in sorted(dir(Analytics)):
+        method = getattr(analytics, name)
+        if name.startswith('_') or not callable(method):
+            continue
+        if name == 'format_time':
+            ops['analytics.' + name] = lambda: analytics.format_time(7384)
+        elif name == 'draw_ascii_bar':
+            ops['analytics.' + name] = lambda: analytics.draw_ascii_bar(37, 100)
+        elif name.startswith(('display_', 'generate_')):
+            ops['analytics.' + name] = silent(method)
+        else:
+            ops['analytics.' + name] = method
+    
+    ops['save_problems'] = pm.save_problems
+    ops['save_sessions'] = st.save_sessions
+    return ops
+
+
+def prepare(scale, store, data_root, seed):
+    """Data directory for a scale, generated on first use"""
+    problems, sessions = SCALES[scale]
+    data_dir = os.path.join(data_root, f'{scale}-{seed}-{store}')
+    marker = os.path.join(data_dir, 'generated')
+    
+    if not os.path.exists(marker):
+        print(f"Generating {problems} problems and {sessions} sessions in {data_dir}...")
+        generate(data_dir, problems, sessions, seed)
+        if store == 'sqlite':
+            migrate_json_to_sqlite(os.path.join(data_dir, 'problems.json'),
+                                   os.path.join(data_dir, 'sessions.json'),
+                                   os.path.join(data_dir, 'codetrack.db'))
+        with open(marker, 'w') as file:
+            file.write(f"{problems} {sessions} {seed}\n")
+    
+    return data_dir
+
+
+def run_scale(scale, store, data_root, seed, repeat, only=None):
+    data_dir = prepare(scale, store, data_root, seed)
+    
+    # Opening once builds any snapshots and indexes, as a first run of the app would
+    pm, st = open_managers(data_dir, store)
+    pm.close()
+    st.close()
+    
+    reset_peak_rss()
+    start = time.perf_counter()
+    pm, st = open_managers(data_dir, store)
+    results = {'open': {'best': time.perf_counter() - start, 'peak_rss': peak_rss()}}
+    print(f"  {'open':<40} {results['open']['best'] * 1000:10.2f} ms")
+    analytics = Analytics(pm, st)
+    
+    for name, operation in operations(pm, st, analytics).items():
+        if only and not any(word in name for word in only):
+            continue
+        results[name] = measure(operation, repeat)
+        result = results[name]
+        print(f"  {name:<40} {result['best'] * 1000:10.2f} ms {result['ops_per_sec'] or 0:12.1f} ops/s"
+              f" {result['peak_rss'] / 2**20:8.1f} MB")
+    
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Benchmarks slower than the baseline by more than threshold (a fraction)"""
+    regressions = []
+    for key, runs in results.items():
+        for name, result in runs.items():
+            old = baseline.get(key, {}).get(name)
+            if old and old.get('best') and result['best'] > old['best'] * (1 + threshold):
+                regressions.append({'benchmark': f'{key}/{name}', 'baseline': old['best'],
+                                    'current': result['best'],
+                                    'change': result['best'] / old['best'] - 1})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CodeTrack operations")
+    parser.add_argument('--scale', nargs='+', choices=SCALES, default=['1k'])
+    parser.add_argument('--store', nargs='+', choices=STORES, default=['snapshot'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="run only benchmarks containing these words")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'codetrack-bench'),
+                        help="where generated datasets are kept between runs")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="results JSON of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown that counts as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    
+    results = {}
+    for scale in args.scale:
+        for store in args.store:
+            print(f"{scale} / {store}")
+            results[f'{scale}/{store}'] = run_scale(scale, store, args.data_dir, args.seed,
+                                                    args.repeat, args.only)
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        report['regressions'] = compare(results, baseline['results'], args.threshold)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['benchmark']}: {regression['baseline'] * 1000:.2f} ms"
+                  f" -> {regression['current'] * 1000:.2f} ms ({regression['change']:+.0%})")
+        status = 1 if report['regressions'] else 0
+    
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
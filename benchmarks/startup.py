@@ -0,0 +1,72 @@
+"""
+Startup Benchmark
+Time from launch to the first menu, and to each part of the data loaded
+    
+    python benchmarks/startup.py --problems 10000 --sessions 500000 --budget 0.5
+
+Every stage runs in a fresh interpreter inside a generated data
+directory, after one warm-up run that builds the snapshots. The best of
+--repeat runs is reported. With --budget the script exits with status 1
+when the time to the first menu exceeds it, so it can gate a build.
+"""
+
+import argparse
+import subprocess
+import tempfile
+import time
+import sys
+import os
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+if BENCHMARK_DIR not in sys.path:
+    sys.path.append(BENCHMARK_DIR)
+from generate import generate
+
+# Stage name -> code run in a fresh interpreter, in the data directory's parent
+STAGES = {
+    'menu': "import main; main.AppData('background')",
+    'problems': "import main; main.AppData('lazy').pm",
+    'sessions': "import main; main.AppData('lazy').st",
+    'analytics': "import main; main.AppData('lazy').analytics",
+    'eager': "import main; main.AppData('eager')",
+}
+
+
+def run_stage(code, cwd):
+    """Wall-clock seconds of one fresh interpreter running the code"""
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CodeTrack startup")
+    parser.add_argument('--problems', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, help="maximum seconds to the first menu")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        generate(os.path.join(workdir, 'data'), args.problems, args.sessions, args.seed)
+        # Builds the binary snapshots and saves the search indexes, as a first session would
+        run_stage("import main; main.AppData('eager').close()", workdir)
+        
+        print(f"{args.problems} problems, {args.sessions} sessions, best of {args.repeat}")
+        results = {}
+        for name, code in STAGES.items():
+            results[name] = min(run_stage(code, workdir) for _ in range(args.repeat))
+            print(f"  {name:<10} {results[name] * 1000:8.1f} ms")
+    
+    if args.budget is not None and results['menu'] > args.budget:
+        print(f"Startup regression: {results['menu']:.3f}s to the menu, budget {args.budget:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,587 @@
+import argparse
+import getpass
+from contextlib import ExitStack
+from datetime import datetime
+import shlex
+import json
+import io
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from utils.data_handler import json_format, read_json, write_json
+from utils.helpers import format_duration
+from utils import profiling
+
+# Non-interactive commands; main.py is the menu-driven interface.
+#
+#   python codetrack.py problems add "Two Sum" --difficulty Easy --topics Array,Hash
+#   python codetrack.py problems list --sort title
+#   python codetrack.py problems filter --difficulty Hard --topics Graph,DP --all
+#   python codetrack.py problems search "binary tree" --json
+#   python codetrack.py problems import leetcode.csv        bulk add, skipping known URLs
+#   python codetrack.py problems export problems.jsonl
+#   python codetrack.py session start 12
+#   python codetrack.py session stop --solved --solution two_sum.py
+#   python codetrack.py report --json
+#   python codetrack.py report --workers 4                 scan sessions in 4 processes
+#   python codetrack.py batch ops.txt                      one command per line
+#   python codetrack.py fmt data/problems.json             pretty-print to stdout
+#   python codetrack.py fmt --write data/*.json            rewrite files indented
+#   python codetrack.py fmt --write --compact data/*.json  rewrite files compact
+#   python codetrack.py --profile report                   time the hot paths (see utils/profiling.py)
+#   python codetrack.py --team /srv/team --user ana session start 12
+#   python codetrack.py --team /srv/team team leaderboard --by time
+#
+# A batch file holds one command per line, written as on the command line
+# without "python codetrack.py" (blank lines and # comments are skipped).
+# All commands of a batch share one load of the data and one write at the end,
+# so lines cannot give the global options (--data-dir, --team, --user, ...).
+#
+# With --team, problems come from the team's shared catalogue and sessions
+# from the user's own shard (see modules/team.py); --user defaults to
+# $CODETRACK_USER or the login name.
+#
+# The modules behind the commands (analytics, team, importer, SQLite) are
+# imported by the commands that use them, so a quick `problems list` does
+# not pay for the rest.
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+STATUSES = ("Not Started", "In Progress", "Solved", "Reviewed")
+SORT_KEYS = ('date_added', 'difficulty', 'title', 'status')
+LEADERBOARD_KEYS = ('solved', 'sessions', 'time', 'streak')  # As in modules/team.py
+IMPORT_FORMATS = ('csv', 'jsonl', 'json')  # As in modules/importer.py
+
+# Options that set up the workspace, so they only apply to a whole run
+GLOBAL_OPTIONS = ('data_dir', 'team', 'user', 'profile', 'profile_output')
+
+
+class Workspace:
+    """
+    Problems, sessions and analytics of one data directory
+    
+    Each part is loaded on first use and shared by every command of a run.
+    Changes are collected in ProblemManager/SessionTracker batches and
+    written once by close(). In team mode the problems are the team's
+    shared catalogue and data_dir is the user's shard.
+    """
+    
+    def __init__(self, data_dir, team=None, user=None):
+        self.team = team
+        self.user = user
+        if team is not None:
+            data_dir = team.user_dir(user)
+            self.problems_file = team.problems_file
+        else:
+            self.problems_file = os.path.join(data_dir, 'problems.json')
+        self.data_dir = data_dir
+        self.active_file = os.path.join(data_dir, 'active_session.json')
+        self._db = None
+        self._problems = None
+        self._sessions = None
+        self._analytics = None
+        self._batches = ExitStack()
+        self.workers = None  # Processes for the analytics session scan, see StatsStore
+    
+    def _database(self):
+        """The SQLite database once the JSON files have been migrated, else None"""
+        if self.team is not None:
+            return None  # Team data stays in JSON shards
+        os.makedirs(self.data_dir, exist_ok=True)
+        db_file = os.path.join(self.data_dir, 'codetrack.db')
+        if self._db is None and os.path.exists(db_file):
+            from utils.storage import SQLiteDatabase
+            self._db = SQLiteDatabase(db_file)
+        return self._db
+    
+    @property
+    def problems(self):
+        if self._problems is None:
+            from modules.problem_manager import ProblemManager
+            db = self._database()
+            if self.team is not None:
+                self._problems = self.team.problem_manager(self.user)
+            elif db is not None:
+                self._problems = ProblemManager(self.problems_file, storage=db.problems)
+            else:
+                self._problems = ProblemManager(self.problems_file, snapshot=True)
+            self._batches.enter_context(self._problems.batch())
+        return self._problems
+    
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            from modules.session_tracker import SessionTracker, Session
+            data_file = os.path.join(self.data_dir, 'sessions.json')
+            db = self._database()
+            if self.team is not None:
+                self._sessions = self.team.session_tracker(self.user)
+            elif db is not None:
+                self._sessions = SessionTracker(data_file, storage=db.sessions, index_notes=True,
+                                                lazy=True, columnar=True)
+            else:
+                self._sessions = SessionTracker(data_file, index_notes=True, lazy=True,
+                                                snapshot=True)
+            self._batches.enter_context(self._sessions.batch())
+            
+            # The running session outlives the process that started it
+            active = read_json(self.active_file)
+            if active:
+                self._sessions.active_session = Session.from_dict(active)
+        return self._sessions
+    
+    @property
+    def analytics(self):
+        if self._analytics is None:
+            from modules.analytics import Analytics
+            from modules.stats_store import StatsStore
+            stats = StatsStore(self.problems, self.sessions,
+                               os.path.join(self.data_dir, 'user_stats.json'), self.workers)
+            self._analytics = Analytics(self.problems, self.sessions, stats)
+        return self._analytics
+    
+    def close(self):
+        """Write everything the commands changed"""
+        self._batches.close()
+        
+        if self._problems is not None:
+            self._problems.close()
+        if self._sessions is not None:
+            # The summary reads the sessions, which close() unmaps
+            self._sessions.flush()
+            if self.team is not None:
+                self.team.write_summary(self.user, self._sessions)
+            self._sessions.close()
+            active = self._sessions.get_active_session()
+            if active is not None:
+                temp_filename = self.active_file + '.tmp'
+                with open(temp_filename, 'wb') as file:
+                    file.write(json_format.dumps(active.to_dict()))
+                os.replace(temp_filename, self.active_file)
+            elif os.path.exists(self.active_file):
+                os.remove(self.active_file)
+        if self._analytics is not None:
+            self._analytics.stats.save()
+
+
+def split_list(text):
+    """Comma-separated command line value -> list of stripped items"""
+    return [item.strip() for item in text.split(",") if item.strip()] if text else []
+
+
+def print_problems(problems, as_json):
+    if as_json:
+        print(json.dumps([p.to_dict() for p in problems], ensure_ascii=False))
+        return
+    
+    print(f"{'ID':<5} {'Title':<30} {'Difficulty':<10} {'Status':<15}")
+    print("-" * 60)
+    for p in problems:
+        print(f"{p.id:<5} {p.title[:29]:<30} {p.difficulty:<10} {p.status:<15}")
+    print(f"\nTotal: {len(problems)} problems")
+
+
+def problems_add_command(args, workspace):
+    pm = workspace.problems
+    count = len(pm.problems)
+    problem = pm.add_problem(args.title, args.difficulty, split_list(args.topics), args.platform,
+                             args.url, overwrite=args.overwrite)
+    if len(pm.problems) > count:
+        print(f"Added problem {problem.id}")
+    else:
+        print(f"Problem {problem.id} is already in the library: {problem.title}"
+              f" ({problem.difficulty}); merged the new topics into it")
+    return 0
+
+
+def problems_list_command(args, workspace):
+    print_problems(workspace.problems.list_problems(args.sort), args.json)
+    return 0
+
+
+def problems_filter_command(args, workspace):
+    results = workspace.problems.filter_problems(difficulty=args.difficulty, status=args.status,
+                                                 topics=split_list(args.topics) or None,
+                                                 match='all' if args.all else 'any')
+    print_problems(results, args.json)
+    return 0
+
+
+def problems_search_command(args, workspace):
+    print_problems(workspace.problems.search_problems(args.query, args.limit), args.json)
+    return 0
+
+
+def problems_import_command(args, workspace):
+    from modules.importer import detect_format, read_rows, import_problems
+    try:
+        format = args.format or detect_format(args.file)
+        # utf-8-sig drops the byte order mark spreadsheet programs put before the header
+        if args.file == '-':
+            file = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            file = open(args.file, 'r', encoding='utf-8-sig', newline='')
+        with file:
+            result = import_problems(workspace.problems, read_rows(file, format),
+                                     args.chunk_size, args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot import {args.file}: {e}", file=sys.stderr)
+        return 1
+    
+    for number, message in result.errors[:args.max_errors]:
+        print(f"{args.file}:{number}: {message}", file=sys.stderr)
+    if len(result.errors) > args.max_errors:
+        print(f"... {len(result.errors) - args.max_errors} more invalid rows", file=sys.stderr)
+    
+    print(f"{'Checked' if args.dry_run else 'Imported'} {result}")
+    return 1 if result.invalid else 0
+
+
+def problems_export_command(args, workspace):
+    from modules.importer import detect_format, export_problems
+    try:
+        format = args.format or detect_format(args.file)
+        if args.file == '-':
+            count = export_problems(workspace.problems.problems, sys.stdout, format)
+        else:
+            with open(args.file, 'w', encoding='utf-8', newline='') as file:
+                count = export_problems(workspace.problems.problems, file, format)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot export to {args.file}: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Exported {count} problems", file=sys.stderr)
+    return 0
+
+
+def session_start_command(args, workspace):
+    pm = workspace.problems
+    st = workspace.sessions
+    
+    problem = pm.get_problem(args.problem_id)
+    if not problem:
+        print(f"Error: no problem with ID {args.problem_id}", file=sys.stderr)
+        return 1
+    
+    if not st.start_session(problem.id):
+        print(f"Error: session {st.get_active_session().id} is still running", file=sys.stderr)
+        return 1
+    
+    pm.edit_problem(problem.id, status="In Progress")
+    print(f"Session started for: {problem.title}")
+    return 0
+
+
+def session_stop_command(args, workspace):
+    pm = workspace.problems
+    st = workspace.sessions
+    
+    session = st.get_active_session()
+    if not session:
+        print("Error: no active session", file=sys.stderr)
+        return 1
+    
+    if args.cancel:
+        st.cancel_session()
+        print("Session cancelled")
+        return 0
+    
+    solution = ""
+    if args.solution:
+        try:
+            with open(args.solution, 'r') as file:
+                solution = file.read()
+        except OSError as e:
+            print(f"Error: cannot read {args.solution}: {e}", file=sys.stderr)
+            return 1
+    
+    st.complete_session(solved=args.solved, solution_code=solution)
+    if args.solved and pm.get_problem(session.problem_id):
+        pm.edit_problem(session.problem_id, status="Solved")
+    
+    minutes, seconds = divmod(session.duration_seconds, 60)
+    print(f"Session completed in {minutes}m {seconds}s: {'SOLVED' if args.solved else 'NOT SOLVED'}")
+    return 0
+
+
+def report_command(args, workspace):
+    if args.workers is not None:
+        workspace.workers = args.workers or os.cpu_count()
+    analytics = workspace.analytics
+    
+    if not args.json:
+        analytics.generate_full_report()
+        return 0
+    
+    report = {'generated_at': datetime.now().isoformat(), **analytics.get_report(args.days)}
+    print(json.dumps(report, ensure_ascii=False, default=str))
+    return 0
+
+
+def team_command(args, workspace):
+    if workspace.team is None:
+        print("Error: team commands need --team", file=sys.stderr)
+        return 2
+    
+    team = workspace.team
+    if args.action == 'users':
+        for user in team.users():
+            print(user)
+        return 0
+    
+    from modules.team import TeamAnalytics
+    analytics = TeamAnalytics(workspace.problems, team.summaries(args.workers))
+    
+    if args.action == 'leaderboard':
+        rows = analytics.leaderboard(args.by)[:args.limit]
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False))
+            return 0
+        
+        print(f"{'#':>3} {'user':<20} {'solved':>7} {'tried':>6} {'sessions':>9}"
+              f" {'time':>10} {'streak':>7}")
+        for row in rows:
+            print(f"{row['rank']:>3} {row['user']:<20} {row['solved']:>7} {row['attempted']:>6}"
+                  f" {row['sessions']:>9} {format_duration(row['time']):>10}"
+                  f" {row['streak']:>7}")
+        return 0
+    
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'statistics': analytics.statistics(),
+        'topics': analytics.topic_analysis()
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, default=str))
+        return 0
+    
+    stats = report['statistics']
+    print(f"Team of {stats['members']} ({stats['active_members']} active)")
+    print(f"  Problems solved:  {stats['problems_solved']}/{stats['total_problems']}")
+    print(f"  Sessions:         {stats['total_sessions']} ({stats['solved_sessions']} solved)")
+    print(f"  Practice time:    {format_duration(stats['total_practice_time'])}")
+    print(f"  Current streak:   {stats['current_streak']} days (longest {stats['longest_streak']})")
+    print("\nTopic success rates (solved/attempted per member):")
+    for topic, topic_stats in report['topics'].items():
+        print(f"  {topic:<24} {topic_stats['success_rate'] * 100:5.1f}%"
+              f"  {topic_stats['solved']}/{topic_stats['attempted']}"
+              f"  ({topic_stats['members']} members)")
+    return 0
+
+
+def batch_command(args, workspace):
+    parser = build_parser(batch=True)
+    status = 0
+    count = 0
+    
+    with (sys.stdin if args.file == '-' else open(args.file, 'r')) as file:
+        for number, line in enumerate(file, 1):
+            try:
+                words = shlex.split(line, comments=True)
+            except ValueError as e:
+                print(f"Error: line {number}: {e}", file=sys.stderr)
+                status = 1
+                continue
+            if not words:
+                continue
+            
+            try:
+                command = parser.parse_args(words)
+            except SystemExit:
+                # argparse has already printed the usage error
+                print(f"Error: line {number} skipped", file=sys.stderr)
+                status = 1
+                continue
+            
+            if command.handler is batch_command:
+                print(f"Error: line {number}: batches cannot be nested", file=sys.stderr)
+                status = 1
+                continue
+            
+            given = ['--' + name.replace('_', '-') for name in GLOBAL_OPTIONS if name in vars(command)]
+            if given:
+                print(f"Error: line {number}: global options ({', '.join(given)}) apply to the"
+                      f" whole batch; give them before 'batch' instead", file=sys.stderr)
+                status = 1
+                continue
+            
+            with profiling.command(f"line {number}: {' '.join(words)}"):
+                status = command.handler(command, workspace) or status
+            count += 1
+    
+    print(f"Ran {count} commands", file=sys.stderr)
+    return status
+
+
+def fmt_command(args, workspace):
+    status = 0
+    
+    for filename in args.files:
+        try:
+            with open(filename, 'rb') as file:
+                data = json_format.loads(file.read())
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error: cannot read {filename}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        
+        pretty = not args.compact
+        if args.write:
+            if not write_json(filename, data, pretty=pretty):
+                status = 1
+        else:
+            sys.stdout.write(json_format.dumps(data, pretty=pretty).decode('utf-8') + '\n')
+    
+    return status
+
+
+def build_parser(batch=False):
+    """
+    Command line parser
+    
+    With batch=True (for batch file lines) the global options have no
+    defaults, so the options a line gives are the attributes it has.
+    """
+    def default(value):
+        return argparse.SUPPRESS if batch else value
+    
+    parser = argparse.ArgumentParser(prog='codetrack', description="CodeTrack command line")
+    parser.add_argument('--data-dir', default=default('data'), help="data directory (default: data)")
+    parser.add_argument('--team', metavar='DIR', default=default(None),
+                        help="team directory: shared problems, one session shard per user")
+    parser.add_argument('--user',
+                        default=default(os.environ.get('CODETRACK_USER') or getpass.getuser()),
+                        help="your name in the team (default: $CODETRACK_USER or login name)")
+    parser.add_argument('--profile', action='store_true', default=default(False),
+                        help="print where each command spends its time (or set CODETRACK_PROFILE=1)")
+    parser.add_argument('--profile-output', metavar='FILE', default=default(None),
+                        help="also write a Chrome trace (.json) or cProfile stats (other names)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    problems = commands.add_parser('problems', help="manage the problem library")
+    problem_commands = problems.add_subparsers(dest='action', required=True)
+    
+    add = problem_commands.add_parser('add', help="add a problem")
+    add.add_argument('title')
+    add.add_argument('--difficulty', choices=DIFFICULTIES, default="Medium")
+    add.add_argument('--topics', help="comma-separated topic tags")
+    add.add_argument('--platform', default="")
+    add.add_argument('--url', default="")
+    add.add_argument('--overwrite', action='store_true',
+                     help="give a problem already in the library the new difficulty")
+    add.set_defaults(handler=problems_add_command)
+    
+    list_ = problem_commands.add_parser('list', help="list all problems")
+    list_.add_argument('--sort', choices=SORT_KEYS, default='date_added')
+    list_.add_argument('--json', action='store_true', help="print the problems as JSON")
+    list_.set_defaults(handler=problems_list_command)
+    
+    filter_ = problem_commands.add_parser('filter', help="filter problems")
+    filter_.add_argument('--difficulty', choices=DIFFICULTIES)
+    filter_.add_argument('--status', choices=STATUSES)
+    filter_.add_argument('--topics', help="comma-separated topic tags")
+    filter_.add_argument('--all', action='store_true', help="require every topic instead of any")
+    filter_.add_argument('--json', action='store_true', help="print the problems as JSON")
+    filter_.set_defaults(handler=problems_filter_command)
+    
+    search = problem_commands.add_parser('search', help="search titles, topics and platforms")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int)
+    search.add_argument('--json', action='store_true', help="print the problems as JSON")
+    search.set_defaults(handler=problems_search_command)
+    
+    import_ = problem_commands.add_parser('import', help="bulk-add problems from a CSV/JSONL/JSON export")
+    import_.add_argument('file', help="export file, or - for stdin (needs --format)")
+    import_.add_argument('--format', choices=IMPORT_FORMATS, help="default: from the file extension")
+    import_.add_argument('--chunk-size', type=int, default=5000, help="rows validated per step")
+    import_.add_argument('--dry-run', action='store_true', help="validate without adding")
+    import_.add_argument('--max-errors', type=int, default=20, help="invalid rows to list")
+    import_.set_defaults(handler=problems_import_command)
+    
+    export = problem_commands.add_parser('export', help="write all problems as CSV/JSONL/JSON")
+    export.add_argument('file', help="output file, or - for stdout (needs --format)")
+    export.add_argument('--format', choices=IMPORT_FORMATS, help="default: from the file extension")
+    export.set_defaults(handler=problems_export_command)
+    
+    session = commands.add_parser('session', help="time practice sessions")
+    session_commands = session.add_subparsers(dest='action', required=True)
+    
+    start = session_commands.add_parser('start', help="start a session on a problem")
+    start.add_argument('problem_id', type=int)
+    start.set_defaults(handler=session_start_command)
+    
+    stop = session_commands.add_parser('stop', help="complete the active session")
+    stop.add_argument('--solved', action='store_true', help="the problem was solved")
+    stop.add_argument('--solution', help="file with the solution code")
+    stop.add_argument('--cancel', action='store_true', help="discard the session instead")
+    stop.set_defaults(handler=session_stop_command)
+    
+    report = commands.add_parser('report', help="print the analytics report")
+    report.add_argument('--json', action='store_true', help="print the report as JSON")
+    report.add_argument('--days', type=int, default=30, help="practice calendar length")
+    report.add_argument('--workers', type=int, metavar='N',
+                        help="aggregate sessions in N processes (0: one per CPU)")
+    report.set_defaults(handler=report_command)
+    
+    team = commands.add_parser('team', help="team analytics (needs --team)")
+    team_commands = team.add_subparsers(dest='action', required=True)
+    
+    users = team_commands.add_parser('users', help="list the team members")
+    users.set_defaults(handler=team_command)
+    
+    team_report = team_commands.add_parser('report', help="team totals and topic success rates")
+    team_report.add_argument('--json', action='store_true', help="print the report as JSON")
+    team_report.add_argument('--workers', type=int, metavar='N',
+                             help="processes for rebuilding large stale summaries")
+    team_report.set_defaults(handler=team_command)
+    
+    leaderboard = team_commands.add_parser('leaderboard', help="rank the team members")
+    leaderboard.add_argument('--by', choices=LEADERBOARD_KEYS, default='solved')
+    leaderboard.add_argument('--limit', type=int, help="show only the first N members")
+    leaderboard.add_argument('--json', action='store_true', help="print the ranking as JSON")
+    leaderboard.add_argument('--workers', type=int, metavar='N',
+                             help="processes for rebuilding large stale summaries")
+    leaderboard.set_defaults(handler=team_command)
+    
+    batch = commands.add_parser('batch', help="run newline-delimited commands from a file")
+    batch.add_argument('file', nargs='?', default='-', help="command file (default: stdin)")
+    batch.set_defaults(handler=batch_command)
+    
+    fmt = commands.add_parser('fmt', help="pretty-print JSON data files")
+    fmt.add_argument('files', nargs='+', help="JSON files to format")
+    fmt.add_argument('--write', action='store_true', help="rewrite the files instead of printing")
+    fmt.add_argument('--compact', action='store_true', help="compact instead of indented output")
+    fmt.set_defaults(handler=fmt_command)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.team:
+            from modules.team import Team
+            team = Team(args.team)
+        else:
+            team = None
+        workspace = Workspace(args.data_dir, team, args.user)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    
+    profiling.enable_from(args.profile, args.profile_output)
+    try:
+        with profiling.command(' '.join(filter(None, (args.command, getattr(args, 'action', None))))):
+            try:
+                return args.handler(args, workspace)
+            finally:
+                workspace.close()
+    finally:
+        profiling.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,134 @@
+import argparse
+import getpass
+import threading
 import sys
 import os
 import time
 from datetime import datetime
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from modules.problem_manager import ProblemManager
-from modules.session_tracker import SessionTracker
-from modules.analytics import Analytics
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils import profiling
+
+DATABASE_FILE = 'data/codetrack.db'
+
+
+class AppData:
+    """
+    Problems, sessions and analytics, created on first use
+    
+    With startup='background' the problems and sessions load in a thread
+    while the main menu is on screen, and a menu that needs them first
+    waits for it; with 'lazy' each loads when a menu first needs it; with
+    'eager' both load before the menu. The analytics module is only
+    imported when the analytics menu is opened.
+    
+    With a Team (modules/team.py), the problems are the team's shared
+    catalogue and the sessions are the user's shard.
+    """
+    
+    def __init__(self, startup='background', team=None, user=None):
+        self.startup = startup
+        self.team = team
+        self.user = user
+        self._db = None
+        self._pm = None
+        self._st = None
+        self._analytics = None
+        self._lock = threading.Lock()  # Held while loading
+        
+        if startup == 'eager':
+            self._load()
+        elif startup == 'background':
+            threading.Thread(target=self._load, daemon=True).start()
+    
+    def _load(self, sessions=True):
+        with self._lock:
+            from modules.problem_manager import ProblemManager
+            
+            # Prefer the SQLite database once the JSON files have been migrated
+            if self.team is None and self._db is None and os.path.exists(DATABASE_FILE):
+                from utils.storage import SQLiteDatabase
+                self._db = SQLiteDatabase(DATABASE_FILE)
+            
+            if self._pm is None:
+                if self.team is not None:
+                    self._pm = self.team.problem_manager(self.user)
+                elif self._db is not None:
+                    self._pm = ProblemManager(storage=self._db.problems)
+                else:
+                    self._pm = ProblemManager(snapshot=True)
+            
+            if sessions and self._st is None:
+                from modules.session_tracker import SessionTracker
+                if self.team is not None:
+                    self._st = self.team.session_tracker(self.user)
+                elif self._db is not None:
+                    self._st = SessionTracker(storage=self._db.sessions, index_notes=True,
+                                              lazy=True, columnar=True)
+                else:
+                    self._st = SessionTracker(index_notes=True, lazy=True, snapshot=True)
+    
+    @property
+    def pm(self):
+        if self._pm is None:
+            self._load(sessions=False)
+        return self._pm
+    
+    @property
+    def st(self):
+        if self._st is None:
+            self._load()
+        return self._st
+    
+    @property
+    def analytics(self):
+        if self._analytics is None:
+            from modules.analytics import Analytics
+            stats = None
+            if self.team is not None:
+                from modules.stats_store import StatsStore
+                stats = StatsStore(self.pm, self.st,
+                                   os.path.join(self.team.user_dir(self.user), 'user_stats.json'))
+            self._analytics = Analytics(self.pm, self.st, stats)
+        return self._analytics
+    
+    def refresh(self):
+        """Pick up what other CodeTrack processes saved, for whatever is loaded"""
+        if not self._lock.acquire(blocking=False):
+            return  # Still loading, so it is up to date anyway
+        try:
+            for manager in (self._pm, self._st):
+                if manager is not None:
+                    manager.refresh()
+        finally:
+            self._lock.release()
+    
+    def active_session(self):
+        """The running session, without loading the sessions just to ask"""
+        return self._st.get_active_session() if self._st is not None else None
+    
+    def close(self):
+        with self._lock:
+            if self._st is not None:
+                # The summary reads the sessions, which close() unmaps
+                self._st.flush()
+                if self.team is not None:
+                    self.team.write_summary(self.user, self._st)
+            for manager in (self._pm, self._st):
+                if manager is not None:
+                    manager.close()
+        if self._analytics is not None:
+            self._analytics.stats.save()
 
 
 def clear_screen():
-    os.system('clear' if os.name != 'nt' else 'cls')
+    # ANSI clear + home instead of spawning a shell for `clear` on every screen
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        print("\033[2J\033[H", end="", flush=True)
 
 
 def print_header(title):
@@ -98,9 +215,14 @@ def add_problem(pm):
     platform = get_input("Platform (e.g., LeetCode): ", allow_empty=True)
     url = get_input("Problem URL: ", allow_empty=True)
     
+    count = len(pm.problems)
     problem = pm.add_problem(title, difficulty, topics, platform or "", url or "")
     
-    print(f"\nProblem added successfully! ID: {problem.id}")
+    if len(pm.problems) > count:
+        print(f"\nProblem added successfully! ID: {problem.id}")
+    else:
+        print(f"\nThis problem is already in the library: [{problem.id}] {problem.title}"
+              f" ({problem.difficulty}). New topics were added to it.")
     pause()
 
 
@@ -166,6 +288,7 @@ def filter_problems(pm):
     difficulty = None
     status = None
     topics = None
+    match = 'any'
     
     if choice == 1:
         print("\n1) Easy  2) Medium  3) Hard")
@@ -178,12 +301,15 @@ def filter_problems(pm):
         status_map = {1: "Not Started", 2: "In Progress", 3: "Solved", 4: "Reviewed"}
         status = status_map.get(status_choice)
     elif choice == 3:
-        topic = get_input("Enter topic: ")
-        topics = [topic] if topic else None
+        topics_str = get_input("Enter topic(s) (comma-separated): ")
+        topics = [t.strip() for t in topics_str.split(",") if t.strip()] if topics_str else None
+        if topics and len(topics) > 1:
+            print("\n1) Any of these topics  2) All of these topics")
+            match = 'all' if get_input("Select match: ", int) == 2 else 'any'
     else:
         return
     
-    results = pm.filter_problems(difficulty=difficulty, status=status, topics=topics)
+    results = pm.filter_problems(difficulty=difficulty, status=status, topics=topics, match=match)
     
     if not results:
         print("\nNo problems match the filter.")
@@ -299,6 +425,7 @@ def practice_session_menu(pm, st):
             print()
             print("1. Start New Session")
             print("2. View Session History")
+            print("3. Search Session Notes")
         
         print("6. Back to Main Menu")
         
@@ -339,6 +466,8 @@ def practice_session_menu(pm, st):
                 start_session(pm, st)
             elif choice == 2:
                 view_session_history(st, pm)
+            elif choice == 3:
+                search_session_notes(st, pm)
             elif choice == 6:
                 break
 
@@ -440,6 +569,34 @@ def view_session_history(st, pm):
     pause()
 
 
+def search_session_notes(st, pm):
+    clear_screen()
+    print_header("SEARCH SESSION NOTES")
+    
+    query = get_input("Enter search term: ")
+    if not query:
+        return
+    
+    results = st.search_sessions(query, limit=20)
+    
+    if not results:
+        print(f"\nNo sessions found matching '{query}'")
+        pause()
+        return
+    
+    print(f"\nFound {len(results)} session(s):\n")
+    
+    for s in results:
+        problem = pm.get_problem(s.problem_id)
+        title = problem.title if problem else "Unknown"
+        print(f"Session {s.id} - {title} ({s.start_time.split('T')[0]})")
+        for note in s.notes:
+            print(f"    - {note['text']}")
+        print()
+    
+    pause()
+
+
 def analytics_menu(analytics):
     while True:
         clear_screen()
@@ -487,46 +644,80 @@ def analytics_menu(analytics):
             break
 
 
-def main():
-    clear_screen()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeTrack interactive menu")
+    parser.add_argument('--startup', choices=('background', 'lazy', 'eager'), default='background',
+                        help="when to load the data (default: in the background)")
+    parser.add_argument('--team', metavar='DIR',
+                        help="team directory: shared problems, one session shard per user")
+    parser.add_argument('--user', default=os.environ.get('CODETRACK_USER') or getpass.getuser(),
+                        help="your name in the team (default: $CODETRACK_USER or login name)")
+    parser.add_argument('--profile', action='store_true',
+                        help="print where the session spent its time on exit (or set CODETRACK_PROFILE=1)")
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help="also write a Chrome trace (.json) or cProfile stats (other names)")
+    args = parser.parse_args(argv)
+    
+    team = None
+    if args.team:
+        from modules.team import Team
+        team = Team(args.team)
+        try:
+            team.user_dir(args.user)  # Rejects names that cannot be a directory
+        except ValueError as e:
+            parser.error(str(e))
     
-    pm = ProblemManager()
-    st = SessionTracker()
-    analytics = Analytics(pm, st)
+    # Profiling imports the modules it instruments up front, before the menu
+    profiling.enable_from(args.profile, args.profile_output)
+    try:
+        run(args, team)
+    finally:
+        profiling.report("session")
+        profiling.finish()
+
+
+def run(args, team=None):
+    clear_screen()
+    data = AppData(args.startup, team, args.user)
     
-    while True:
-        clear_screen()
-        print_header("CODETRACK - MAIN MENU")
-        
-        print("1. Problem Library")
-        print("2. Practice Session")
-        print("3. Analytics & Reports")
-        print("4. Exit")
-        
-        choice = get_input("\nEnter choice: ", int, allow_empty=True)
-        
-        if choice == 1:
-            problem_library_menu(pm)
-        elif choice == 2:
-            practice_session_menu(pm, st)
-            analytics = Analytics(pm, st)
-        elif choice == 3:
-            analytics = Analytics(pm, st)
-            analytics_menu(analytics)
-        elif choice == 4:
-            if st.get_active_session():
-                print("\nYou have an active session!")
-                confirm = get_input("Exit anyway? (yes/no): ")
-                if confirm.lower() != 'yes':
-                    continue
+    try:
+        while True:
+            # Pick up what other CodeTrack processes saved meanwhile
+            data.refresh()
             
-            print("\nThank you for using CodeTrack!")
-            break
+            clear_screen()
+            print_header("CODETRACK - MAIN MENU")
+            
+            print("1. Problem Library")
+            print("2. Practice Session")
+            print("3. Analytics & Reports")
+            print("4. Exit")
+            
+            choice = get_input("\nEnter choice: ", int, allow_empty=True)
+            
+            if choice == 1:
+                problem_library_menu(data.pm)
+            elif choice == 2:
+                practice_session_menu(data.pm, data.st)
+            elif choice == 3:
+                analytics_menu(data.analytics)
+            elif choice == 4:
+                if data.active_session():
+                    print("\nYou have an active session!")
+                    confirm = get_input("Exit anyway? (yes/no): ")
+                    if confirm.lower() != 'yes':
+                        continue
+                
+                print("\nThank you for using CodeTrack!")
+                break
+    finally:
+        # Also when Ctrl-C or end of input leaves the menu, so pending changes are written
+        data.close()
 
 
 if __name__ == "__main__":
     try:
         main()
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         print("\n\nProgram terminated by user.")
         sys.exit(0)
@@ -3,157 +3,62 @@ from collections import defaultdict
 import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.stats_store import StatsStore
+from utils.helpers import format_duration
 
 
 class Analytics:
     
-    def __init__(self, problem_manager, session_tracker):
+    def __init__(self, problem_manager, session_tracker, stats=None, workers=None):
         self.problem_manager = problem_manager
         self.session_tracker = session_tracker
         self.problems = problem_manager.problems
         self.sessions = session_tracker.sessions
+        # Every report section is served from incrementally maintained aggregates
+        # (workers > 1 splits the session scan across processes, see StatsStore)
+        if stats is None:
+            stats = StatsStore(problem_manager, session_tracker, workers=workers)
+        self.stats = stats
     
     def calculate_statistics(self):
-        problem_stats = self.problem_manager.get_statistics()
-        session_stats = self.session_tracker.get_statistics()
-        streak = self.calculate_streak()
-        longest_streak = self.calculate_longest_streak()
+        stats = self.stats
+        total = stats.problem_count
+        solved = stats.status_counts.get('Solved', 0)
+        total_sessions = stats.total_sessions
         
         return {
-            'total_problems': problem_stats['total'],
-            'total_solved': problem_stats['solved'],
-            'total_in_progress': problem_stats['in_progress'],
-            'total_not_started': problem_stats['not_started'],
-            'completion_rate': problem_stats['completion_rate'],
-            'total_sessions': session_stats['total_sessions'],
-            'solved_sessions': session_stats['solved_sessions'],
-            'session_success_rate': session_stats['success_rate'],
-            'total_practice_time': session_stats['total_time_seconds'],
-            'average_session_time': session_stats['average_time_seconds'],
-            'total_hints_used': session_stats['total_hints_used'],
-            'current_streak': streak,
-            'longest_streak': longest_streak
+            'total_problems': total,
+            'total_solved': solved,
+            'total_in_progress': stats.status_counts.get('In Progress', 0),
+            'total_not_started': stats.status_counts.get('Not Started', 0),
+            'completion_rate': (solved / total * 100) if total > 0 else 0,
+            'total_sessions': total_sessions,
+            'solved_sessions': stats.solved_sessions,
+            'session_success_rate': (stats.solved_sessions / total_sessions * 100) if total_sessions > 0 else 0,
+            'total_practice_time': stats.total_time,
+            'average_session_time': int(stats.total_time / total_sessions) if total_sessions > 0 else 0,
+            'total_hints_used': stats.total_hints,
+            'current_streak': self.calculate_streak(),
+            'longest_streak': self.calculate_longest_streak()
         }
     
     def calculate_streak(self):
-        if not self.sessions:
-            return 0
-        
-        dates = set()
-        for session in self.sessions:
-            date = session.start_time.split('T')[0]
-            dates.add(date)
-        
-        sorted_dates = sorted(dates, reverse=True)
-        today = datetime.now().date()
-        streak = 0
-        
-        for i in range(len(sorted_dates)):
-            date = datetime.fromisoformat(sorted_dates[i]).date()
-            expected_date = today - timedelta(days=i)
-            
-            if date == expected_date:
-                streak += 1
-            else:
-                break
-        
-        return streak
+        return self.stats.current_streak(datetime.now().date())
     
     def calculate_longest_streak(self):
-        if not self.sessions:
-            return 0
-        
-        dates = set()
-        for session in self.sessions:
-            date = session.start_time.split('T')[0]
-            dates.add(date)
-        
-        sorted_dates = sorted(dates)
-        
-        if not sorted_dates:
-            return 0
-        
-        longest = 1
-        current = 1
-        
-        for i in range(1, len(sorted_dates)):
-            prev_date = datetime.fromisoformat(sorted_dates[i-1]).date()
-            curr_date = datetime.fromisoformat(sorted_dates[i]).date()
-            
-            if (curr_date - prev_date).days == 1:
-                current += 1
-                longest = max(longest, current)
-            else:
-                current = 1
-        
-        return longest
+        return self.stats.longest_streak
     
     def get_topic_analysis(self):
-        topic_stats = {}
-        
-        for problem in self.problems:
-            for topic in problem.topics:
-                if topic not in topic_stats:
-                    topic_stats[topic] = {'total': 0, 'solved': 0, 'success_rate': 0}
-                
-                topic_stats[topic]['total'] += 1
-                
-                if problem.status == 'Solved' or problem.status == 'Reviewed':
-                    topic_stats[topic]['solved'] += 1
-        
-        for topic, stats in topic_stats.items():
-            if stats['total'] > 0:
-                stats['success_rate'] = stats['solved'] / stats['total']
-            else:
-                stats['success_rate'] = 0
-        
-        return topic_stats
+        return self.stats.topic_analysis()
     
     def get_difficulty_analysis(self):
-        diff_stats = {
-            'Easy': {'total': 0, 'solved': 0, 'total_time': 0, 'count': 0, 'avg_time': 0},
-            'Medium': {'total': 0, 'solved': 0, 'total_time': 0, 'count': 0, 'avg_time': 0},
-            'Hard': {'total': 0, 'solved': 0, 'total_time': 0, 'count': 0, 'avg_time': 0}
-        }
-        
-        for problem in self.problems:
-            diff = problem.difficulty
-            diff_stats[diff]['total'] += 1
-            
-            if problem.status == 'Solved' or problem.status == 'Reviewed':
-                diff_stats[diff]['solved'] += 1
-        
-        for session in self.sessions:
-            if session.solved:
-                problem = self.problem_manager.get_problem(session.problem_id)
-                if problem:
-                    diff = problem.difficulty
-                    diff_stats[diff]['total_time'] += session.duration_seconds
-                    diff_stats[diff]['count'] += 1
-        
-        for diff, stats in diff_stats.items():
-            if stats['count'] > 0:
-                stats['avg_time'] = stats['total_time'] // stats['count']
-            else:
-                stats['avg_time'] = 0
-        
-        return diff_stats
+        return self.stats.difficulty_analysis()
     
     def get_practice_calendar(self, days=30):
-        calendar = {}
-        today = datetime.now().date()
-        
-        for i in range(days):
-            date = (today - timedelta(days=i)).isoformat()
-            calendar[date] = 0
-        
-        for session in self.sessions:
-            date = session.start_time.split('T')[0]
-            if date in calendar:
-                calendar[date] += 1
-        
-        return calendar
+        return self.stats.practice_calendar(datetime.now().date(), days)
     
     def get_weak_topics(self, threshold=0.5):
         topic_stats = self.get_topic_analysis()
@@ -173,17 +78,19 @@ class Analytics:
         
         return strong
     
+    def get_report(self, days=30):
+        """Every report section as plain data, as printed by generate_full_report"""
+        return {
+            'statistics': self.calculate_statistics(),
+            'difficulty': self.get_difficulty_analysis(),
+            'topics': self.get_topic_analysis(),
+            'calendar': self.get_practice_calendar(days),
+            'strong_topics': dict(self.get_strong_topics()),
+            'weak_topics': dict(self.get_weak_topics())
+        }
+    
     def format_time(self, seconds):
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
-        
-        if hours > 0:
-            return f"{hours}h {minutes}m"
-        elif minutes > 0:
-            return f"{minutes}m {secs}s"
-        else:
-            return f"{secs}s"
+        return format_duration(seconds)
     
     def draw_ascii_bar(self, value, max_value, width=40):
         if max_value == 0:
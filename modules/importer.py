@@ -0,0 +1,265 @@
+"""
+Import/Export Module
+Streaming bulk import of platform export files (CSV/JSONL/JSON) and the matching export
+"""
+
+from itertools import islice
+import time
+import json
+import csv
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.data_handler import iter_json_array
+
+FORMATS = ('csv', 'jsonl', 'json')
+
+# Column names used by common platform exports -> problem field
+COLUMN_ALIASES = {
+    'title': 'title', 'name': 'title', 'problem': 'title', 'question': 'title',
+    'difficulty': 'difficulty', 'level': 'difficulty',
+    'topics': 'topics', 'tags': 'topics', 'topic': 'topics', 'tag': 'topics',
+    'platform': 'platform', 'source': 'platform', 'site': 'platform',
+    'url': 'url', 'link': 'url', 'href': 'url',
+    'status': 'status', 'state': 'status',
+}
+
+DIFFICULTY_ALIASES = {
+    'easy': "Easy", 'e': "Easy", '1': "Easy",
+    'medium': "Medium", 'med': "Medium", 'm': "Medium", '2': "Medium",
+    'hard': "Hard", 'h': "Hard", '3': "Hard",
+}
+
+STATUS_ALIASES = {
+    'not started': "Not Started", 'todo': "Not Started", 'new': "Not Started", '': "Not Started",
+    'in progress': "In Progress", 'attempted': "In Progress", 'started': "In Progress",
+    'solved': "Solved", 'accepted': "Solved", 'ac': "Solved", 'done': "Solved",
+    'reviewed': "Reviewed",
+}
+
+TOPIC_SEPARATORS = str.maketrans({';': ',', '|': ','})
+
+EXPORT_FIELDS = ('id', 'title', 'difficulty', 'topics', 'platform', 'url', 'status',
+                 'date_added', 'date_modified')
+
+
+class ImportResult:
+    """Counts and timing of one import run"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []  # (line number, message) of rejected rows
+        self.seconds = 0.0
+    
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+    
+    def __str__(self):
+        return (f"{self.rows} rows: {self.added} added, {self.duplicates} duplicates, "
+                f"{self.invalid} invalid in {self.seconds:.2f}s "
+                f"({self.rows_per_second:,.0f} rows/sec)")
+
+
+def detect_format(filename):
+    """'csv', 'jsonl' or 'json' (one array, like the data files) from the file extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        return 'json'
+    raise ValueError(f"cannot tell the format of {filename}; pass csv, jsonl or json")
+
+
+def read_rows(file, format):
+    """
+    Stream the rows of an export file
+    
+    JSON files hold one array, which is streamed element by element; their
+    rows are numbered by element instead of by line.
+    
+    Yields:
+        tuple: (line number, dict of column -> value); the dict is None
+            for a JSONL line or JSON element that is not a JSON object
+    
+    Raises:
+        ValueError: If a JSON file does not hold an array
+    """
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    
+    if format == 'json':
+        for number, row in enumerate(iter_json_array(file), 1):
+            yield number, row if isinstance(row, dict) else None
+        return
+    
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def split_topics(value):
+    """Topics from a list or a comma/semicolon/pipe separated string"""
+    if isinstance(value, list):
+        items = value
+    else:
+        items = str(value or '').translate(TOPIC_SEPARATORS).split(',')
+    return [' '.join(str(item).split()) for item in items if str(item).strip()]
+
+
+def normalize_row(row, topic_spellings):
+    """
+    Validate an export row and turn it into add_problems() arguments
+    
+    Args:
+        row (dict): Column -> value, with any of the COLUMN_ALIASES names
+        topic_spellings (dict): Casefolded topic -> spelling to use; new
+            topics are added to it, so every row spells a topic the same way
+    
+    Returns:
+        dict: title, difficulty, topics, platform, url and status
+    
+    Raises:
+        ValueError: If the row has no title or an unknown difficulty/status
+    """
+    fields = {}
+    for column, value in row.items():
+        field = COLUMN_ALIASES.get(str(column).strip().lower())
+        if field is not None and field not in fields:
+            fields[field] = value
+    
+    title = ' '.join(str(fields.get('title') or '').split())
+    if not title:
+        raise ValueError("missing title")
+    
+    difficulty = DIFFICULTY_ALIASES.get(str(fields.get('difficulty') or '').strip().lower())
+    if difficulty is None:
+        raise ValueError(f"unknown difficulty {fields.get('difficulty')!r}")
+    
+    status = STATUS_ALIASES.get(' '.join(str(fields.get('status') or '').lower().split()))
+    if status is None:
+        raise ValueError(f"unknown status {fields.get('status')!r}")
+    
+    topics = []
+    for topic in split_topics(fields.get('topics')):
+        topic = topic_spellings.setdefault(topic.casefold(), topic)
+        if topic not in topics:
+            topics.append(topic)
+    
+    return {
+        'title': title,
+        'difficulty': difficulty,
+        'topics': topics,
+        'platform': str(fields.get('platform') or '').strip(),
+        'url': str(fields.get('url') or '').strip(),
+        'status': status
+    }
+
+
+def import_problems(pm, rows, chunk_size=5000, dry_run=False):
+    """
+    Bulk-add problems from export rows
+    
+    Rows are validated and normalized a chunk at a time; each chunk gets
+    one id reservation, and the whole import reaches storage in a single
+    write when it finishes. A row that duplicates a problem in the library
+    or an earlier row (see ProblemManager.find_duplicate) only adds its
+    topics and a missing platform or URL to that problem, and is counted
+    as a duplicate.
+    
+    Args:
+        pm (ProblemManager): Library to import into
+        rows (iterable): (line number, row dict) pairs, see read_rows()
+        chunk_size (int): Rows validated and added per step
+        dry_run (bool): Validate and count without adding anything; only
+            duplicates of problems already in the library are counted
+    
+    Returns:
+        ImportResult: What happened to the rows
+    """
+    result = ImportResult()
+    start = time.perf_counter()
+    
+    topic_spellings = {topic.casefold(): topic for topic in pm.get_topics()}
+    rows = iter(rows)
+    
+    with pm.batch():
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            
+            entries = []
+            for number, row in chunk:
+                result.rows += 1
+                try:
+                    if row is None:
+                        raise ValueError("not a JSON object")
+                    entries.append(normalize_row(row, topic_spellings))
+                except ValueError as e:
+                    result.invalid += 1
+                    result.errors.append((number, str(e)))
+            
+            if dry_run:
+                added = sum(1 for entry in entries
+                            if pm.find_duplicate(entry['title'], entry['url']) is None)
+            else:
+                before = len(pm.problems)
+                pm.add_problems(entries)
+                added = len(pm.problems) - before
+            result.added += added
+            result.duplicates += len(entries) - added
+    
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def export_problems(problems, file, format):
+    """
+    Write problems to an open file one row at a time
+    
+    CSV topics are joined with ';', which import_problems() splits again.
+    
+    Returns:
+        int: Number of problems written
+    """
+    count = 0
+    
+    if format == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_FIELDS)
+        for problem in problems:
+            record = problem.to_dict()
+            record['topics'] = ';'.join(record['topics'])
+            writer.writerow([record[field] for field in EXPORT_FIELDS])
+            count += 1
+    elif format == 'json':
+        # One array, like the data files, written as it goes
+        file.write('[')
+        for problem in problems:
+            file.write(',\n' if count else '\n')
+            file.write(json.dumps(problem.to_dict(), ensure_ascii=False))
+            count += 1
+        file.write('\n]\n' if count else ']\n')
+    else:
+        for problem in problems:
+            file.write(json.dumps(problem.to_dict(), ensure_ascii=False) + '\n')
+            count += 1
+    
+    return count
@@ -3,28 +3,109 @@ Problem Manager Module
 Handles CRUD operations for coding problems
 """
 
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
+from enum import IntEnum
+from operator import attrgetter
+from array import array
+import atexit
+import json
+import threading
 import sys
 import os
 
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_handler import read_json, write_json
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.storage import JSONStore, ID_BLOCK_SIZE
+from utils.locking import FileLock
+from utils.search_index import SearchIndex, SubstringIndex
+from utils.helpers import iso_to_epoch, epoch_to_iso, normalize_url, canonical_title
+from utils.data_handler import replay_journal_stream, read_json, write_json
+
+
+class Difficulty(IntEnum):
+    """Compact difficulty codes stored on Problem objects"""
+    EASY = 0
+    MEDIUM = 1
+    HARD = 2
+
+
+class Status(IntEnum):
+    """Compact status codes stored on Problem objects"""
+    NOT_STARTED = 0
+    IN_PROGRESS = 1
+    SOLVED = 2
+    REVIEWED = 3
+
+
+DIFFICULTY_LABELS = ('Easy', 'Medium', 'Hard')
+DIFFICULTY_BY_CODE = tuple(Difficulty)
+STATUS_BY_CODE = tuple(Status)
+STATUS_LABELS = ('Not Started', 'In Progress', 'Solved', 'Reviewed')
+DIFFICULTY_CODES = {label: Difficulty(i) for i, label in enumerate(DIFFICULTY_LABELS)}
+STATUS_CODES = {label: Status(i) for i, label in enumerate(STATUS_LABELS)}
 
 
 class Problem:
-    """Represents a single coding problem"""
+    """
+    Represents a single coding problem
+    
+    Uses __slots__ and keeps difficulty/status as enum codes and timestamps
+    as integer epoch microseconds; the public attributes still read and
+    write the original strings.
+    """
+    
+    __slots__ = ('id', 'title', '_difficulty', 'topics', 'platform', 'url', '_status',
+                 '_date_added', '_date_modified')
     
     def __init__(self, id, title, difficulty, topics=None, platform="", url="", status="Not Started"):
         self.id = id
         self.title = title
         self.difficulty = difficulty  # Easy, Medium, Hard
         self.topics = topics if topics else []
-        self.platform = platform
+        self.platform = sys.intern(platform) if platform else platform
         self.url = url
         self.status = status  # Not Started, In Progress, Solved, Reviewed
         self.date_added = datetime.now().isoformat()
-        self.date_modified = datetime.now().isoformat()
+        self.date_modified = self.date_added
+    
+    @property
+    def difficulty(self):
+        value = self._difficulty
+        return value if isinstance(value, str) else DIFFICULTY_LABELS[value]
+    
+    @difficulty.setter
+    def difficulty(self, value):
+        # Labels outside the known set are kept verbatim
+        self._difficulty = DIFFICULTY_CODES.get(value, value)
+    
+    @property
+    def status(self):
+        value = self._status
+        return value if isinstance(value, str) else STATUS_LABELS[value]
+    
+    @status.setter
+    def status(self, value):
+        self._status = STATUS_CODES.get(value, value)
+    
+    @property
+    def date_added(self):
+        return epoch_to_iso(self._date_added)
+    
+    @date_added.setter
+    def date_added(self, value):
+        self._date_added = iso_to_epoch(value)
+    
+    @property
+    def date_modified(self):
+        return epoch_to_iso(self._date_modified)
+    
+    @date_modified.setter
+    def date_modified(self, value):
+        self._date_modified = iso_to_epoch(value)
     
     def to_dict(self):
         """Convert Problem object to dictionary for JSON serialization"""
@@ -47,16 +128,72 @@ class Problem:
             id=data['id'],
             title=data['title'],
             difficulty=data['difficulty'],
-            topics=data.get('topics', []),
+            topics=[sys.intern(topic) for topic in data.get('topics', [])],
             platform=data.get('platform', ''),
             url=data.get('url', ''),
             status=data.get('status', 'Not Started')
         )
         # Restore original timestamps
-        problem.date_added = data.get('date_added', problem.date_added)
-        problem.date_modified = data.get('date_modified', problem.date_modified)
+        if 'date_added' in data:
+            problem.date_added = data['date_added']
+        if 'date_modified' in data:
+            problem.date_modified = data['date_modified']
         return problem
     
+    @classmethod
+    def write_snapshot(cls, writer, records):
+        """
+        Write problem dicts to a SnapshotWriter (see utils/snapshot.py)
+        
+        Ids, difficulty/status codes and timestamps go into columns; the
+        text fields go into the heap. A problem whose difficulty, status or
+        timestamps have no compact form is stored whole in the heap.
+        """
+        columns = {'ids': array('q'), 'difficulty': array('b'), 'status': array('b'),
+                   'date_added': array('q'), 'date_modified': array('q'), 'refs': array('q')}
+        
+        for record in records:
+            problem = cls.from_dict(record)
+            compact = (isinstance(problem._difficulty, Difficulty)
+                       and isinstance(problem._status, Status)
+                       and isinstance(problem._date_added, int)
+                       and isinstance(problem._date_modified, int))
+            
+            columns['ids'].append(problem.id)
+            columns['difficulty'].append(problem._difficulty if compact else -1)
+            columns['status'].append(problem._status if compact else -1)
+            columns['date_added'].append(problem._date_added if compact else 0)
+            columns['date_modified'].append(problem._date_modified if compact else 0)
+            columns['refs'].append(writer.add(
+                [problem.title, problem.topics, problem.platform, problem.url]
+                if compact else problem.to_dict()))
+        
+        writer.finish(columns)
+    
+    @classmethod
+    def iter_snapshot(cls, snapshot):
+        """Problems stored in a snapshot written by write_snapshot()"""
+        columns = [snapshot.column(name) for name in
+                   ('ids', 'difficulty', 'status', 'date_added', 'date_modified', 'refs')]
+        
+        for problem_id, difficulty, status, date_added, date_modified, ref in zip(*columns):
+            value = snapshot(ref)
+            if difficulty < 0:
+                yield cls.from_dict(value)
+                continue
+            
+            # Fill the slots directly, skipping __init__ and timestamp parsing
+            problem = cls.__new__(cls)
+            problem.id = problem_id
+            problem.title, topics, platform, problem.url = value
+            problem.topics = [sys.intern(topic) for topic in topics]
+            problem.platform = sys.intern(platform) if platform else platform
+            problem._difficulty = DIFFICULTY_BY_CODE[difficulty]
+            problem._status = STATUS_BY_CODE[status]
+            problem._date_added = date_added
+            problem._date_modified = date_modified
+            yield problem
+    
     def __str__(self):
         """String representation for printing"""
         return f"[{self.id}] {self.title} ({self.difficulty}) - {self.status}"
@@ -66,61 +203,682 @@ class Problem:
         return f"Problem(id={self.id}, title='{self.title}', difficulty='{self.difficulty}')"
 
 
+def file_stamp(filename):
+    """Modification time and size of a file, None if it is missing"""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
 class ProblemManager:
-    """Manages the collection of all coding problems"""
+    """
+    Manages the collection of all coding problems
+    
+    With a status_file (a team member's, see modules/team.py) the problems
+    show the member's own statuses. Those are kept in status_file as
+    {id: status}; the stored problems keep the shared catalogue's status,
+    so one member's progress does not change what the others see.
+    """
     
-    def __init__(self, data_file='data/problems.json'):
+    def __init__(self, data_file='data/problems.json', write_behind=None, compact_threshold=1000,
+                 storage=None, snapshot=False, status_file=None):
         self.data_file = data_file
+        self.storage = storage if storage is not None else JSONStore(data_file, compact_threshold)
+        # Decode problems from a memory-mapped binary snapshot when the store keeps one
+        self.snapshot = snapshot and self.storage.supports_snapshots
         self.problems = []
+        self._by_id = {}  # id -> Problem, kept in sync with self.problems
+        self._by_difficulty = defaultdict(set)  # difficulty -> ids
+        self._by_status = defaultdict(set)  # status -> ids
+        self._by_topic = defaultdict(set)  # topic -> ids
+        self._by_url = defaultdict(set)  # normalized URL -> ids, for duplicate checks
+        self._by_title = defaultdict(set)  # canonical title -> ids, for duplicate checks
+        self.search_index = SearchIndex(data_file + '.search')
+        self.title_index = None  # Title n-grams for substring search, built on first use
+        self._listeners = []  # Notified of every change, see subscribe()
+        self._next_id = 1  # Id sequence high-water mark, never decreases
+        self._saved_next_id = 0  # Value of the sequence last written to storage
+        self._reserved_until = 0  # End of the ids reserved in storage by this manager
+        self.write_behind = write_behind  # Seconds to coalesce saves over, None saves immediately
+        self._dirty_ids = set()  # Problems added or edited since the last flush
+        self._deleted_ids = set()  # Problems deleted since the last flush
+        self.status_file = status_file
+        self._status_lock = FileLock(status_file + '.lock') if status_file else None
+        self._statuses = {}  # id -> the member's status, see status_file
+        self._status_changes = {}  # Member statuses not written to status_file yet
+        self._status_stamp = None  # Stamp of status_file as of the last read or write
+        self._shared_statuses = {}  # id -> stored status of problems showing the member's
+        self._batch_depth = 0
+        self._flush_timer = None
+        self._lock = threading.RLock()
         self.load_problems()
+        
+        if write_behind is not None:
+            atexit.register(self.flush)
     
     def load_problems(self):
-        """Load problems from JSON file into memory"""
-        data = read_json(self.data_file)
-        self.problems = [Problem.from_dict(p) for p in data]
+        """Load problems from the storage backend into memory"""
+        with self._lock, self.storage.locked():
+            for listener in self._listeners:
+                listener.problems_reset()
+            
+            problems = self._load_snapshot() if self.snapshot else None
+            if problems is not None:
+                self.problems = problems
+            else:
+                # Records are streamed into Problem objects without a full list of dicts
+                try:
+                    self.problems = [Problem.from_dict(p) for p in self.storage.load_stream()]
+                except json.JSONDecodeError:
+                    # Corrupted snapshot; load() restores it from the backup
+                    self.problems = [Problem.from_dict(p) for p in self.storage.load()]
+            if self.status_file:
+                self._read_statuses()
+                self._shared_statuses = {}
+                for problem in self.problems:
+                    self._show_member_status(problem)
+            self._by_id = {}
+            self._by_difficulty = defaultdict(set)
+            self._by_status = defaultdict(set)
+            self._by_topic = defaultdict(set)
+            self._by_url = defaultdict(set)
+            self._by_title = defaultdict(set)
+            self.title_index = None
+            for problem in self.problems:
+                self._index_problem(problem)
+            
+            # Only problems modified since the index was saved get re-tokenized
+            self.search_index.load()
+            self.search_index.sync({p.id: (p.date_modified, p) for p in self.problems},
+                                   self._search_fields)
+            
+            # Ids of deleted problems stay reserved through the stored sequence
+            self._saved_next_id = self.storage.read_sequence()
+            if self._saved_next_id != self._reserved_until:
+                self._next_id = max(self._next_id, self._saved_next_id)
+            self._next_id = max(self._next_id, max(self._by_id, default=0) + 1)
+    
+    def _load_snapshot(self):
+        """
+        Problems from the binary snapshot with the journal applied
+        
+        The snapshot is (re)built from the JSON snapshot when it is missing
+        or stale. Returns None if it cannot be used, so the caller loads the
+        usual way.
+        """
+        ops = self.storage.read_journal()
+        snapshot = self.storage.open_snapshot()
+        
+        if snapshot is None:
+            writer = self.storage.snapshot_writer()
+            if writer is None:
+                return None
+            try:
+                Problem.write_snapshot(writer, self.storage.iter_snapshot_records())
+            except (OSError, json.JSONDecodeError) as e:
+                writer.abort()
+                print(f"Warning: could not build a binary snapshot of {self.data_file}: {e}")
+                return None
+            snapshot = self.storage.open_snapshot()
+            if snapshot is None:
+                return None
+        
+        # Everything is decoded up front, so the file is not kept mapped
+        with snapshot:
+            records = replay_journal_stream(Problem.iter_snapshot(snapshot), ops,
+                                            key=attrgetter('id'))
+            return [Problem.from_dict(p) if isinstance(p, dict) else p for p in records]
+    
+    def _persist_sequence(self):
+        """
+        Store the id high-water mark before the records that use it
+        
+        Call with the storage lock held. Ids reserved by _allocate_ids() but
+        not handed out are given back, unless another process has reserved
+        ids after them in the meantime.
+        """
+        if self._reserved_until:
+            if self._next_id < self._reserved_until == self.storage.read_sequence():
+                self.storage.write_sequence(self._next_id)
+                self._saved_next_id = self._next_id
+            self._reserved_until = 0
+        
+        if self._next_id > self._saved_next_id:
+            self.storage.write_sequence(self._next_id)
+            self._saved_next_id = self._next_id
+    
+    def _reserve_ids(self, count):
+        """
+        Make sure the next count ids can be handed out without a storage write
+        
+        Ids are reserved in the stored sequence under the storage lock, so
+        other processes sharing the data never hand out the same ids.
+        Inside batch() ID_BLOCK_SIZE more ids are reserved with them.
+        """
+        if self._next_id + count <= self._reserved_until:
+            return
+        
+        with self.storage.locked():
+            stored = self.storage.read_sequence()
+            if stored != self._reserved_until:
+                # Others reserved ids since; ours continue after theirs
+                self._next_id = max(self._next_id, stored)
+            extra = ID_BLOCK_SIZE if self._batch_depth else 0
+            self._reserved_until = self._next_id + count + extra
+            self.storage.write_sequence(self._reserved_until)
+            self._saved_next_id = self._reserved_until
+    
+    def _allocate_ids(self, count=1):
+        """
+        Hand out a contiguous range of new ids in O(1), see _reserve_ids()
+        
+        Returns:
+            int: First id of the range
+        """
+        self._reserve_ids(count)
+        first_id = self._next_id
+        self._next_id += count
+        return first_id
+    
+    def _merge_external_changes(self):
+        """
+        Apply the changes other processes saved since our last read or write
+        
+        Call with the storage lock held. A problem with unflushed local
+        changes keeps the local version, which the next flush writes over
+        the other one (last writer wins per problem).
+        """
+        ops = self.storage.external_changes()
+        if ops is None:
+            self._reload()
+            return
+        
+        for op in ops:
+            if op.get('op') == 'put':
+                problem_id = op['data']['id']
+            elif op.get('op') == 'delete':
+                problem_id = op['id']
+            else:
+                continue
+            if problem_id in self._dirty_ids or problem_id in self._deleted_ids:
+                continue
+            
+            if op['op'] == 'put':
+                problem = Problem.from_dict(op['data'])
+                self._show_member_status(problem)
+                self._replace_problem(problem)
+            elif problem_id in self._by_id:
+                self._remove_problem(self._by_id[problem_id])
+        
+        self._merge_status_changes()
+    
+    def _read_statuses(self):
+        """Load the member's statuses from status_file, keeping the unwritten ones"""
+        with self._status_lock:
+            self._status_stamp = file_stamp(self.status_file)
+            stored = read_json(self.status_file) or {}
+        self._statuses = {int(problem_id): status for problem_id, status in stored.items()}
+        self._statuses.update(self._status_changes)
+    
+    def _show_member_status(self, problem):
+        """Give a problem read from storage the member's status, if they set one"""
+        status = self._statuses.get(problem.id)
+        if status is not None:
+            self._shared_statuses[problem.id] = problem.status
+            problem.status = status
+    
+    def _set_member_status(self, problem, status):
+        """Change the member's status of a problem; call with the problem unindexed"""
+        self._shared_statuses.setdefault(problem.id, problem.status)
+        problem.status = status
+        self._statuses[problem.id] = status
+        self._status_changes[problem.id] = status
+    
+    def _merge_status_changes(self):
+        """Apply the statuses the member's other processes saved since our last read or write"""
+        if not self.status_file or file_stamp(self.status_file) == self._status_stamp:
+            return
+        
+        old = self._statuses
+        self._read_statuses()
+        for problem_id, status in self._statuses.items():
+            problem = self._by_id.get(problem_id)
+            if problem is not None and old.get(problem_id) != status:
+                self._unindex_problem(problem)
+                self._shared_statuses.setdefault(problem_id, problem.status)
+                problem.status = status
+                self._index_problem(problem)
+    
+    def _write_statuses(self):
+        """
+        Add the unwritten member statuses to status_file
+        
+        Returns:
+            int: Number of statuses written
+        """
+        if not self._status_changes:
+            return 0
+        
+        with self._status_lock:
+            self._merge_status_changes()
+            write_json(self.status_file, {str(problem_id): status
+                                          for problem_id, status in self._statuses.items()})
+            self._status_stamp = file_stamp(self.status_file)
+        
+        count = len(self._status_changes)
+        self._status_changes.clear()
+        return count
+    
+    def _record(self, problem):
+        """Stored form of a problem, with the catalogue's status rather than the member's"""
+        record = problem.to_dict()
+        if problem.id in self._shared_statuses:
+            record['status'] = self._shared_statuses[problem.id]
+        return record
+    
+    def _reload(self):
+        """Reload the collection from storage, keeping unflushed local changes"""
+        pending = [self._by_id[i] for i in self._dirty_ids if i in self._by_id]
+        deleted = list(self._deleted_ids)
+        
+        self.load_problems()
+        for problem in pending:
+            self._replace_problem(problem)
+        for problem_id in deleted:
+            if problem_id in self._by_id:
+                self._remove_problem(self._by_id[problem_id])
+    
+    def refresh(self):
+        """Pick up the changes other processes saved since our last read or write"""
+        with self._lock, self.storage.locked():
+            self._merge_external_changes()
     
     def save_problems(self):
-        """Save problems from memory to JSON file"""
-        data = [problem.to_dict() for problem in self.problems]
-        write_json(self.data_file, data)
+        """Rewrite the full collection in storage (compacts the JSON journal)"""
+        with self._lock, self.storage.locked():
+            self._merge_external_changes()
+            self._write_statuses()
+            self._persist_sequence()
+            data = [self._record(problem) for problem in self.problems]
+            if self.storage.write_all(data):
+                self._dirty_ids.clear()
+                self._deleted_ids.clear()
+            self.search_index.save()
     
-    def add_problem(self, title, difficulty, topics=None, platform="", url=""):
+    def flush(self):
+        """
+        Write pending changes to storage in a single append/transaction
+        
+        Returns:
+            int: Number of changes written
+        """
+        with self._lock, self.storage.locked():
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            
+            if not self.has_pending_changes():
+                return 0
+            
+            self._merge_external_changes()
+            statuses = self._write_statuses()
+            changes = len(self._dirty_ids) + len(self._deleted_ids)
+            if not changes:
+                return statuses
+            if self.storage.needs_compaction(len(self.problems), pending=changes):
+                # The appended entries would be compacted right away (e.g. after
+                # a bulk import), so rewrite the collection once instead
+                self.save_problems()
+                return changes + statuses
+            
+            puts = [self._record(self._by_id[i]) for i in self._dirty_ids if i in self._by_id]
+            deletes = list(self._deleted_ids)
+            
+            self._dirty_ids.clear()
+            self._deleted_ids.clear()
+            self._persist_sequence()
+            self.storage.write_changes(puts=puts, deletes=deletes)
+            
+            return len(puts) + len(deletes) + statuses
+    
+    def has_pending_changes(self):
+        """Whether some mutations have not reached storage yet"""
+        return bool(self._dirty_ids or self._deleted_ids or self._status_changes)
+    
+    def data_stamp(self):
+        """
+        Identifies the stored state the in-memory problems reflect
+        
+        Returns:
+            list or None: Equal stamps mean equal data; None when there are
+                unwritten changes or the backend cannot tell
+        """
+        if self.has_pending_changes():
+            return None
+        stamp = self.storage.data_stamp()
+        if self.status_file and stamp is not None:
+            stamp = stamp + [self._status_stamp]
+        return stamp
+    
+    def close(self):
+        """Flush pending changes, stop the write-behind timer and save the search index"""
+        self.flush()
+        self.search_index.save()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Collect mutations and flush them in one write when the block exits
+        
+        Example:
+            with pm.batch():
+                for problem_id in ids:
+                    pm.edit_problem(problem_id, status="Reviewed")
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+    
+    def _mark_changed(self, problem_id, deleted=False):
+        """Record a mutation and persist it according to the save mode"""
+        if deleted:
+            self._dirty_ids.discard(problem_id)
+            self._deleted_ids.add(problem_id)
+        else:
+            self._deleted_ids.discard(problem_id)
+            self._dirty_ids.add(problem_id)
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Persist the pending changes now or later, according to the save mode"""
+        if self._batch_depth > 0:
+            return
+        
+        if self.write_behind is None:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.write_behind, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def add_problem(self, title, difficulty, topics=None, platform="", url="", upsert=True,
+                    overwrite=False):
         """
         Add a new problem to the library
         
+        A problem that is already in the library (see find_duplicate) is
+        returned instead, after gaining the new topics and a missing
+        platform or URL. Its difficulty is only replaced with overwrite=True;
+        its status is kept. Callers tell the cases apart by whether the
+        library grew.
+        
         Args:
             title (str): Problem title
             difficulty (str): Easy, Medium, or Hard
             topics (list): List of topic tags
             platform (str): Platform name (LeetCode, HackerRank, etc.)
             url (str): Problem URL
+            upsert (bool): False always adds a new problem
+            overwrite (bool): Give an existing problem the new difficulty
         
         Returns:
-            Problem: The newly created problem
+            Problem: The newly created (or updated existing) problem
         """
-        # Generate new ID
-        if not self.problems:
-            new_id = 1
-        else:
-            new_id = max(p.id for p in self.problems) + 1
-        
-        # Create new problem
-        new_problem = Problem(
-            id=new_id,
-            title=title,
-            difficulty=difficulty,
-            topics=topics,
-            platform=platform,
-            url=url,
-            status="Not Started"
-        )
-        
-        # Add to list and save
-        self.problems.append(new_problem)
-        self.save_problems()
+        with self._lock:
+            existing = self.find_duplicate(title, url) if upsert else None
+            if existing is not None:
+                self._update_duplicate(existing, difficulty, topics, platform, url, overwrite)
+                return existing
+            
+            # Create new problem
+            new_problem = Problem(
+                id=self._allocate_ids(),
+                title=title,
+                difficulty=difficulty,
+                topics=topics,
+                platform=platform,
+                url=url,
+                status="Not Started"
+            )
+            
+            # Add to list and save
+            self._insert_problem(new_problem)
+            self._mark_changed(new_problem.id)
         
         return new_problem
     
+    def add_problems(self, entries, upsert=True, overwrite=False):
+        """
+        Add many problems with a single id reservation and a single write
+        
+        Entries that duplicate a problem in the library, or an earlier
+        entry, update that problem as add_problem() does.
+        
+        Args:
+            entries (iterable): Dicts with the add_problem arguments
+                (title, difficulty, topics, platform, url) and optionally status
+            upsert (bool): False always adds new problems
+            overwrite (bool): Give existing problems the entries' difficulty
+        
+        Returns:
+            list: The Problem object for each entry, new or updated
+        """
+        entries = list(entries)
+        problems = []
+        
+        with self.batch():
+            # Reserve ids for the entries new to the library up front. Adding
+            # earlier entries can change which later ones are new (one may
+            # fill in the URL another matched on), so each new problem still
+            # takes its id when it is created, reserving more if these run out
+            count = len(entries)
+            if upsert:
+                count = sum(1 for entry in entries
+                            if self.find_duplicate(entry['title'], entry.get('url', "")) is None)
+            self._reserve_ids(count)
+            
+            for entry in entries:
+                existing = None
+                if upsert:
+                    existing = self.find_duplicate(entry['title'], entry.get('url', ""))
+                if existing is not None:
+                    self._update_duplicate(existing, entry['difficulty'], entry.get('topics'),
+                                           entry.get('platform', ""), entry.get('url', ""),
+                                           overwrite)
+                    problems.append(existing)
+                    continue
+                
+                status = entry.get('status', "Not Started")
+                new_problem = Problem(
+                    id=self._allocate_ids(),
+                    title=entry['title'],
+                    difficulty=entry['difficulty'],
+                    topics=entry.get('topics'),
+                    platform=entry.get('platform', ""),
+                    url=entry.get('url', ""),
+                    status="Not Started" if self.status_file else status
+                )
+                if self.status_file and status != "Not Started":
+                    # The member's progress, not the catalogue's
+                    self._set_member_status(new_problem, status)
+                self._insert_problem(new_problem)
+                self._mark_changed(new_problem.id)
+                problems.append(new_problem)
+        
+        return problems
+    
+    def find_duplicate(self, title, url=""):
+        """
+        Find the problem a new title/URL would duplicate, in O(1)
+        
+        Problems match on their normalized URL. Without a URL match they
+        match on the canonical title (case, whitespace and punctuation
+        folded), unless both have URLs, which then tell them apart.
+        
+        Returns:
+            Problem or None: The matching problem with the lowest id
+        """
+        url = normalize_url(url)
+        if url:
+            ids = self._by_url.get(url)
+            if ids:
+                return self._by_id[min(ids)]
+        
+        candidates = [self._by_id[i] for i in self._by_title.get(canonical_title(title), ())]
+        candidates = [p for p in candidates if not url or not p.url]
+        return min(candidates, key=attrgetter('id')) if candidates else None
+    
+    def find_duplicates(self):
+        """
+        Group the problems of the library that duplicate each other
+        
+        Works from the URL and title indexes with a union-find, so the
+        pass is linear in the size of the library rather than pairwise.
+        Problems are linked as in find_duplicate(): by URL, or by title
+        when at most one of the two has a URL.
+        
+        Returns:
+            list: Lists of two or more Problems, each sorted by id, in
+                order of their lowest id
+        """
+        parent = {}
+        
+        def root(problem_id):
+            parent.setdefault(problem_id, problem_id)
+            while parent[problem_id] != problem_id:
+                parent[problem_id] = parent[parent[problem_id]]
+                problem_id = parent[problem_id]
+            return problem_id
+        
+        def link(ids, anchor):
+            anchor = root(anchor)
+            for problem_id in ids:
+                parent[root(problem_id)] = anchor
+        
+        for ids in self._by_url.values():
+            if len(ids) > 1:
+                link(ids, next(iter(ids)))
+        
+        for ids in self._by_title.values():
+            if len(ids) > 1:
+                without_url = [i for i in ids if not self._by_id[i].url]
+                if without_url:
+                    link(ids, without_url[0])
+        
+        groups = defaultdict(list)
+        for problem_id in parent:
+            groups[root(problem_id)].append(problem_id)
+        
+        duplicates = [sorted(ids) for ids in groups.values() if len(ids) > 1]
+        duplicates.sort()
+        return [[self._by_id[i] for i in ids] for ids in duplicates]
+    
+    def _update_duplicate(self, problem, difficulty, topics, platform, url, overwrite=False):
+        """Fold the fields of a duplicate add into the existing problem, filling gaps only"""
+        updates = {}
+        if overwrite and difficulty != problem.difficulty:
+            updates['difficulty'] = difficulty
+        new_topics = [t for t in topics or [] if t not in problem.topics]
+        if new_topics:
+            updates['topics'] = problem.topics + new_topics
+        if platform and not problem.platform:
+            updates['platform'] = platform
+        if url and not problem.url:
+            updates['url'] = url
+        
+        if updates:
+            self.edit_problem(problem.id, **updates)
+    
+    def _insert_problem(self, problem):
+        """Add a problem to the in-memory collection and its indexes"""
+        self.problems.append(problem)
+        self._index_problem(problem)
+        self.search_index.add(problem.id, self._search_fields(problem), problem.date_modified)
+    
+    def _replace_problem(self, problem):
+        """Put a problem into the in-memory collection in place of the one with its id"""
+        old = self._by_id.get(problem.id)
+        if old is None:
+            self._insert_problem(problem)
+            return
+        
+        self._unindex_problem(old)
+        self.problems[self.problems.index(old)] = problem
+        self._index_problem(problem)
+        self.search_index.add(problem.id, self._search_fields(problem), problem.date_modified)
+    
+    def _remove_problem(self, problem):
+        """Drop a problem from the in-memory collection and its indexes"""
+        self.problems.remove(problem)
+        self._unindex_problem(problem)
+        self.search_index.remove(problem.id)
+    
+    @staticmethod
+    def _search_fields(problem):
+        """Text fields of a problem and their search weights"""
+        return [(problem.title, 3), (' '.join(problem.topics), 2), (problem.platform, 1)]
+    
+    def subscribe(self, listener):
+        """
+        Register an object to be told about every problem change
+        
+        The listener needs problem_indexed(problem), problem_unindexed(problem)
+        and problems_reset() methods. Edits are reported as an unindex of the
+        old values followed by an index of the new ones.
+        """
+        self._listeners.append(listener)
+    
+    def unsubscribe(self, listener):
+        """Stop notifying a listener registered with subscribe()"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _index_problem(self, problem):
+        """Add a problem to the id and secondary indexes"""
+        self._by_id[problem.id] = problem
+        self._by_difficulty[problem.difficulty].add(problem.id)
+        self._by_status[problem.status].add(problem.id)
+        for topic in problem.topics:
+            self._by_topic[topic].add(problem.id)
+        url = normalize_url(problem.url)
+        if url:
+            self._by_url[url].add(problem.id)
+        self._by_title[canonical_title(problem.title)].add(problem.id)
+        if self.title_index is not None:
+            self.title_index.add(problem.id, problem.title)
+        
+        for listener in self._listeners:
+            listener.problem_indexed(problem)
+    
+    def _unindex_problem(self, problem):
+        """Remove a problem from the id and secondary indexes"""
+        self._by_id.pop(problem.id, None)
+        if self.title_index is not None:
+            self.title_index.remove(problem.id)
+        
+        for listener in self._listeners:
+            listener.problem_unindexed(problem)
+        
+        keys = [(self._by_difficulty, problem.difficulty), (self._by_status, problem.status),
+                (self._by_url, normalize_url(problem.url)),
+                (self._by_title, canonical_title(problem.title))]
+        keys.extend((self._by_topic, topic) for topic in problem.topics)
+        
+        for index, key in keys:
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(problem.id)
+                if not ids:
+                    del index[key]
+    
     def get_problem(self, problem_id):
         """
         Get a problem by ID
@@ -131,15 +889,15 @@ class ProblemManager:
         Returns:
             Problem or None: The problem if found, None otherwise
         """
-        for problem in self.problems:
-            if problem.id == problem_id:
-                return problem
-        return None
+        return self._by_id.get(problem_id)
     
     def edit_problem(self, problem_id, **updates):
         """
         Edit an existing problem
         
+        With a status_file a new status is only the member's; a status-only
+        edit leaves the stored problem (and its date_modified) unchanged.
+        
         Args:
             problem_id (int): Problem ID to edit
             **updates: Keyword arguments of fields to update
@@ -147,21 +905,33 @@ class ProblemManager:
         Returns:
             bool: True if successful, False if problem not found
         """
-        problem = self.get_problem(problem_id)
-        
-        if not problem:
-            return False
-        
-        # Update fields
-        for key, value in updates.items():
-            if hasattr(problem, key):
-                setattr(problem, key, value)
-        
-        # Update modified timestamp
-        problem.date_modified = datetime.now().isoformat()
-        
-        # Save changes
-        self.save_problems()
+        with self._lock:
+            problem = self.get_problem(problem_id)
+            
+            if not problem:
+                return False
+            
+            status = updates.pop('status', None) if self.status_file else None
+            
+            # Update fields (ids are immutable, they key the indexes)
+            self._unindex_problem(problem)
+            if status is not None:
+                self._set_member_status(problem, status)
+            for key, value in updates.items():
+                if key != 'id' and hasattr(problem, key):
+                    setattr(problem, key, value)
+            self._index_problem(problem)
+            
+            if status is not None and not updates:
+                self._schedule_flush()
+                return True
+            
+            # Update modified timestamp
+            problem.date_modified = datetime.now().isoformat()
+            self.search_index.add(problem.id, self._search_fields(problem), problem.date_modified)
+            
+            # Save changes
+            self._mark_changed(problem_id)
         
         return True
     
@@ -175,13 +945,14 @@ class ProblemManager:
         Returns:
             bool: True if successful, False if problem not found
         """
-        problem = self.get_problem(problem_id)
-        
-        if not problem:
-            return False
-        
-        self.problems.remove(problem)
-        self.save_problems()
+        with self._lock:
+            problem = self.get_problem(problem_id)
+            
+            if not problem:
+                return False
+            
+            self._remove_problem(problem)
+            self._mark_changed(problem_id, deleted=True)
         
         return True
     
@@ -210,53 +981,100 @@ class ProblemManager:
         else:
             return self.problems
     
-    def search_problems(self, query):
+    def search_problems(self, query, limit=None):
         """
-        Search problems by title (case-insensitive)
+        Search problems by title, topics and platform (case-insensitive)
+        
+        Problems where every word of the query starts a word come first,
+        ranked with title matches first. They are followed by the problems
+        whose title merely contains the query ("sum" in "3Sum"), as the
+        plain title search before the index found them; those come from an
+        n-gram index of the titles, built on the first search.
         
         Args:
             query (str): Search query
+            limit (int, optional): Maximum number of results
         
         Returns:
-            list: List of matching Problem objects
+            list: List of matching Problem objects, best match first
         """
-        query = query.lower()
-        results = []
-        
-        for problem in self.problems:
-            if query in problem.title.lower():
-                results.append(problem)
+        results = [self._by_id[i] for i in self.search_index.search(query, limit)]
+        if limit and len(results) >= limit:
+            return results
         
-        return results
+        query = query.strip()
+        if query:
+            if self.title_index is None:
+                self.title_index = SubstringIndex()
+                for problem in self._by_id.values():
+                    self.title_index.add(problem.id, problem.title)
+            
+            found = {problem.id for problem in results}
+            results.extend(self._by_id[i] for i in sorted(self.title_index.search(query))
+                           if i not in found)
+        return results[:limit] if limit else results
     
-    def filter_problems(self, difficulty=None, status=None, topics=None):
+    def filter_problems(self, difficulty=None, status=None, topics=None, match='any'):
         """
         Filter problems by multiple criteria
         
+        With a queryable backend (SQLite) that nobody else has written
+        since the load, and no unwritten changes, the filter runs as one
+        SQL query. Otherwise each criterion is answered from an in-memory
+        index and combined by set intersection; either way the cost
+        follows the size of the matches rather than the size of the library.
+        
         Args:
             difficulty (str): Filter by difficulty (Easy, Medium, Hard)
             status (str): Filter by status
-            topics (list): Filter by topics (problem must have at least one)
+            topics (list): Filter by topics
+            match (str): 'any' - problem has at least one of the topics,
+                'all' - problem has every topic
         
         Returns:
             list: List of matching Problem objects
         """
-        results = self.problems
+        if not difficulty and not status and not topics:
+            return self.problems
+        
+        if (self.storage.supports_queries and not self.has_pending_changes()
+                and self.storage.is_current()):
+            ids = self.storage.db.problem_ids(difficulty, status, topics, match)
+            return [self._by_id[i] for i in ids]
+        
+        candidates = []
         
         # Filter by difficulty
         if difficulty:
-            results = [p for p in results if p.difficulty == difficulty]
+            candidates.append(self._by_difficulty.get(difficulty, set()))
         
         # Filter by status
         if status:
-            results = [p for p in results if p.status == status]
+            candidates.append(self._by_status.get(status, set()))
         
         # Filter by topics
         if topics:
-            results = [p for p in results 
-                      if any(topic in p.topics for topic in topics)]
+            topic_ids = [self._by_topic.get(topic, set()) for topic in topics]
+            if match == 'all':
+                candidates.extend(topic_ids)
+            else:
+                candidates.append(set().union(*topic_ids))
+        
+        # Intersect starting from the smallest set
+        candidates.sort(key=len)
+        ids = candidates[0].intersection(*candidates[1:])
         
-        return results
+        # Ids are handed out in insertion order, so this keeps list order
+        return [self._by_id[i] for i in sorted(ids)]
+    
+    def get_topics(self):
+        """
+        Get every topic in use
+        
+        Returns:
+            list: Topic names, in the order they were first seen
+        """
+        return list(self._by_topic)
     
     def get_statistics(self):
         """
@@ -266,10 +1084,10 @@ class ProblemManager:
             dict: Statistics dictionary
         """
         total = len(self.problems)
-        solved = len([p for p in self.problems if p.status == 'Solved'])
-        in_progress = len([p for p in self.problems if p.status == 'In Progress'])
-        not_started = len([p for p in self.problems if p.status == 'Not Started'])
-        reviewed = len([p for p in self.problems if p.status == 'Reviewed'])
+        solved = len(self._by_status.get('Solved', ()))
+        in_progress = len(self._by_status.get('In Progress', ()))
+        not_started = len(self._by_status.get('Not Started', ()))
+        reviewed = len(self._by_status.get('Reviewed', ()))
         
         return {
             'total': total,
@@ -3,29 +3,134 @@ Session Tracker Module
 Handles practice session tracking with timer, notes, and history
 """
 
+from contextlib import contextmanager
 from datetime import datetime
+from array import array
+import json
 import sys
 import os
 
 # Add parent directory to path to import utils
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_handler import read_json, write_json
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.storage import JSONStore, ID_BLOCK_SIZE
+from utils.search_index import SearchIndex
+from utils.helpers import iso_to_epoch, epoch_to_iso
+from utils.columns import column_sum, column_max
+
+# Large fields that lazy mode leaves on disk until first access
+HEAVY_FIELDS = ('notes', 'solution_code')
+
+PAUSE_KEYS = {'pause_time', 'resume_time'}
+
+# Placeholder in SessionTable time columns for None and non-epoch values
+MISSING_TIME = -2 ** 63
+
+
+def pack_pauses(pauses):
+    """Store pauses as a tuple of (pause, resume) epoch pairs"""
+    if not pauses:
+        return ()
+    if not all(isinstance(p, dict) and p.keys() == PAUSE_KEYS for p in pauses):
+        return pauses  # Unexpected layout, keep it as is
+    return tuple((iso_to_epoch(p['pause_time']), iso_to_epoch(p['resume_time'])) for p in pauses)
+
+
+def unpack_pauses(pauses):
+    """Expand packed pauses back into the JSON list of dicts"""
+    if not isinstance(pauses, tuple):
+        return pauses
+    return [{'pause_time': epoch_to_iso(pause), 'resume_time': epoch_to_iso(resume)}
+            for pause, resume in pauses]
 
 
 class Session:
-    """Represents a single practice session"""
+    """
+    Represents a single practice session
+    
+    Uses __slots__ and keeps timestamps as integer epoch microseconds and
+    pauses as a tuple of epoch pairs; the public attributes still read and
+    write ISO strings and the list of pause dicts.
+    """
+    
+    __slots__ = ('id', 'problem_id', '_start_time', '_end_time', 'duration_seconds', '_pauses',
+                 'solved', 'hints_used', '_notes', '_solution_code', '_heavy')
     
     def __init__(self, session_id, problem_id):
         self.id = session_id
         self.problem_id = problem_id
-        self.start_time = None
-        self.end_time = None
+        self._start_time = None
+        self._end_time = None
         self.duration_seconds = 0
-        self.pauses = []  # List of {pause_time, resume_time}
+        self._pauses = ()  # Packed pauses, or a list of {pause_time, resume_time} once used
         self.solved = False
         self.hints_used = 0
-        self.notes = []  # List of {timestamp, text}
-        self.solution_code = ""
+        self._notes = []  # List of {timestamp, text}
+        self._solution_code = ""
+        self._heavy = None  # (reader, ref) while notes/solution_code are still on disk
+    
+    @property
+    def start_time(self):
+        return epoch_to_iso(self._start_time)
+    
+    @start_time.setter
+    def start_time(self, value):
+        self._start_time = iso_to_epoch(value)
+    
+    @property
+    def end_time(self):
+        return epoch_to_iso(self._end_time)
+    
+    @end_time.setter
+    def end_time(self, value):
+        self._end_time = iso_to_epoch(value)
+    
+    @property
+    def pauses(self):
+        # Expanded on first use so callers can append to and edit the list
+        if isinstance(self._pauses, tuple):
+            self._pauses = unpack_pauses(self._pauses)
+        return self._pauses
+    
+    @pauses.setter
+    def pauses(self, value):
+        self._pauses = pack_pauses(value)
+    
+    @property
+    def notes(self):
+        if self._heavy:
+            self._load_heavy()
+        return self._notes
+    
+    @notes.setter
+    def notes(self, value):
+        if self._heavy:
+            self._load_heavy()
+        self._notes = value
+    
+    @property
+    def solution_code(self):
+        if self._heavy:
+            self._load_heavy()
+        return self._solution_code
+    
+    @solution_code.setter
+    def solution_code(self, value):
+        if self._heavy:
+            self._load_heavy()
+        self._solution_code = value
+    
+    def defer_heavy_fields(self, reader, ref):
+        """Leave notes and solution_code on disk until they are first used"""
+        self._heavy = (reader, ref)
+    
+    def _load_heavy(self):
+        reader, ref = self._heavy
+        self._heavy = None
+        fields = reader(ref)
+        self._notes = fields.get('notes', [])
+        self._solution_code = fields.get('solution_code', '')
     
     def to_dict(self):
         """Convert Session object to dictionary for JSON serialization"""
@@ -35,7 +140,7 @@ class Session:
             'start_time': self.start_time,
             'end_time': self.end_time,
             'duration_seconds': self.duration_seconds,
-            'pauses': self.pauses,
+            'pauses': unpack_pauses(self._pauses),
             'solved': self.solved,
             'hints_used': self.hints_used,
             'notes': self.notes,
@@ -70,24 +175,560 @@ class Session:
         return f"Session(id={self.id}, problem_id={self.problem_id}, solved={self.solved})"
 
 
+class SessionTable:
+    """
+    Completed sessions stored column by column
+    
+    Numeric fields live in typed arrays, so a million sessions cost a few
+    dozen bytes each instead of a Session object apiece. Session objects
+    are built on demand by indexing or iterating; they are snapshots, so
+    edits to them are not written back to the table. Aggregations such as
+    StatsStore read the columns directly.
+    
+    A table opened with from_snapshot() reads its columns straight out of
+    a memory-mapped binary snapshot and decodes pauses, notes and code
+    from its heap on demand. The columns are copied into arrays on the
+    first append.
+    """
+    
+    COLUMNS = ('ids', 'problem_ids', 'start_times', 'end_times', 'durations', 'solved', 'hints')
+    
+    def __init__(self):
+        self.ids = array('q')
+        self.problem_ids = array('q')
+        self.start_times = array('q')  # Epoch microseconds, MISSING_TIME if absent
+        self.end_times = array('q')
+        self.durations = array('q')
+        self.solved = array('b')
+        self.hints = array('q')
+        self.pauses = []  # Packed pauses (shared () when there are none)
+        self.heavy = []  # (notes, solution_code), or (reader, ref) for deferred rows
+        self.deferred = array('b')  # 1 where heavy holds a (reader, ref) pair
+        self.odd_times = {}  # (row, field) -> timestamp that is not an epoch value
+        self.snapshot = None  # Snapshot holding the first snapshot_rows rows
+        self.snapshot_rows = 0
+        self.pause_refs = None  # Heap offsets of snapshot rows' pauses, -1 if none
+        self.heavy_refs = None  # Heap offsets of snapshot rows' notes/solution_code
+        self._rows = {}  # session id -> row, built on first get() for snapshot tables
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self._session(row)
+    
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self.ids)
+        if not 0 <= row < len(self.ids):
+            raise IndexError('session table index out of range')
+        return self._session(row)
+    
+    def get(self, session_id):
+        """Session with the given id, or None"""
+        if self._rows is None:
+            self._rows = {session_id: row for row, session_id in enumerate(self.ids)}
+        row = self._rows.get(session_id)
+        return None if row is None else self._session(row)
+    
+    def rows_for_problem(self, problem_id):
+        """Rows of the sessions for a problem, in table order"""
+        return [row for row, pid in enumerate(self.problem_ids) if pid == problem_id]
+    
+    def _put_time(self, column, field, value):
+        if isinstance(value, int):
+            column.append(value)
+        else:
+            self.odd_times[(len(column), field)] = value
+            column.append(MISSING_TIME)
+    
+    def _get_time(self, column, field, row):
+        value = column[row]
+        return self.odd_times.get((row, field)) if value == MISSING_TIME else value
+    
+    def _add_row(self, session_id, problem_id, start, end, duration, solved, hints,
+                 pauses, heavy, deferred):
+        if self.snapshot is not None and not isinstance(self.ids, array):
+            self._thaw()
+        if self._rows is not None:
+            self._rows[session_id] = len(self.ids)
+        self._put_time(self.start_times, 'start_time', start)
+        self._put_time(self.end_times, 'end_time', end)
+        self.ids.append(session_id)
+        self.problem_ids.append(problem_id)
+        self.durations.append(duration)
+        self.solved.append(1 if solved else 0)
+        self.hints.append(hints)
+        self.pauses.append(pauses)
+        self.heavy.append(heavy)
+        self.deferred.append(1 if deferred else 0)
+    
+    def append(self, session):
+        """Add a completed session"""
+        deferred = session._heavy is not None
+        heavy = session._heavy if deferred else (session._notes, session._solution_code)
+        self._add_row(session.id, session.problem_id, session._start_time, session._end_time,
+                      session.duration_seconds, session.solved, session.hints_used,
+                      pack_pauses(unpack_pauses(session._pauses)), heavy, deferred)
+    
+    @classmethod
+    def from_records(cls, records, reader=None):
+        """
+        Build a table straight from stored session dicts
+        
+        Args:
+            records (list): Session dicts; with reader, lazy records carry heavy_ref
+            reader (callable, optional): Loads deferred notes/solution_code
+        
+        Returns:
+            SessionTable: Table holding every record
+        """
+        table = cls()
+        for data in records:
+            if reader is not None and 'heavy_ref' in data:
+                heavy, deferred = (reader, data['heavy_ref']), True
+            else:
+                heavy, deferred = (data.get('notes', []), data.get('solution_code', '')), False
+            
+            table._add_row(data['id'], data['problem_id'],
+                           iso_to_epoch(data.get('start_time')), iso_to_epoch(data.get('end_time')),
+                           data.get('duration_seconds', 0), data.get('solved', False),
+                           data.get('hints_used', 0), pack_pauses(data.get('pauses', [])),
+                           heavy, deferred)
+        return table
+    
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Table backed by a binary snapshot written by write_snapshot()"""
+        table = cls()
+        for name in cls.COLUMNS:
+            setattr(table, name, snapshot.column(name))
+        table.pause_refs = snapshot.column('pause_refs')
+        table.heavy_refs = snapshot.column('heavy_refs')
+        table.odd_times = {(row, field): value for row, field, value in snapshot.meta['odd_times']}
+        table.snapshot = snapshot
+        table.snapshot_rows = len(table.ids)
+        table._rows = None
+        return table
+    
+    def write_snapshot(self, writer):
+        """Write every row to a SnapshotWriter (see utils/snapshot.py)"""
+        pause_refs = array('q')
+        heavy_refs = array('q')
+        
+        for session in self:
+            pauses = unpack_pauses(session._pauses)
+            pause_refs.append(writer.add(pauses) if pauses else -1)
+            heavy_refs.append(writer.add({'notes': session.notes,
+                                          'solution_code': session.solution_code}))
+        
+        columns = {name: getattr(self, name) for name in self.COLUMNS}
+        columns['pause_refs'] = pause_refs
+        columns['heavy_refs'] = heavy_refs
+        odd_times = [[row, field, value] for (row, field), value in self.odd_times.items()]
+        writer.finish(columns, {'max_id': max(self.ids, default=0), 'odd_times': odd_times})
+    
+    def close(self):
+        """Unmap the snapshot behind the table; it cannot be read afterwards"""
+        if self.snapshot is not None:
+            self.snapshot.close()
+    
+    def _thaw(self):
+        """Copy snapshot-backed columns into arrays so rows can be appended"""
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            copy = array(column.format)
+            copy.frombytes(column.cast('B'))
+            setattr(self, name, copy)
+    
+    def _session(self, row):
+        session = Session(self.ids[row], self.problem_ids[row])
+        session._start_time = self._get_time(self.start_times, 'start_time', row)
+        session._end_time = self._get_time(self.end_times, 'end_time', row)
+        session.duration_seconds = self.durations[row]
+        session.solved = bool(self.solved[row])
+        session.hints_used = self.hints[row]
+        
+        if row < self.snapshot_rows:
+            ref = self.pause_refs[row]
+            session._pauses = pack_pauses(self.snapshot(ref)) if ref >= 0 else ()
+            session.defer_heavy_fields(self.snapshot, self.heavy_refs[row])
+            return session
+        
+        row -= self.snapshot_rows
+        session._pauses = self.pauses[row]
+        if self.deferred[row]:
+            session.defer_heavy_fields(*self.heavy[row])
+        else:
+            session._notes, session._solution_code = self.heavy[row]
+        return session
+
+
 class SessionTracker:
     """Manages all practice sessions"""
     
-    def __init__(self, data_file='data/sessions.json'):
+    def __init__(self, data_file='data/sessions.json', compact_threshold=1000, storage=None,
+                 index_notes=False, lazy=False, columnar=False, snapshot=False):
         self.data_file = data_file
-        self.sessions = []  # All completed sessions
+        self.lazy = lazy  # Keep notes/solution_code on disk until first access
+        self.columnar = columnar or snapshot  # Hold completed sessions in a SessionTable
+        self.storage = storage if storage is not None else JSONStore(data_file, compact_threshold)
+        # Open the table from a memory-mapped binary snapshot when the store keeps one
+        self.snapshot = snapshot and self.storage.supports_snapshots
+        self.sessions = []  # All completed sessions (a SessionTable in columnar mode)
+        self._by_id = {}  # id -> Session for completed sessions (unused in columnar mode)
+        self._next_id = 1  # Id sequence high-water mark, never decreases
+        self._saved_next_id = 0  # Value of the sequence last written to storage
+        self._reserved_until = 0  # End of the ids reserved in storage by this tracker
         self.active_session = None  # Currently running session
+        # Notes/code index, loaded (or built in memory if not persisted) on first search
+        self.index_file = data_file + '.search' if index_notes else None
+        self.search_index = None
+        self._listeners = []  # Notified of every completed session, see subscribe()
+        self._pending = []  # Completed sessions not written yet (inside batch())
+        self._batch_depth = 0
         self.load_sessions()
     
     def load_sessions(self):
-        """Load sessions from JSON file into memory"""
-        data = read_json(self.data_file)
-        self.sessions = [Session.from_dict(s) for s in data]
+        """Load sessions from the storage backend into memory"""
+        with self.storage.locked():
+            if isinstance(self.sessions, SessionTable):
+                # Release the old mapping before a new snapshot replaces the file
+                self.sessions.close()
+            table = self._load_snapshot() if self.snapshot else None
+            
+            if table is not None:
+                data = None
+            elif self.lazy:
+                data, reader = self.storage.load_lazy(HEAVY_FIELDS)
+            else:
+                data, reader = self.storage.load_stream(), None
+            
+            if self.columnar:
+                if table is None:
+                    try:
+                        table = SessionTable.from_records(data, reader)
+                    except json.JSONDecodeError:
+                        # Corrupted snapshot; load() restores it from the backup
+                        table = SessionTable.from_records(self.storage.load())
+                self.sessions = table
+                self._by_id = {}
+                highest_id = column_max(table.ids, MISSING_TIME) or 0
+            else:
+                try:
+                    self.sessions = [Session.from_dict(s) for s in data]
+                except json.JSONDecodeError:
+                    self.sessions = [Session.from_dict(s) for s in self.storage.load()]
+                
+                if self.lazy:
+                    for session, record in zip(self.sessions, data):
+                        if 'heavy_ref' in record:
+                            session.defer_heavy_fields(reader, record['heavy_ref'])
+                
+                self._by_id = {s.id: s for s in self.sessions}
+                highest_id = max(self._by_id, default=0)
+            
+            for listener in self._listeners:
+                listener.sessions_loaded(self.sessions)
+            self._saved_next_id = self.storage.read_sequence()
+            if self._saved_next_id != self._reserved_until:
+                self._next_id = max(self._next_id, self._saved_next_id)
+            self._next_id = max(self._next_id, highest_id + 1)
+            
+            if self.search_index is not None:
+                self.search_index.load()
+                self._sync_search_index()
     
     def save_sessions(self):
-        """Save sessions from memory to JSON file"""
-        data = [session.to_dict() for session in self.sessions]
-        write_json(self.data_file, data)
+        """Rewrite the full collection in storage (compacts the JSON journal)"""
+        with self.storage.locked():
+            self._merge_external_changes()
+            self._persist_sequence()
+            data = [session.to_dict() for session in self.sessions]
+            if self.storage.write_all(data):
+                self._pending = []
+            
+            if self.search_index is not None:
+                self.search_index.save()
+            
+            if self.lazy or self.snapshot:
+                # Compaction read every heavy field; drop them again (and
+                # rebuild the binary snapshot of the new JSON snapshot)
+                del data
+                self._reload()
+    
+    def _load_snapshot(self):
+        """
+        Table from the binary snapshot plus the journal
+        
+        The snapshot is (re)built from the JSON snapshot when it is missing
+        or stale. Returns None when the journal rewrites sessions that are
+        already in the snapshot, or the snapshot cannot be used, so the
+        caller loads the usual way.
+        """
+        ops = self.storage.read_journal()
+        snapshot = self.storage.open_snapshot()
+        
+        if snapshot is None:
+            writer = self.storage.snapshot_writer()
+            if writer is None:
+                return None
+            try:
+                SessionTable.from_records(self.storage.iter_snapshot_records()).write_snapshot(writer)
+            except (OSError, json.JSONDecodeError) as e:
+                writer.abort()
+                print(f"Warning: could not build a binary snapshot of {self.data_file}: {e}")
+                return None
+            snapshot = self.storage.open_snapshot()
+            if snapshot is None:
+                return None
+        
+        table = SessionTable.from_snapshot(snapshot)
+        highest_id = snapshot.meta['max_id']
+        appended = set()
+        
+        # Sessions are only ever appended, so the journal normally holds new
+        # ids (not necessarily ascending when several processes append)
+        for op in ops:
+            record = op['data'] if op.get('op') == 'put' else None
+            if record is None or record['id'] <= highest_id or record['id'] in appended:
+                table.close()
+                return None
+            table.append(Session.from_dict(record))
+            appended.add(record['id'])
+        
+        return table
+    
+    def subscribe(self, listener):
+        """
+        Register an object to be told about completed sessions
+        
+        The listener needs session_added(session) and sessions_loaded(sessions)
+        methods; sessions_loaded receives the whole collection after a reload,
+        which is a SessionTable in columnar mode.
+        """
+        self._listeners.append(listener)
+    
+    def unsubscribe(self, listener):
+        """Stop notifying a listener registered with subscribe()"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def close(self):
+        """
+        Write pending sessions, save the notes search index if it is
+        persisted and unmap the binary snapshot (the completed sessions
+        cannot be read afterwards)
+        """
+        self.flush()
+        if self.search_index is not None:
+            self.search_index.save()
+        if isinstance(self.sessions, SessionTable):
+            self.sessions.close()
+    
+    def _sync_search_index(self):
+        """Index sessions completed since the search index was saved"""
+        if self.columnar:
+            # Completed sessions never change, so only unseen ids need indexing
+            docs = self.search_index.docs
+            for row, session_id in enumerate(self.sessions.ids):
+                if session_id not in docs:
+                    session = self.sessions[row]
+                    self.search_index.add(session.id, self._search_fields(session), session.end_time)
+            if len(docs) == len(self.sessions):
+                return
+        
+        self.search_index.sync({s.id: (s.end_time, s) for s in self.sessions},
+                               self._search_fields)
+    
+    @staticmethod
+    def _search_fields(session):
+        """Text fields of a session and their search weights"""
+        notes = ' '.join(note['text'] for note in session.notes)
+        return [(notes, 2), (session.solution_code, 1)]
+    
+    def search_sessions(self, query, limit=None):
+        """
+        Search completed sessions by note text and solution code
+        
+        Args:
+            query (str): Search query; every word must start a word in the session
+            limit (int, optional): Maximum number of results
+        
+        Returns:
+            list: List of matching Session objects, best match first
+        """
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.index_file)
+            self.search_index.load()
+            self._sync_search_index()
+        
+        return [self.get_session_by_id(i) for i in self.search_index.search(query, limit)]
+    
+    def iter_sessions(self, filter=None):
+        """
+        Stream completed sessions straight from storage
+        
+        Sessions are read one at a time and not kept, so aggregations can run
+        over histories larger than memory (e.g. StatsStore.sessions_loaded).
+        
+        Args:
+            filter (callable, optional): Only yield sessions it returns True for
+        
+        Yields:
+            Session: Each stored session, in storage order
+        """
+        for record in self.storage.iter_records():
+            session = Session.from_dict(record)
+            if filter is None or filter(session):
+                yield session
+    
+    def _persist_sequence(self):
+        """
+        Store the id high-water mark before the sessions that use it
+        
+        Call with the storage lock held. Ids reserved by _allocate_id() but
+        not handed out are given back, unless another process has reserved
+        ids after them in the meantime.
+        """
+        if self._reserved_until:
+            if self._next_id < self._reserved_until == self.storage.read_sequence():
+                self.storage.write_sequence(self._next_id)
+                self._saved_next_id = self._next_id
+            self._reserved_until = 0
+        
+        if self._next_id > self._saved_next_id:
+            self.storage.write_sequence(self._next_id)
+            self._saved_next_id = self._next_id
+    
+    def _allocate_id(self):
+        """
+        Take the next session id from the stored sequence, shared with other processes
+        
+        Inside batch() ID_BLOCK_SIZE more ids are reserved with it, and the
+        following sessions take theirs without touching storage.
+        """
+        if self._next_id < self._reserved_until:
+            session_id = self._next_id
+            self._next_id += 1
+            return session_id
+        
+        with self.storage.locked():
+            stored = self.storage.read_sequence()
+            if stored != self._reserved_until:
+                # Others reserved ids since; ours continue after theirs
+                self._next_id = max(self._next_id, stored)
+            session_id = self._next_id
+            self._next_id += 1
+            self._reserved_until = self._next_id + (ID_BLOCK_SIZE if self._batch_depth else 0)
+            self.storage.write_sequence(self._reserved_until)
+            self._saved_next_id = self._reserved_until
+        return session_id
+    
+    def _merge_external_changes(self):
+        """
+        Add the sessions other processes completed since our last read or write
+        
+        Call with the storage lock held. Anything but new sessions (e.g. a
+        compaction by another process) reloads the whole collection.
+        """
+        ops = self.storage.external_changes()
+        if ops is None:
+            self._reload()
+            return
+        
+        for op in ops:
+            record = op['data'] if op.get('op') == 'put' else None
+            if record is None or self.get_session_by_id(record['id']) is not None:
+                self._reload()
+                return
+            self._add_completed(Session.from_dict(record))
+    
+    def _reload(self):
+        """Reload the collection from storage, keeping sessions not written yet"""
+        self.load_sessions()
+        for session in self._pending:
+            self._add_completed(session)
+    
+    def refresh(self):
+        """Pick up the sessions other processes saved since our last read or write"""
+        with self.storage.locked():
+            self._merge_external_changes()
+    
+    def append_session(self, session):
+        """
+        Persist a single session without rewriting the others
+        
+        With the JSON backend the snapshot is only rewritten once the journal
+        grows past both compact_threshold and the number of sessions, so the
+        cost of compaction stays amortized O(1) per session.
+        
+        Inside batch() the session is only queued, and flush() writes the
+        queue in one append when the block exits.
+        
+        Args:
+            session (Session): Session to persist
+        """
+        self._pending.append(session)
+        if self._batch_depth == 0:
+            self.flush()
+    
+    def flush(self):
+        """
+        Write the pending sessions to storage in a single append/transaction
+        
+        Returns:
+            int: Number of sessions written
+        """
+        if not self._pending:
+            return 0
+        
+        with self.storage.locked():
+            self._merge_external_changes()
+            sessions, self._pending = self._pending, []
+            self._persist_sequence()
+            self.storage.write_changes(puts=[session.to_dict() for session in sessions])
+            
+            if self.storage.needs_compaction(len(self.sessions)):
+                self.save_sessions()
+        
+        return len(sessions)
+    
+    def has_pending_changes(self):
+        """Whether some completed sessions have not reached storage yet"""
+        return bool(self._pending)
+    
+    def data_stamp(self):
+        """
+        Identifies the stored state the in-memory sessions reflect
+        
+        Returns:
+            list or None: Equal stamps mean equal data; None when there are
+                unwritten changes or the backend cannot tell
+        """
+        if self.has_pending_changes():
+            return None
+        return self.storage.data_stamp()
+    
+    @contextmanager
+    def batch(self):
+        """
+        Queue completed sessions and write them in one append when the block exits
+        
+        Example:
+            with st.batch():
+                for problem_id in ids:
+                    st.start_session(problem_id)
+                    st.complete_session(solved=True)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
     
     def start_session(self, problem_id):
         """
@@ -103,14 +744,8 @@ class SessionTracker:
         if self.active_session:
             return None  # Can't start new session while one is active
         
-        # Generate new session ID
-        if not self.sessions:
-            new_id = 1
-        else:
-            new_id = max(s.id for s in self.sessions) + 1
-        
         # Create new session
-        session = Session(new_id, problem_id)
+        session = Session(self._allocate_id(), problem_id)
         session.start_time = datetime.now().isoformat()
         
         # Set as active session
@@ -303,17 +938,29 @@ class SessionTracker:
         duration = self.calculate_duration(self.active_session)
         self.active_session.duration_seconds = duration
         
-        # Add to sessions list
-        self.sessions.append(self.active_session)
+        with self.storage.locked():
+            # Sessions other processes completed in the meantime go first
+            self._merge_external_changes()
+            self._add_completed(self.active_session)
+            
+            # Append to the journal instead of rewriting the whole file
+            self.append_session(self.active_session)
         
         # Clear active session
         self.active_session = None
         
-        # Save to file
-        self.save_sessions()
-        
         return True
     
+    def _add_completed(self, session):
+        """Add a completed session to the collection, its indexes and listeners"""
+        self.sessions.append(session)
+        if not self.columnar:
+            self._by_id[session.id] = session
+        if self.search_index is not None:
+            self.search_index.add(session.id, self._search_fields(session), session.end_time)
+        for listener in self._listeners:
+            listener.session_added(session)
+    
     def cancel_session(self):
         """
         Cancel the active session without saving
@@ -339,6 +986,12 @@ class SessionTracker:
         """
         if problem_id is None:
             return self.sessions
+        elif self.storage.supports_queries:
+            ids = self.storage.db.session_ids_for_problem(problem_id)
+            sessions = [self.get_session_by_id(i) for i in ids]
+            return [s for s in sessions if s is not None]
+        elif self.columnar:
+            return [self.sessions[row] for row in self.sessions.rows_for_problem(problem_id)]
         else:
             return [s for s in self.sessions if s.problem_id == problem_id]
     
@@ -352,10 +1005,9 @@ class SessionTracker:
         Returns:
             Session or None: The session if found
         """
-        for session in self.sessions:
-            if session.id == session_id:
-                return session
-        return None
+        if self.columnar:
+            return self.sessions.get(session_id)
+        return self._by_id.get(session_id)
     
     def get_statistics(self):
         """
@@ -364,14 +1016,21 @@ class SessionTracker:
         Returns:
             dict: Statistics dictionary
         """
-        total_sessions = len(self.sessions)
-        solved_sessions = len([s for s in self.sessions if s.solved])
+        if self.storage.supports_queries:
+            total_sessions, solved_sessions, total_time, total_hints = self.storage.db.session_totals()
+        elif self.columnar:
+            total_sessions = len(self.sessions)
+            solved_sessions = column_sum(self.sessions.solved)
+            total_time = column_sum(self.sessions.durations)
+            total_hints = column_sum(self.sessions.hints)
+        else:
+            total_sessions = len(self.sessions)
+            solved_sessions = len([s for s in self.sessions if s.solved])
+            total_time = sum(s.duration_seconds for s in self.sessions)
+            total_hints = sum(s.hints_used for s in self.sessions)
         
-        total_time = sum(s.duration_seconds for s in self.sessions)
         avg_time = (total_time / total_sessions) if total_sessions > 0 else 0
         
-        total_hints = sum(s.hints_used for s in self.sessions)
-        
         return {
             'total_sessions': total_sessions,
             'solved_sessions': solved_sessions,
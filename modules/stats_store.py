@@ -0,0 +1,473 @@
+"""
+Stats Store Module
+Aggregate counters behind the analytics report, kept up to date
+incrementally as problems and sessions change
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from collections import Counter
+from array import array
+import sys
+import os
+
+# Add parent directory to path to import utils
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.data_handler import read_json, write_json
+from utils.helpers import EPOCH, epoch_to_iso
+from utils.columns import column_sum, column_max, day_histogram, longest_run, grouped_totals
+from modules.session_tracker import SessionTable, MISSING_TIME
+
+DAY_MICROSECONDS = 86400 * 1000000
+
+SOLVED_STATUSES = ('Solved', 'Reviewed')
+DIFFICULTIES = ('Easy', 'Medium', 'Hard')
+
+# SessionTable columns the session aggregates are computed from
+SUMMARY_COLUMNS = ('durations', 'hints', 'solved', 'start_times', 'problem_ids')
+
+# Smallest table worth splitting across worker processes; below this the
+# pool start-up costs more than the scan
+PARALLEL_MIN_ROWS = 100000
+
+
+def summarize_sessions(durations, hints, solved, start_times, problem_ids):
+    """
+    Session aggregates of a run of SessionTable rows
+    
+    Module-level so that worker processes can run it on shards of the
+    columns; merge_summaries() combines the shards.
+    
+    Returns:
+        dict: Counts and totals, 'days' (day number -> sessions, ascending),
+            'latest' start time and 'solved_by_problem'
+    """
+    return {
+        'sessions': len(durations),
+        'time': column_sum(durations),
+        'hints': column_sum(hints),
+        'solved': column_sum(solved),
+        'days': day_histogram(start_times, MISSING_TIME, DAY_MICROSECONDS),
+        'latest': column_max(start_times, MISSING_TIME),
+        'solved_by_problem': grouped_totals(problem_ids, durations, solved)
+    }
+
+
+def merge_summaries(summaries):
+    """
+    Combine summarize_sessions() results of consecutive shards
+    
+    The result is the summary of the shards' rows taken together, with
+    solved_by_problem in order of first appearance across the shards.
+    """
+    merged = {'sessions': 0, 'time': 0, 'hints': 0, 'solved': 0, 'days': {},
+              'latest': None, 'solved_by_problem': {}}
+    
+    for summary in summaries:
+        for key in ('sessions', 'time', 'hints', 'solved'):
+            merged[key] += summary[key]
+        
+        days = merged['days']
+        for day, count in summary['days'].items():
+            days[day] = days.get(day, 0) + count
+        
+        if summary['latest'] is not None and (merged['latest'] is None
+                                              or summary['latest'] > merged['latest']):
+            merged['latest'] = summary['latest']
+        
+        for problem_id, (solved_time, solved_count) in summary['solved_by_problem'].items():
+            total = merged['solved_by_problem'].setdefault(problem_id, [0, 0])
+            total[0] += solved_time
+            total[1] += solved_count
+    
+    merged['days'] = dict(sorted(merged['days'].items()))
+    return merged
+
+
+def _shard(column, start, stop):
+    """Rows start:stop of a column as an array, which pickles as raw bytes"""
+    view = memoryview(column)[start:stop]
+    return array(view.format, view.tobytes())
+
+
+def summarize_table(table, workers=None):
+    """
+    summarize_sessions() over a whole SessionTable
+    
+    With workers > 1 and a large table, the rows are split into one shard
+    per worker and summarized in a process pool; the merged result is the
+    same as the serial one.
+    """
+    columns = [getattr(table, name) for name in SUMMARY_COLUMNS]
+    rows = len(table)
+    if not workers or workers < 2 or rows < PARALLEL_MIN_ROWS:
+        return summarize_sessions(*columns)
+    
+    size = -(-rows // workers)
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(summarize_sessions,
+                               *(_shard(column, start, start + size) for column in columns))
+                   for start in range(0, rows, size)]
+        return merge_summaries(future.result() for future in futures)
+
+
+def _queryable(manager):
+    """Whether SQL over the manager's storage gives the same answers as its memory"""
+    storage = manager.storage
+    return (storage.supports_queries and not manager.has_pending_changes()
+            and storage.is_current())
+
+
+class StatsStore:
+    """
+    Materialized view of the analytics aggregates
+    
+    The store subscribes to a ProblemManager and a SessionTracker and
+    applies each change as a delta, so report sections are served without
+    rescanning problems or sessions. save() writes the view to
+    data/user_stats.json, stamped with the stored state of both managers;
+    the next StatsStore starts from that file instead of a scan when the
+    stamps still match (see ProblemManager.data_stamp()).
+    
+    With workers > 1, full scans of a large SessionTable (on load and
+    reload) are split across that many processes; see summarize_table().
+    
+    With a queryable backend (SQLite) the initial counters, and the
+    session counters after a reload, come from SQL aggregates instead of
+    a scan, as long as the database still matches what the managers hold.
+    """
+    
+    def __init__(self, problem_manager, session_tracker, stats_file='data/user_stats.json',
+                 workers=None):
+        self.stats_file = stats_file
+        self.workers = workers
+        self.problem_manager = problem_manager
+        self.session_tracker = session_tracker
+        self.problems_reset()
+        self.sessions_reset()
+        
+        state = self._saved_state()
+        if state is not None:
+            try:
+                self._restore(state)
+            except (KeyError, TypeError, ValueError):
+                print(f"Warning: recomputing unreadable stats view {self.stats_file}")
+                self.problems_reset()
+                self.sessions_reset()
+                state = None
+        
+        if state is None:
+            if _queryable(problem_manager):
+                self._load_problem_aggregates(problem_manager.storage.db)
+            else:
+                for problem in problem_manager.problems:
+                    self.problem_indexed(problem)
+            self.sessions_loaded(session_tracker.sessions)
+        
+        problem_manager.subscribe(self)
+        session_tracker.subscribe(self)
+    
+    def problems_reset(self):
+        """Forget every problem (called before the manager reloads)"""
+        self.problem_count = 0
+        self.status_counts = Counter()
+        self.topic_stats = {}  # topic -> {'total', 'solved'}, in first-seen order
+        self.difficulty_stats = {d: self._empty_difficulty() for d in DIFFICULTIES}
+        self.problem_difficulty = {}  # problem id -> difficulty, for session deltas
+    
+    def sessions_reset(self):
+        """Forget every session (called before the tracker reloads)"""
+        self.total_sessions = 0
+        self.solved_sessions = 0
+        self.total_time = 0
+        self.total_hints = 0
+        self.day_counts = {}  # YYYY-MM-DD -> sessions started that day
+        self.longest_streak = 0
+        self.last_practice = None
+        self.solved_by_problem = {}  # problem id -> [solved seconds, solved sessions]
+        
+        for stats in self.difficulty_stats.values():
+            stats['total_time'] = 0
+            stats['count'] = 0
+    
+    def sessions_loaded(self, sessions):
+        """Rebuild the session counters from a freshly loaded collection"""
+        self.sessions_reset()
+        if _queryable(self.session_tracker):
+            self._load_session_aggregates(self.session_tracker.storage.db)
+        elif isinstance(sessions, SessionTable):
+            self._scan_table(sessions)
+        else:
+            for session in sessions:
+                self.session_added(session)
+    
+    def _scan_table(self, table):
+        """Same as session_added for every row, aggregating the table's columns directly"""
+        summary = summarize_table(table, self.workers)
+        self.total_sessions = summary['sessions']
+        self.total_time = summary['time']
+        self.total_hints = summary['hints']
+        self.solved_sessions = summary['solved']
+        
+        days = summary['days']
+        for day, count in days.items():
+            self.day_counts[(EPOCH + timedelta(days=day)).date().isoformat()] = count
+        self.longest_streak = longest_run(days)
+        
+        # Start times kept as strings (not plain isoformat()) go through the slow path
+        odd_starts = [value for (row, field), value in table.odd_times.items()
+                      if field == 'start_time' and value]
+        for start in odd_starts:
+            self._count_day(start.split('T')[0], 1)
+        
+        latest = summary['latest']
+        if latest is not None:
+            odd_starts.append(epoch_to_iso(latest))
+        self.last_practice = max(odd_starts, default=None)
+        
+        self.solved_by_problem = summary['solved_by_problem']
+        for problem_id, (solved_time, solved_count) in self.solved_by_problem.items():
+            difficulty = self.problem_difficulty.get(problem_id)
+            if difficulty is not None:
+                self.difficulty_stats[difficulty]['total_time'] += solved_time
+                self.difficulty_stats[difficulty]['count'] += solved_count
+    
+    def _load_problem_aggregates(self, db):
+        """Same as problem_indexed for every problem, from SQL aggregates"""
+        aggregates = db.problem_aggregates(SOLVED_STATUSES)
+        for status, count in aggregates['statuses']:
+            self.problem_count += count
+            self.status_counts[status] = count
+        for difficulty, total, solved in aggregates['difficulties']:
+            stats = self.difficulty_stats.setdefault(difficulty, self._empty_difficulty())
+            stats['total'] = total
+            stats['solved'] = solved
+        for topic, total, solved in aggregates['topics']:
+            self.topic_stats[topic] = {'total': total, 'solved': solved}
+        self.problem_difficulty = aggregates['difficulty_of']
+    
+    def _load_session_aggregates(self, db):
+        """Same as session_added for every session, from SQL aggregates"""
+        aggregates = db.session_aggregates()
+        (self.total_sessions, self.solved_sessions,
+         self.total_time, self.total_hints) = aggregates['totals']
+        
+        self.day_counts = dict(aggregates['days'])
+        self.longest_streak = longest_run(date.fromisoformat(day).toordinal()
+                                          for day in self.day_counts)
+        self.last_practice = aggregates['latest']
+        
+        for problem_id, solved_time, solved_count in aggregates['solved_by_problem']:
+            self.solved_by_problem[problem_id] = [solved_time, solved_count]
+            difficulty = self.problem_difficulty.get(problem_id)
+            if difficulty is not None:
+                self.difficulty_stats[difficulty]['total_time'] += solved_time
+                self.difficulty_stats[difficulty]['count'] += solved_count
+    
+    def _count_day(self, day, count):
+        if day not in self.day_counts:
+            self.day_counts[day] = 0
+            self._extend_streak(day)
+        self.day_counts[day] += count
+    
+    @staticmethod
+    def _empty_difficulty():
+        return {'total': 0, 'solved': 0, 'total_time': 0, 'count': 0}
+    
+    def _apply_problem(self, problem, sign):
+        """Add (sign=1) or remove (sign=-1) a problem's contribution"""
+        self.problem_count += sign
+        self.status_counts[problem.status] += sign
+        if not self.status_counts[problem.status]:
+            del self.status_counts[problem.status]
+        
+        solved = sign if problem.status in SOLVED_STATUSES else 0
+        
+        for topic in problem.topics:
+            stats = self.topic_stats.setdefault(topic, {'total': 0, 'solved': 0})
+            stats['total'] += sign
+            stats['solved'] += solved
+            if stats['total'] == 0:
+                del self.topic_stats[topic]
+        
+        stats = self.difficulty_stats.setdefault(problem.difficulty, self._empty_difficulty())
+        stats['total'] += sign
+        stats['solved'] += solved
+        
+        solved_time, solved_count = self.solved_by_problem.get(problem.id, (0, 0))
+        stats['total_time'] += sign * solved_time
+        stats['count'] += sign * solved_count
+    
+    def problem_indexed(self, problem):
+        """A problem was added, or re-added after an edit"""
+        self._apply_problem(problem, 1)
+        self.problem_difficulty[problem.id] = problem.difficulty
+    
+    def problem_unindexed(self, problem):
+        """A problem was deleted, or is about to be edited"""
+        self._apply_problem(problem, -1)
+        self.problem_difficulty.pop(problem.id, None)
+    
+    def session_added(self, session):
+        """A session was completed"""
+        self.total_sessions += 1
+        self.total_time += session.duration_seconds
+        self.total_hints += session.hints_used
+        
+        if session.start_time:
+            if self.last_practice is None or session.start_time > self.last_practice:
+                self.last_practice = session.start_time
+            
+            self._count_day(session.start_time.split('T')[0], 1)
+        
+        if session.solved:
+            self.solved_sessions += 1
+            
+            solved = self.solved_by_problem.setdefault(session.problem_id, [0, 0])
+            solved[0] += session.duration_seconds
+            solved[1] += 1
+            
+            difficulty = self.problem_difficulty.get(session.problem_id)
+            if difficulty is not None:
+                self.difficulty_stats[difficulty]['total_time'] += session.duration_seconds
+                self.difficulty_stats[difficulty]['count'] += 1
+    
+    def _extend_streak(self, day):
+        """Update the longest streak with the run a newly practiced day belongs to"""
+        current = date.fromisoformat(day)
+        run = 1
+        
+        for step in (-1, 1):
+            other = current + timedelta(days=step)
+            while other.isoformat() in self.day_counts:
+                run += 1
+                other += timedelta(days=step)
+        
+        self.longest_streak = max(self.longest_streak, run)
+    
+    def current_streak(self, today):
+        """Consecutive practiced days ending today"""
+        streak = 0
+        while (today - timedelta(days=streak)).isoformat() in self.day_counts:
+            streak += 1
+        return streak
+    
+    def topic_analysis(self):
+        return {topic: {'total': stats['total'],
+                        'solved': stats['solved'],
+                        'success_rate': stats['solved'] / stats['total']}
+                for topic, stats in self.topic_stats.items()}
+    
+    def difficulty_analysis(self):
+        result = {}
+        for difficulty, stats in self.difficulty_stats.items():
+            result[difficulty] = dict(stats)
+            result[difficulty]['avg_time'] = (stats['total_time'] // stats['count']
+                                              if stats['count'] > 0 else 0)
+        return result
+    
+    def practice_calendar(self, today, days=30):
+        calendar = {}
+        for i in range(days):
+            day = (today - timedelta(days=i)).isoformat()
+            calendar[day] = self.day_counts.get(day, 0)
+        return calendar
+    
+    def to_dict(self, today):
+        """The view in the data/user_stats.json layout"""
+        topic_stats = self.topic_analysis()
+        difficulty_stats = {difficulty: {'total': stats['total'],
+                                         'solved': stats['solved'],
+                                         'avg_time_seconds': stats['avg_time']}
+                            for difficulty, stats in self.difficulty_analysis().items()}
+        
+        return {
+            'total_problems': self.problem_count,
+            'total_solved': self.status_counts.get('Solved', 0),
+            'total_in_progress': self.status_counts.get('In Progress', 0),
+            'total_not_started': self.status_counts.get('Not Started', 0),
+            'total_reviewed': self.status_counts.get('Reviewed', 0),
+            'total_sessions': self.total_sessions,
+            'solved_sessions': self.solved_sessions,
+            'total_hints_used': self.total_hints,
+            'current_streak': self.current_streak(today),
+            'longest_streak': self.longest_streak,
+            'total_practice_time_seconds': self.total_time,
+            'last_practice_date': self.last_practice,
+            'topic_stats': topic_stats,
+            'difficulty_stats': difficulty_stats,
+            'practice_calendar': dict(sorted(self.day_counts.items()))
+        }
+    
+    def data_stamp(self):
+        """Stamps of the stored problems and sessions the view reflects, or None"""
+        problems = self.problem_manager.data_stamp()
+        sessions = self.session_tracker.data_stamp()
+        if problems is None or sessions is None:
+            return None
+        return [problems, sessions]
+    
+    def _state(self):
+        """Every counter, in a JSON-friendly form (integer keys as pairs)"""
+        return {
+            'problem_count': self.problem_count,
+            'status_counts': dict(self.status_counts),
+            'topic_stats': self.topic_stats,
+            'difficulty_stats': self.difficulty_stats,
+            'problem_difficulty': list(self.problem_difficulty.items()),
+            'total_sessions': self.total_sessions,
+            'solved_sessions': self.solved_sessions,
+            'total_time': self.total_time,
+            'total_hints': self.total_hints,
+            'day_counts': self.day_counts,
+            'longest_streak': self.longest_streak,
+            'last_practice': self.last_practice,
+            'solved_by_problem': [[problem_id, solved_time, solved_count] for problem_id,
+                                  (solved_time, solved_count) in self.solved_by_problem.items()]
+        }
+    
+    def _restore(self, state):
+        """Take over the counters of a _state()"""
+        self.problem_count = state['problem_count']
+        self.status_counts = Counter(state['status_counts'])
+        self.topic_stats = state['topic_stats']
+        self.difficulty_stats = state['difficulty_stats']
+        self.problem_difficulty = dict(state['problem_difficulty'])
+        self.total_sessions = state['total_sessions']
+        self.solved_sessions = state['solved_sessions']
+        self.total_time = state['total_time']
+        self.total_hints = state['total_hints']
+        self.day_counts = state['day_counts']
+        self.longest_streak = state['longest_streak']
+        self.last_practice = state['last_practice']
+        self.solved_by_problem = {problem_id: [solved_time, solved_count]
+                                  for problem_id, solved_time, solved_count
+                                  in state['solved_by_problem']}
+    
+    def _saved_state(self):
+        """The counters save() wrote, if the stored data has not changed since"""
+        stamp = self.data_stamp()
+        if stamp is None or not os.path.exists(self.stats_file):
+            return None
+        
+        data = read_json(self.stats_file)
+        view = data.get('view') if isinstance(data, dict) else None
+        if not isinstance(view, dict) or view.get('stamp') != stamp:
+            return None
+        return view.get('state')
+    
+    def save(self, today=None):
+        """
+        Write the materialized view to the stats file
+        
+        Next to the report layout of to_dict(), the file keeps the raw
+        counters under 'view' with the managers' data stamps, unless they
+        have unwritten changes.
+        """
+        data = self.to_dict(today or date.today())
+        stamp = self.data_stamp()
+        if stamp is not None:
+            data['view'] = {'stamp': stamp, 'state': self._state()}
+        return write_json(self.stats_file, data)
@@ -0,0 +1,317 @@
+"""
+Team Module
+A shared problem catalogue with one session shard per team member
+    
+    team/
+        problems.json           shared catalogue (plus journal, snapshot, ...)
+        users/<name>/
+            sessions.json       the member's sessions
+            status.json         the member's problem statuses
+            summary.json        precomputed aggregates of sessions.json
+            active_session.json, user_stats.json, ...
+
+Every member works on the shared catalogue and their own session shard,
+so nobody loads anyone else's sessions. Problem statuses are per member
+too: the catalogue keeps the status a problem was added with, and each
+member's progress goes to their status.json (see ProblemManager).
+
+Whenever a member's sessions are written, the aggregates of their shard
+(see summarize_shard) are saved next to them, stamped with the state of
+the shard files. Team analytics merge these summaries; a shard is only
+read again when its summary is missing or its stamp no longer matches,
+e.g. after an older CodeTrack wrote to it. That read streams the shard's
+files and writes nothing into the member's directory; their own
+CodeTrack saves the new summary.
+"""
+
+from datetime import date
+from array import array
+import json
+import re
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.data_handler import read_json, write_json, journal_filename
+from utils.storage import JSONStore
+from utils.helpers import EPOCH, epoch_to_iso
+from utils.columns import grouped_totals, longest_run
+from modules.problem_manager import ProblemManager
+from modules.session_tracker import SessionTracker, SessionTable, Session
+from modules.stats_store import summarize_table, merge_summaries
+
+USER_PATTERN = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*$')
+
+# Bumped whenever the summary layout changes, so old summaries are rebuilt
+SUMMARY_VERSION = 1
+
+LEADERBOARD_KEYS = ('solved', 'sessions', 'time', 'streak')
+
+
+def day_number(day):
+    """Days since the epoch of a YYYY-MM-DD string"""
+    return (date.fromisoformat(day) - EPOCH.date()).days
+
+
+def summarize_shard(sessions, workers=None):
+    """
+    Aggregates of one member's sessions, in the summary.json layout
+    
+    Args:
+        sessions: SessionTable or iterable of Session objects
+        workers (int, optional): Processes for a large table, see summarize_table()
+    
+    Returns:
+        dict: Session totals, 'days' (day number -> sessions), 'last_practice'
+            and 'problems' (problem id -> [sessions, solved sessions, solved seconds])
+    """
+    if not isinstance(sessions, SessionTable):
+        table = SessionTable()
+        for session in sessions:
+            table.append(session)
+        sessions = table
+    
+    summary = summarize_table(sessions, workers)
+    days = summary['days']
+    
+    # Start times kept as strings are not in the time column
+    odd_starts = [value for (row, field), value in sessions.odd_times.items()
+                  if field == 'start_time' and value]
+    for start in odd_starts:
+        day = day_number(start.split('T')[0])
+        days[day] = days.get(day, 0) + 1
+    if summary['latest'] is not None:
+        odd_starts.append(epoch_to_iso(summary['latest']))
+    
+    ones = array('b', [1]) * len(sessions)
+    attempts = grouped_totals(sessions.problem_ids, sessions.solved, ones)
+    solved_time = summary['solved_by_problem']
+    
+    return {
+        'version': SUMMARY_VERSION,
+        'sessions': summary['sessions'],
+        'solved': summary['solved'],
+        'time': summary['time'],
+        'hints': summary['hints'],
+        'days': dict(sorted(days.items())),
+        'last_practice': max(odd_starts, default=None),
+        'problems': {problem_id: [count, solved, solved_time.get(problem_id, (0, 0))[0]]
+                     for problem_id, (solved, count) in attempts.items()}
+    }
+
+
+def current_run(days, today):
+    """Consecutive days with sessions ending today (day numbers)"""
+    streak = 0
+    today = day_number(today.isoformat())
+    while today - streak in days:
+        streak += 1
+    return streak
+
+
+class Team:
+    """
+    Team data directory: the shared catalogue and the members' session shards
+    
+    Member names become directory names, so they are limited to letters,
+    digits, '_', '-' and '.' (not leading).
+    """
+    
+    def __init__(self, team_dir):
+        self.team_dir = team_dir
+        self.problems_file = os.path.join(team_dir, 'problems.json')
+        self.users_dir = os.path.join(team_dir, 'users')
+    
+    def user_dir(self, user):
+        """Directory of a member's shard"""
+        if not user or not USER_PATTERN.match(user):
+            raise ValueError(f"invalid user name {user!r}")
+        return os.path.join(self.users_dir, user)
+    
+    def sessions_file(self, user):
+        return os.path.join(self.user_dir(user), 'sessions.json')
+    
+    def status_file(self, user):
+        return os.path.join(self.user_dir(user), 'status.json')
+    
+    def summary_file(self, user):
+        return os.path.join(self.user_dir(user), 'summary.json')
+    
+    def users(self):
+        """Names of the members with a shard, sorted"""
+        try:
+            names = os.listdir(self.users_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if USER_PATTERN.match(name)
+                      and os.path.isdir(os.path.join(self.users_dir, name)))
+    
+    def problem_manager(self, user):
+        """ProblemManager of the shared catalogue with a member's statuses"""
+        os.makedirs(self.user_dir(user), exist_ok=True)
+        return ProblemManager(self.problems_file, snapshot=True,
+                              status_file=self.status_file(user))
+    
+    def session_tracker(self, user):
+        """SessionTracker of a member's shard, creating the shard on first use"""
+        os.makedirs(self.user_dir(user), exist_ok=True)
+        return SessionTracker(self.sessions_file(user), index_notes=True, lazy=True,
+                              snapshot=True)
+    
+    def shard_stamp(self, user):
+        """Size and modification time of the shard's session files"""
+        stamp = []
+        data_file = self.sessions_file(user)
+        for filename in (data_file, journal_filename(data_file)):
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError:
+                stamp.append(None)
+            else:
+                stamp.append([stat.st_mtime_ns, stat.st_size])
+        return stamp
+    
+    def write_summary(self, user, tracker, workers=None):
+        """
+        Save the summary of a member's shard
+        
+        Sessions other processes wrote are picked up first; the lock keeps
+        them from writing between the summary and its stamp.
+        """
+        with tracker.storage.locked():
+            tracker.refresh()
+            summary = summarize_shard(tracker.sessions, workers)
+            summary['stamp'] = self.shard_stamp(user)
+            write_json(self.summary_file(user), summary)
+        return summary
+    
+    def scan_summary(self, user, workers=None):
+        """
+        Summary of a member's shard, read straight from its files
+        
+        Nothing is written and no lock, snapshot or split file is created
+        in the member's directory. The stamp is taken first, so a summary
+        of sessions that changed during the read does not look current.
+        """
+        stamp = self.shard_stamp(user)
+        store = JSONStore(self.sessions_file(user))
+        try:
+            summary = summarize_shard(map(Session.from_dict, store.iter_records()), workers)
+        except json.JSONDecodeError:
+            # Corrupted snapshot; load() restores it from the backup
+            summary = summarize_shard(map(Session.from_dict, store.load()), workers)
+        summary['stamp'] = stamp
+        return summary
+    
+    def summary(self, user, workers=None):
+        """A member's summary, rebuilt from their sessions only if it is stale"""
+        summary = read_json(self.summary_file(user))
+        if (summary and summary.get('version') == SUMMARY_VERSION
+                and summary.get('stamp') == self.shard_stamp(user)):
+            # JSON object keys are strings
+            summary['days'] = {int(day): count for day, count in summary['days'].items()}
+            summary['problems'] = {int(problem_id): totals
+                                   for problem_id, totals in summary['problems'].items()}
+            return summary
+        
+        return self.scan_summary(user, workers)
+    
+    def summaries(self, workers=None):
+        """Member name -> summary, for every member"""
+        return {user: self.summary(user, workers) for user in self.users()}
+
+
+class TeamAnalytics:
+    """Team-wide statistics, topic success rates and leaderboards from shard summaries"""
+    
+    def __init__(self, problem_manager, summaries):
+        self.problem_manager = problem_manager
+        self.summaries = summaries
+    
+    def statistics(self, today=None):
+        """Totals over every member's sessions"""
+        today = today or date.today()
+        merged = merge_summaries({'sessions': summary['sessions'], 'time': summary['time'],
+                                  'hints': summary['hints'], 'solved': summary['solved'],
+                                  'days': summary['days'], 'latest': None,
+                                  'solved_by_problem': {}}
+                                 for summary in self.summaries.values())
+        days = merged['days']
+        
+        return {
+            'members': len(self.summaries),
+            'active_members': sum(1 for summary in self.summaries.values() if summary['sessions']),
+            'total_problems': len(self.problem_manager.problems),
+            'problems_solved': len({problem_id for summary in self.summaries.values()
+                                    for problem_id, totals in summary['problems'].items()
+                                    if totals[1]}),
+            'total_sessions': merged['sessions'],
+            'solved_sessions': merged['solved'],
+            'total_practice_time': merged['time'],
+            'total_hints_used': merged['hints'],
+            'active_days': len(days),
+            'current_streak': current_run(days, today),
+            'longest_streak': longest_run(days),
+            'last_practice_date': max((summary['last_practice'] for summary in self.summaries.values()
+                                       if summary['last_practice']), default=None)
+        }
+    
+    def topic_analysis(self):
+        """
+        Team success rate per topic
+        
+        A member counts as having attempted a problem once they have a
+        session on it and as having solved it once a session was solved;
+        the rate is solved / attempted over all (member, problem) pairs.
+        """
+        topics_of = {problem.id: problem.topics for problem in self.problem_manager.problems}
+        analysis = {}
+        
+        for summary in self.summaries.values():
+            member_topics = set()
+            for problem_id, (sessions, solved, solved_time) in summary['problems'].items():
+                for topic in topics_of.get(problem_id, ()):
+                    stats = analysis.setdefault(topic, {'attempted': 0, 'solved': 0,
+                                                        'sessions': 0, 'members': 0})
+                    stats['attempted'] += 1
+                    stats['solved'] += 1 if solved else 0
+                    stats['sessions'] += sessions
+                    if topic not in member_topics:
+                        member_topics.add(topic)
+                        stats['members'] += 1
+        
+        for stats in analysis.values():
+            stats['success_rate'] = stats['solved'] / stats['attempted']
+        return dict(sorted(analysis.items(), key=lambda item: (-item[1]['success_rate'], item[0])))
+    
+    def leaderboard(self, key='solved', today=None):
+        """
+        Members ranked by solved problems, sessions, practice time or current streak
+        
+        Returns:
+            list: Row dicts, best first (ties broken by the other columns, then name)
+        """
+        if key not in LEADERBOARD_KEYS:
+            raise ValueError(f"unknown leaderboard key {key!r}")
+        today = today or date.today()
+        
+        rows = []
+        for user, summary in self.summaries.items():
+            rows.append({
+                'user': user,
+                'solved': sum(1 for totals in summary['problems'].values() if totals[1]),
+                'attempted': len(summary['problems']),
+                'sessions': summary['sessions'],
+                'time': summary['time'],
+                'streak': current_run(summary['days'], today),
+                'longest_streak': longest_run(summary['days']),
+                'last_practice_date': summary['last_practice']
+            })
+        
+        order = (key,) + tuple(k for k in LEADERBOARD_KEYS if k != key)
+        rows.sort(key=lambda row: tuple(-row[k] for k in order) + (row['user'],))
+        for rank, row in enumerate(rows, 1):
+            row['rank'] = rank
+        return rows
@@ -0,0 +1,634 @@
+"""
+CodeTrack HTTP API
+JSON endpoints over one warm, in-memory copy of the problems and sessions
+    
+    python server.py                          http://127.0.0.1:8765
+    python server.py --port 9000 --team /srv/codetrack --user ana
+    
+    GET    /problems[?difficulty=&status=&topics=a,b&match=all&sort=title]
+    POST   /problems                 {"title", "difficulty", "topics", "platform", "url"}
+    GET    /problems/search?q=...[&limit=N]
+    GET    /problems/<id>
+    PATCH  /problems/<id>            any of title, difficulty, topics, platform, url, status
+    DELETE /problems/<id>
+    GET    /topics
+    GET    /sessions[?problem_id=N]
+    GET    /sessions/search?q=...[&limit=N]
+    GET    /sessions/<id>
+    GET    /session                  the active session (null when there is none)
+    POST   /session/start            {"problem_id"}
+    POST   /session/pause | /session/resume | /session/hint | /session/cancel
+    POST   /session/note             {"text"}
+    POST   /session/stop             {"solved", "solution_code"}
+    GET    /stats
+    GET    /report[?days=N]
+    GET    /team/report, /team/leaderboard[?by=solved|sessions|time|streak]   (with --team)
+
+The data is loaded once at start-up, like the interactive menu does, and
+every request is served from memory. All reads and writes run one at a
+time on a single data thread, so writes are serialized and never
+interleave with a read; the event loop only parses requests and writes
+responses, so slow clients do not hold up others. Connections are kept
+alive between requests (HTTP/1.1 keep-alive).
+
+Every GET response carries an ETag. Responses to reads that only depend
+on the data (problems, sessions, stats, report) are cached until the next
+change, and a request whose If-None-Match still matches gets
+304 Not Modified without the data thread being involved at all. Changes
+saved by other CodeTrack processes are picked up at most every
+--refresh seconds.
+
+Client is a small keep-alive client that does the If-None-Match
+bookkeeping for dashboards and editor plugins written in Python.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from datetime import date
+import http.client
+import argparse
+import getpass
+import hashlib
+import asyncio
+import select
+import time
+import json
+import re
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from main import AppData
+from modules.problem_manager import DIFFICULTY_LABELS, STATUS_LABELS
+from modules.team import Team, TeamAnalytics, LEADERBOARD_KEYS
+
+DEFAULT_PORT = 8765
+
+KEEP_ALIVE_TIMEOUT = 30  # Seconds an idle connection is kept open
+MAX_BODY_SIZE = 1 << 20
+MAX_HEADERS = 100
+MAX_CACHED_RESPONSES = 512
+
+SORT_KEYS = ('date_added', 'difficulty', 'title', 'status')
+EDITABLE_FIELDS = ('title', 'difficulty', 'topics', 'platform', 'url', 'status')
+SAFE_METHODS = ('GET', 'HEAD')  # Sent again by Client after any connection failure
+
+REASONS = {200: 'OK', 201: 'Created', 304: 'Not Modified', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 501: 'Not Implemented'}
+
+
+class HTTPError(Exception):
+    """Request that cannot be served; becomes a JSON {"error": message} response"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChangeCounter:
+    """Listener counting problem and session changes, which version the cached responses"""
+    
+    def __init__(self):
+        self.version = 0
+    
+    def changed(self, *args):
+        self.version += 1
+    
+    problem_indexed = problem_unindexed = problems_reset = changed
+    session_added = sessions_loaded = changed
+
+
+def _int(query, name, default=None):
+    value = query.get(name)
+    if value is None:
+        if default is None:
+            raise HTTPError(400, f"missing {name}")
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be an integer")
+
+
+def _topics(value):
+    """Topics from a JSON list or a comma-separated string"""
+    if isinstance(value, list):
+        return [str(topic).strip() for topic in value if str(topic).strip()]
+    return [topic.strip() for topic in str(value or '').split(',') if topic.strip()]
+
+
+def _choice(value, choices, name):
+    if value not in choices:
+        raise HTTPError(400, f"{name} must be one of: {', '.join(choices)}")
+    return value
+
+
+class API:
+    """
+    Routes and the problem/session operations behind them
+    
+    Handlers take (query, body, *path groups) and return (status, payload).
+    They run on the server's data thread only.
+    """
+    
+    def __init__(self, data):
+        self.data = data
+        self.changes = ChangeCounter()
+        data.pm.subscribe(self.changes)
+        data.st.subscribe(self.changes)
+        data.analytics  # Build the report aggregates now rather than on the first request
+        
+        # (method, path pattern, handler, cacheable)
+        routes = [
+            ('GET', r'/problems', self.list_problems, True),
+            ('POST', r'/problems', self.add_problem, False),
+            ('GET', r'/problems/search', self.search_problems, True),
+            ('GET', r'/problems/(\d+)', self.get_problem, True),
+            ('PATCH', r'/problems/(\d+)', self.edit_problem, False),
+            ('DELETE', r'/problems/(\d+)', self.delete_problem, False),
+            ('GET', r'/topics', self.get_topics, True),
+            ('GET', r'/sessions', self.list_sessions, True),
+            ('GET', r'/sessions/search', self.search_sessions, True),
+            ('GET', r'/sessions/(\d+)', self.get_session, True),
+            ('GET', r'/session', self.active_session, False),
+            ('POST', r'/session/(start|pause|resume|hint|note|stop|cancel)', self.session_action,
+             False),
+            ('GET', r'/stats', self.get_statistics, True),
+            ('GET', r'/report', self.get_report, True),
+        ]
+        if data.team is not None:
+            # Other members' shards change behind our back, so these are not cached
+            routes += [
+                ('GET', r'/team/report', self.team_report, False),
+                ('GET', r'/team/leaderboard', self.team_leaderboard, False),
+            ]
+        self.routes = [(method, re.compile(pattern + '$'), handler, cacheable)
+                       for method, pattern, handler, cacheable in routes]
+    
+    def route(self, method, path):
+        """
+        Find the handler for a request
+        
+        Returns:
+            tuple: (handler, path groups, cacheable)
+        
+        Raises:
+            HTTPError: 404 for an unknown path, 405 for a known path and wrong method
+        """
+        path = path.rstrip('/') or '/'
+        allowed = False
+        for route_method, pattern, handler, cacheable in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method == method:
+                return handler, match.groups(), cacheable
+            allowed = True
+        
+        if allowed:
+            raise HTTPError(405, f"{method} is not allowed on {path}")
+        raise HTTPError(404, f"no such endpoint: {path}")
+    
+    def refresh(self):
+        """Pick up what other CodeTrack processes saved"""
+        self.data.refresh()
+    
+    def _problem(self, problem_id):
+        problem = self.data.pm.get_problem(int(problem_id))
+        if problem is None:
+            raise HTTPError(404, f"no problem with ID {problem_id}")
+        return problem
+    
+    def list_problems(self, query, body):
+        pm = self.data.pm
+        if any(name in query for name in ('difficulty', 'status', 'topics')):
+            problems = pm.filter_problems(difficulty=query.get('difficulty'),
+                                          status=query.get('status'),
+                                          topics=_topics(query.get('topics')) or None,
+                                          match=_choice(query.get('match', 'any'), ('any', 'all'),
+                                                        'match'))
+        else:
+            problems = pm.list_problems(_choice(query.get('sort', 'date_added'), SORT_KEYS, 'sort'))
+        return 200, [problem.to_dict() for problem in problems]
+    
+    def add_problem(self, query, body):
+        title = ' '.join(str(body.get('title') or '').split())
+        if not title:
+            raise HTTPError(400, "missing title")
+        
+        count = len(self.data.pm.problems)
+        problem = self.data.pm.add_problem(
+            title, _choice(body.get('difficulty', 'Medium'), DIFFICULTY_LABELS, 'difficulty'),
+            _topics(body.get('topics')), str(body.get('platform') or ''),
+            str(body.get('url') or ''))
+        # An existing problem with the same title or URL is updated instead
+        return 201 if len(self.data.pm.problems) > count else 200, problem.to_dict()
+    
+    def search_problems(self, query, body):
+        if not query.get('q'):
+            raise HTTPError(400, "missing q")
+        problems = self.data.pm.search_problems(query['q'], _int(query, 'limit', 0) or None)
+        return 200, [problem.to_dict() for problem in problems]
+    
+    def get_problem(self, query, body, problem_id):
+        return 200, self._problem(problem_id).to_dict()
+    
+    def edit_problem(self, query, body, problem_id):
+        problem = self._problem(problem_id)
+        updates = {}
+        for field, value in body.items():
+            if field not in EDITABLE_FIELDS:
+                raise HTTPError(400, f"{field} cannot be edited")
+            if field == 'difficulty':
+                value = _choice(value, DIFFICULTY_LABELS, 'difficulty')
+            elif field == 'status':
+                value = _choice(value, STATUS_LABELS, 'status')
+            elif field == 'topics':
+                value = _topics(value)
+            elif field == 'title':
+                value = ' '.join(str(value or '').split())
+                if not value:
+                    raise HTTPError(400, "title cannot be empty")
+            else:
+                value = str(value or '')
+            updates[field] = value
+        
+        if updates:
+            self.data.pm.edit_problem(problem.id, **updates)
+        return 200, problem.to_dict()
+    
+    def delete_problem(self, query, body, problem_id):
+        problem = self._problem(problem_id)
+        self.data.pm.delete_problem(problem.id)
+        return 200, {'deleted': problem.id}
+    
+    def get_topics(self, query, body):
+        return 200, self.data.pm.get_topics()
+    
+    def list_sessions(self, query, body):
+        problem_id = _int(query, 'problem_id', 0) or None
+        return 200, [session.to_dict() for session in self.data.st.get_session_history(problem_id)]
+    
+    def search_sessions(self, query, body):
+        if not query.get('q'):
+            raise HTTPError(400, "missing q")
+        sessions = self.data.st.search_sessions(query['q'], _int(query, 'limit', 0) or None)
+        return 200, [session.to_dict() for session in sessions]
+    
+    def get_session(self, query, body, session_id):
+        session = self.data.st.get_session_by_id(int(session_id))
+        if session is None:
+            raise HTTPError(404, f"no session with ID {session_id}")
+        return 200, session.to_dict()
+    
+    def active_session(self, query, body):
+        st = self.data.st
+        session = st.get_active_session()
+        if session is None:
+            return 200, None
+        return 200, dict(session.to_dict(), elapsed_seconds=st.get_elapsed_time(),
+                         paused=st.is_paused())
+    
+    def session_action(self, query, body, action):
+        pm = self.data.pm
+        st = self.data.st
+        session = st.get_active_session()
+        
+        if action == 'start':
+            problem = self._problem(_int(body, 'problem_id'))
+            if session is not None:
+                raise HTTPError(409, f"session {session.id} is still running")
+            st.start_session(problem.id)
+            pm.edit_problem(problem.id, status="In Progress")
+            return self.active_session(query, body)
+        
+        if session is None:
+            raise HTTPError(409, "no active session")
+        
+        if action == 'stop':
+            solved = bool(body.get('solved'))
+            st.complete_session(solved=solved, solution_code=str(body.get('solution_code') or ''))
+            if solved and pm.get_problem(session.problem_id):
+                pm.edit_problem(session.problem_id, status="Solved")
+            return 200, session.to_dict()
+        
+        if action == 'cancel':
+            st.cancel_session()
+            return 200, None
+        
+        if action == 'note':
+            if not str(body.get('text') or '').strip():
+                raise HTTPError(400, "missing text")
+            st.add_note(str(body['text']))
+        elif action == 'hint':
+            st.add_hint()
+        elif not getattr(st, action + '_session')():
+            raise HTTPError(409, f"session is already {'paused' if action == 'pause' else 'running'}")
+        return self.active_session(query, body)
+    
+    def get_statistics(self, query, body):
+        return 200, self.data.analytics.calculate_statistics()
+    
+    def get_report(self, query, body):
+        return 200, self.data.analytics.get_report(_int(query, 'days', 30))
+    
+    def _team_analytics(self):
+        return TeamAnalytics(self.data.pm, self.data.team.summaries())
+    
+    def team_report(self, query, body):
+        analytics = self._team_analytics()
+        return 200, {'statistics': analytics.statistics(), 'topics': analytics.topic_analysis()}
+    
+    def team_leaderboard(self, query, body):
+        key = _choice(query.get('by', 'solved'), LEADERBOARD_KEYS, 'by')
+        return 200, self._team_analytics().leaderboard(key)
+
+
+class Server:
+    """asyncio HTTP/1.1 front end; every API call runs on one data thread"""
+    
+    def __init__(self, api, refresh_interval=1.0):
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix='codetrack-data')
+        self.cache = {}  # request target -> ((version, day), etag, body)
+        self._last_refresh = time.monotonic()
+    
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+    
+    async def _read_request(self, reader):
+        """(method, target, version, headers, body), or None when the client is done"""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, "too many headers")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(501, "chunked request bodies are not supported")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b''
+        
+        return method.upper(), target, version.upper(), headers, body
+    
+    async def _respond(self, method, target, headers, body):
+        """(status, response headers, body) for one request"""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        handler, groups, cacheable = self.api.route(method, url.path)
+        
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self._last_refresh = time.monotonic()
+            await self._call(self.api.refresh)
+        
+        if method != 'GET':
+            try:
+                data = json.loads(body) if body.strip() else {}
+            except ValueError:
+                raise HTTPError(400, "request body is not valid JSON")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "request body must be a JSON object")
+            status, payload = await self._call(handler, query, data, *groups)
+            return status, {}, self._encode(payload)
+        
+        # The report's calendar and streaks move on at midnight even without changes
+        key = (self.api.changes.version, date.today())
+        cached = self.cache.get(target) if cacheable else None
+        if cached is not None and cached[0] == key:
+            etag, content = cached[1], cached[2]
+        else:
+            status, payload = await self._call(handler, query, None, *groups)
+            content = self._encode(payload)
+            etag = '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+            if cacheable and status == 200:
+                if len(self.cache) >= MAX_CACHED_RESPONSES:
+                    del self.cache[next(iter(self.cache))]
+                self.cache[target] = (key, etag, content)
+        
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Cache-Control': 'no-cache'}, content
+    
+    @staticmethod
+    def _encode(payload):
+        return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+    
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection until it closes or idles out"""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    break  # Idle, disconnected or an over-long line
+                except HTTPError as e:
+                    request = e
+                if request is None:
+                    break
+                
+                try:
+                    if isinstance(request, HTTPError):
+                        raise request
+                    method, target, version, headers, body = request
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = (connection != 'close' if version == 'HTTP/1.1'
+                                  else connection == 'keep-alive')
+                    status, extra, content = await self._respond(method, target, headers, body)
+                except HTTPError as e:
+                    status, extra, content = e.status, {}, self._encode({'error': e.message})
+                except Exception as e:
+                    print(f"Error: {e!r}", file=sys.stderr)
+                    status, extra, content = 500, {}, self._encode({'error': "internal error"})
+                
+                lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+                if status != 304:
+                    lines.append("Content-Type: application/json; charset=utf-8")
+                lines.append(f"Content-Length: {len(content)}")
+                lines.extend(f"{name}: {value}" for name, value in extra.items())
+                if keep_alive:
+                    lines.append(f"Keep-Alive: timeout={KEEP_ALIVE_TIMEOUT}")
+                else:
+                    lines.append("Connection: close")
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + content)
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"CodeTrack API on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class APIError(Exception):
+    """Error response from the server"""
+    
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class Client:
+    """
+    Keep-alive client for the API
+    
+    One connection is reused for every request. GET responses are kept
+    with their ETag and revalidated with If-None-Match, so an unchanged
+    report costs a 304 and no JSON decoding.
+    
+    A connection idle for idle_timeout seconds, or one the server has
+    already closed, is replaced before the next request is sent. A
+    request is only sent again, once on a new connection, when sending it
+    on a reused connection failed: once a request is out the server may
+    have run it, so a POST is never repeated. GET and HEAD are also
+    retried after other failures.
+    
+    Example:
+        client = Client()
+        report = client.get('/report')
+        client.post('/session/start', {'problem_id': 12})
+    """
+    
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, timeout=10,
+                 idle_timeout=KEEP_ALIVE_TIMEOUT - 5):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        self.cache = {}  # path -> (etag, payload)
+        self.idle_timeout = idle_timeout
+        self._last_used = None  # time.monotonic() of the last response
+    
+    def request(self, method, path, payload=None):
+        headers = {}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        
+        cached = self.cache.get(path) if method == 'GET' else None
+        if cached is not None:
+            headers['If-None-Match'] = cached[0]
+        
+        if self._last_used is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            self.connection.close()
+        
+        for attempt in range(2):
+            if self.connection.sock is not None and self._closed_by_server():
+                self.connection.close()
+            reused = self.connection.sock is not None
+            sent = False
+            try:
+                self.connection.request(method, path, body, headers)
+                sent = True
+                response = self.connection.getresponse()
+                content = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                self.connection.close()
+                if attempt or not (method in SAFE_METHODS or (reused and not sent)):
+                    raise
+        self._last_used = time.monotonic()
+        
+        if response.status == 304:
+            return cached[1]
+        
+        result = json.loads(content) if content else None
+        if response.status >= 400:
+            raise APIError(response.status, result.get('error') if isinstance(result, dict) else result)
+        
+        etag = response.getheader('ETag')
+        if method == 'GET' and etag:
+            self.cache[path] = (etag, result)
+        return result
+    
+    def _closed_by_server(self):
+        """Whether the idle connection is readable, i.e. the server closed or reset it"""
+        try:
+            readable, _, _ = select.select([self.connection.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+    
+    def get(self, path):
+        return self.request('GET', path)
+    
+    def post(self, path, payload=None):
+        return self.request('POST', path, payload or {})
+    
+    def patch(self, path, payload):
+        return self.request('PATCH', path, payload)
+    
+    def delete(self, path):
+        return self.request('DELETE', path)
+    
+    def close(self):
+        self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeTrack HTTP/JSON API")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--refresh', type=float, default=1.0, metavar='SECONDS',
+                        help="how often to pick up other processes' changes (default: 1)")
+    parser.add_argument('--team', metavar='DIR',
+                        help="team directory: shared problems, one session shard per user")
+    parser.add_argument('--user', default=os.environ.get('CODETRACK_USER') or getpass.getuser(),
+                        help="your name in the team (default: $CODETRACK_USER or login name)")
+    args = parser.parse_args(argv)
+    
+    team = None
+    if args.team:
+        team = Team(args.team)
+        try:
+            team.user_dir(args.user)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    data = AppData('eager', team, args.user)
+    server = Server(API(data), args.refresh)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        data.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Tests for the codetrack command line
+"""
+
+import subprocess
+import json
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+import codetrack
+
+
+def run(capsys, data_dir, *args):
+    """Run one command line, returning (exit status, stdout, stderr)"""
+    status = codetrack.main(['--data-dir', str(data_dir), *args])
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def run_json(capsys, data_dir, *args):
+    status, out, _ = run(capsys, data_dir, *args, '--json')
+    assert status == 0
+    return json.loads(out)
+
+
+def test_problem_and_session_commands(tmp_path, capsys):
+    assert run(capsys, tmp_path, 'problems', 'add', "Two Sum", '--difficulty', 'Easy',
+               '--topics', 'Array, Hash Table')[:2] == (0, "Added problem 1\n")
+    run(capsys, tmp_path, 'problems', 'add', "Word Ladder", '--difficulty', 'Hard',
+        '--topics', 'Graph,BFS')
+    
+    # Adding a problem twice says so instead of claiming a new one
+    status, out, _ = run(capsys, tmp_path, 'problems', 'add', "two sum", '--topics', 'Array')
+    assert status == 0
+    assert out == "Problem 1 is already in the library: Two Sum (Easy); merged the new topics into it\n"
+    
+    problems = run_json(capsys, tmp_path, 'problems', 'list', '--sort', 'title')
+    assert [(p['id'], p['title'], p['topics']) for p in problems] == [
+        (1, "Two Sum", ["Array", "Hash Table"]), (2, "Word Ladder", ["Graph", "BFS"])]
+    assert [p['id'] for p in run_json(capsys, tmp_path, 'problems', 'filter',
+                                      '--topics', 'Graph,Array')] == [1, 2]
+    assert [p['id'] for p in run_json(capsys, tmp_path, 'problems', 'filter', '--topics',
+                                      'Graph,Array', '--all')] == []
+    
+    # The active session outlives the process that started it
+    assert run(capsys, tmp_path, 'session', 'start', '2')[:2] == (0, "Session started for: Word Ladder\n")
+    assert os.path.exists(tmp_path / 'active_session.json')
+    assert run(capsys, tmp_path, 'session', 'start', '1')[0] == 1
+    status, out, _ = run(capsys, tmp_path, 'session', 'stop', '--solved')
+    assert status == 0 and out.endswith("SOLVED\n")
+    assert not os.path.exists(tmp_path / 'active_session.json')
+    status, _, err = run(capsys, tmp_path, 'session', 'stop')
+    assert status == 1 and err == "Error: no active session\n"
+    
+    report = run_json(capsys, tmp_path, 'report')
+    assert report['statistics']['total_problems'] == 2
+    assert report['statistics']['total_solved'] == 1
+    assert report['statistics']['total_sessions'] == 1
+
+
+def test_batch_runs_every_line_against_one_load(tmp_path, capsys):
+    batch_file = tmp_path / 'ops.txt'
+    batch_file.write_text('# seed the library\n'
+                          'problems add "Two Sum" --difficulty Easy\n'
+                          '\n'
+                          'problems add "3Sum"\n'
+                          'session start 2\n'
+                          'session stop --solved\n')
+    
+    status, out, err = run(capsys, tmp_path, 'batch', str(batch_file))
+    assert status == 0
+    assert out.splitlines()[:3] == ["Added problem 1", "Added problem 2", "Session started for: 3Sum"]
+    assert "Ran 4 commands" in err
+    
+    problems = run_json(capsys, tmp_path, 'problems', 'list')
+    assert {p['id']: p['status'] for p in problems} == {1: "Not Started", 2: "Solved"}
+
+
+def test_batch_rejects_global_options_and_nesting(tmp_path, capsys):
+    other_dir = tmp_path / 'other'
+    batch_file = tmp_path / 'ops.txt'
+    batch_file.write_text(f'--data-dir {other_dir} problems add "Elsewhere"\n'
+                          '--user ben --profile problems list\n'
+                          f'batch {batch_file}\n'
+                          'problems add "Two Sum"\n'
+                          'problems add --no-such-option\n')
+    
+    status, out, err = run(capsys, tmp_path, 'batch', str(batch_file))
+    assert status == 1
+    assert "Error: line 1: global options (--data-dir) apply to the whole batch" in err
+    assert "Error: line 2: global options (--user, --profile) apply to the whole batch" in err
+    assert "Error: line 3: batches cannot be nested" in err
+    assert "Error: line 5 skipped" in err
+    assert "Ran 1 commands" in err
+    assert out == "Added problem 1\n"
+    
+    assert not other_dir.exists()
+    assert [p['title'] for p in run_json(capsys, tmp_path, 'problems', 'list')] == ["Two Sum"]
+
+
+def test_problem_commands_do_not_import_the_other_modules(tmp_path):
+    code = ("import sys, codetrack\n"
+            f"codetrack.main(['--data-dir', {str(tmp_path)!r}, 'problems', 'list'])\n"
+            "print(sorted(name for name in ('modules.analytics', 'modules.team', 'modules.importer',"
+            " 'modules.stats_store', 'sqlite3') if name in sys.modules))\n")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True,
+                            text=True, check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
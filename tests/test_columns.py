@@ -0,0 +1,69 @@
+"""
+Tests for the column aggregates, with and without NumPy
+"""
+
+from array import array
+import random
+import sys
+import os
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils import columns
+
+MISSING = -2 ** 63
+DAY = 86400 * 1000000
+
+
+def make_columns(rows, seed=7):
+    """Session-like columns: some missing start times, problem ids repeating out of order"""
+    rng = random.Random(seed)
+    start = 1700000000 * 1000000
+    times = array('q', (MISSING if rng.random() < 0.1 else start + rng.randrange(-40 * DAY, 40 * DAY)
+                        for _ in range(rows)))
+    keys = array('q', (rng.randrange(1, 50) for _ in range(rows)))
+    values = array('q', (rng.randrange(0, 7200) for _ in range(rows)))
+    mask = array('b', (rng.random() < 0.6 for _ in range(rows)))
+    return times, keys, values, mask
+
+
+def aggregate(times, keys, values, mask):
+    days = columns.day_histogram(times, MISSING, DAY)
+    return {
+        'sum': columns.column_sum(values),
+        'max': columns.column_max(times, MISSING),
+        'days': list(days.items()),
+        'run': columns.longest_run(days),
+        'groups': list(columns.grouped_totals(keys, values, mask).items())
+    }
+
+
+@pytest.mark.parametrize('rows', [0, 1, 1000])
+def test_numpy_and_pure_python_agree(rows, monkeypatch):
+    pytest.importorskip('numpy')
+    data = make_columns(rows)
+    
+    monkeypatch.setattr(columns, '_numpy', False)
+    with_numpy = aggregate(*data)
+    assert columns._numpy is not None
+    
+    monkeypatch.setattr(columns, '_numpy', None)
+    assert aggregate(*data) == with_numpy
+
+
+def test_pure_python_fallback(monkeypatch):
+    monkeypatch.setattr(columns, '_numpy', None)
+    times = array('q', [3 * DAY + 5, MISSING, 1 * DAY, 2 * DAY + 1, 3 * DAY, 7 * DAY])
+    
+    assert columns.column_sum(array('q', [2, 3, 4])) == 9
+    assert columns.column_max(times, MISSING) == 7 * DAY
+    assert columns.column_max(array('q', [MISSING]), MISSING) is None
+    assert columns.day_histogram(times, MISSING, DAY) == {1: 1, 2: 1, 3: 2, 7: 1}
+    assert columns.longest_run([1, 2, 3, 7, 8]) == 3
+    assert columns.longest_run([]) == 0
+    assert (list(columns.grouped_totals(array('q', [5, 2, 5, 9]), array('q', [10, 20, 30, 40]),
+                                        array('b', [1, 1, 1, 0])).items())
+            == [(5, [40, 2]), (2, [20, 1])])
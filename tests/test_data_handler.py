@@ -0,0 +1,170 @@
+"""
+Tests for the JSON file helpers
+"""
+
+import gzip
+import json
+import sys
+import os
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils import data_handler
+from utils.data_handler import (read_json, write_json, iter_json_array, backup_files, read_jsonl,
+                                append_journal, load_journaled, journal_filename, BackupPolicy,
+                                backup_name, JSONFormat, OrjsonEncoder, StdlibEncoder,
+                                set_json_format)
+
+
+def test_iter_json_array_matches_read_json(tmp_path):
+    filename = str(tmp_path / 'problems.json')
+    records = [{'id': i, 'title': f"两数之和 {i}", 'topics': ["Número", "Array"], 'score': i * 1.5}
+               for i in range(50)]
+    write_json(filename, records)
+    
+    # Small chunks split strings and numbers across reads
+    for chunk_size in (1, 7, 64, 65536):
+        assert list(iter_json_array(filename, chunk_size)) == read_json(filename) == records
+    assert list(iter_json_array(str(tmp_path / 'missing.json'))) == []
+
+
+def test_write_json_keeps_a_backup(tmp_path):
+    filename = str(tmp_path / 'problems.json')
+    write_json(filename, [{'id': 1}])
+    write_json(filename, [{'id': 2}])
+    
+    assert list(backup_files(filename)) == [filename + '.backup']
+    assert read_json(filename + '.backup') == [{'id': 1}]
+
+
+def write_versions(filename, versions):
+    for version in versions:
+        write_json(filename, [{'id': version}])
+
+
+def test_backup_generations_rotate(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_handler, 'backup_policy', BackupPolicy(generations=3))
+    filename = str(tmp_path / 'problems.json')
+    write_versions(filename, range(1, 6))
+    
+    assert list(backup_files(filename)) == [backup_name(filename, g) for g in (1, 2, 3)]
+    assert [read_json(name) for name in backup_files(filename)] == [[{'id': 4}], [{'id': 3}],
+                                                                    [{'id': 2}]]
+
+
+def test_backups_are_throttled_by_min_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_handler, 'backup_policy', BackupPolicy(generations=3, min_interval=3600))
+    filename = str(tmp_path / 'problems.json')
+    write_versions(filename, range(1, 5))
+    
+    # Only the first replacement was backed up within the hour
+    assert [read_json(name) for name in backup_files(filename)] == [[{'id': 1}]]
+    
+    newest = backup_name(filename, 1)
+    os.utime(newest, (0, 0))
+    write_versions(filename, [5])
+    assert [read_json(name) for name in backup_files(filename)] == [[{'id': 4}], [{'id': 1}]]
+
+
+def test_link_backups_share_the_old_file(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'problems.json')
+    write_versions(filename, [1])
+    old_inode = os.stat(filename).st_ino
+    
+    monkeypatch.setattr(data_handler, 'backup_policy', BackupPolicy(method='link'))
+    write_versions(filename, [2])
+    assert os.stat(backup_name(filename, 1)).st_ino == old_inode
+    assert os.stat(filename).st_ino != old_inode
+    
+    monkeypatch.setattr(data_handler, 'backup_policy', BackupPolicy(method='copy'))
+    old_inode = os.stat(filename).st_ino
+    write_versions(filename, [3])
+    assert os.stat(backup_name(filename, 1)).st_ino != old_inode
+    assert read_json(backup_name(filename, 1)) == [{'id': 2}]
+
+
+def test_compressed_backups_restore_a_corrupted_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_handler, 'backup_policy', BackupPolicy(generations=2,
+                                                                    compression='gzip'))
+    filename = str(tmp_path / 'problems.json')
+    write_versions(filename, [1, 2, 3])
+    
+    assert list(backup_files(filename)) == [backup_name(filename, g, 'gzip') for g in (1, 2)]
+    with gzip.open(backup_name(filename, 1, 'gzip')) as file:
+        assert json.loads(file.read()) == [{'id': 2}]
+    
+    # A damaged newest backup is skipped for the next generation
+    with open(filename, 'w') as file:
+        file.write('[{"id": 3')
+    with open(backup_name(filename, 1, 'gzip'), 'wb') as file:
+        file.write(b'not gzip')
+    assert read_json(filename) == [{'id': 1}]
+
+
+def test_zstd_backups_need_zstandard(monkeypatch):
+    monkeypatch.setattr(data_handler, 'zstandard', None)
+    with pytest.raises(ValueError):
+        BackupPolicy(compression='zstd')
+    with pytest.raises(ValueError):
+        BackupPolicy(compression='bz2')
+
+
+RECORDS = [{'id': 1, 'title': "两数之和", 'topics': ["Número", "Array"], 'score': 1.5,
+            'url': None, 'solved': True, 'pauses': [], 'meta': {}},
+           {'id': 2, 'title': 'Quote " and \\ backslash', 'topics': [], 'score': -3,
+            'url': "https://example.com/?a=1&b=2", 'solved': False, 'pauses': [[1, 2]],
+            'meta': {'nested': {'deep': [1, "two"]}}}]
+
+
+def test_orjson_and_stdlib_encoders_agree():
+    pytest.importorskip('orjson')
+    fast, stdlib = OrjsonEncoder(), StdlibEncoder()
+    
+    for pretty in (False, True):
+        encoded = fast.dumps(RECORDS, pretty)
+        assert encoded == stdlib.dumps(RECORDS, pretty)
+        assert fast.loads(encoded) == stdlib.loads(encoded) == RECORDS
+    
+    # Non-string keys are written as strings, and data orjson rejects
+    # (integers past 64 bits) falls back to the standard library
+    assert fast.loads(fast.dumps({1: 'a'})) == stdlib.loads(stdlib.dumps({1: 'a'})) == {'1': 'a'}
+    assert fast.loads(fast.dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+
+
+def test_set_json_format_switches_the_file_encoding(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'problems.json')
+    monkeypatch.setattr(data_handler, 'json_format', data_handler.json_format)
+    
+    set_json_format(JSONFormat(compact=False, encoder=StdlibEncoder()))
+    write_json(filename, RECORDS)
+    with open(filename, 'rb') as file:
+        assert file.read() == json.dumps(RECORDS, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    set_json_format(JSONFormat())
+    assert read_json(filename) == RECORDS
+    write_json(filename, RECORDS)
+    with open(filename, 'rb') as file:
+        assert file.read() == StdlibEncoder().dumps(RECORDS)
+
+
+def test_journal_replay_skips_a_torn_last_entry(tmp_path):
+    filename = str(tmp_path / 'problems.json')
+    write_json(filename, [{'id': 1, 'title': "Two Sum"}, {'id': 2, 'title': "3Sum"}])
+    append_journal(filename, puts=[{'id': 2, 'title': "两数之和"}, {'id': 3, 'title': "Número"}],
+                   deletes=[1])
+    
+    # A crash in the middle of an append leaves half a line behind
+    with open(journal_filename(filename), 'ab') as file:
+        file.write('{"op": "put", "data": {"id": 4, "title": "Lösung'.encode('utf-8'))
+    
+    assert len(read_jsonl(journal_filename(filename))) == 3
+    records, replayed = load_journaled(filename)
+    assert records == [{'id': 2, 'title': "两数之和"}, {'id': 3, 'title': "Número"}]
+    assert replayed == 3
+    
+    # The next append starts on a line of its own
+    append_journal(filename, puts=[{'id': 4, 'title': "Lösung"}])
+    assert [record['id'] for record in load_journaled(filename)[0]] == [2, 3, 4]
@@ -0,0 +1,67 @@
+"""
+Tests for problem import and export
+"""
+
+import pytest
+import json
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+import codetrack
+from modules.importer import detect_format, read_rows
+from modules.problem_manager import ProblemManager
+
+
+def run(data_dir, *args):
+    return codetrack.main(['--data-dir', str(data_dir), *args])
+
+
+def test_detect_format():
+    assert detect_format("leetcode.csv") == 'csv'
+    assert detect_format("export.JSONL") == 'jsonl'
+    assert detect_format("export.ndjson") == 'jsonl'
+    assert detect_format("problems.json") == 'json'
+    with pytest.raises(ValueError):
+        detect_format("problems.txt")
+
+
+def test_import_csv_with_byte_order_mark(tmp_path):
+    export = tmp_path / 'export.csv'
+    export.write_bytes("title,difficulty,tags\nTwo Sum,easy,Array;Hash Table\n两数之和,medium,数组\n"
+                       .encode('utf-8-sig'))
+    
+    assert run(tmp_path / 'data', 'problems', 'import', str(export)) == 0
+    
+    problems = ProblemManager(str(tmp_path / 'data' / 'problems.json')).problems
+    assert [(p.title, p.difficulty, p.topics) for p in problems] == [
+        ("Two Sum", "Easy", ["Array", "Hash Table"]),
+        ("两数之和", "Medium", ["数组"]),
+    ]
+
+
+def test_json_export_imports_again(tmp_path):
+    run(tmp_path / 'a', 'problems', 'add', "Two Sum", '--difficulty', 'Easy', '--topics', 'Array')
+    run(tmp_path / 'a', 'problems', 'add', "Número de Islas", '--topics', 'Graph')
+    export = tmp_path / 'problems.json'
+    assert run(tmp_path / 'a', 'problems', 'export', str(export)) == 0
+    assert [p['title'] for p in json.loads(export.read_text(encoding='utf-8'))] == [
+        "Two Sum", "Número de Islas"]
+    
+    assert run(tmp_path / 'b', 'problems', 'import', str(export)) == 0
+    problems = ProblemManager(str(tmp_path / 'b' / 'problems.json')).problems
+    assert [p.to_dict() for p in problems] == [
+        dict(p, date_added=problems[i].date_added, date_modified=problems[i].date_modified)
+        for i, p in enumerate(json.loads(export.read_text(encoding='utf-8')))]
+
+
+def test_json_rows_must_be_an_array(tmp_path):
+    export = tmp_path / 'export.json'
+    export.write_text('{"title": "Two Sum"}\n{"title": "3Sum"}\n')
+    
+    with open(export, encoding='utf-8') as file:
+        with pytest.raises(ValueError):
+            list(read_rows(file, 'json'))
+    assert run(tmp_path / 'data', 'problems', 'import', str(export)) == 1
@@ -0,0 +1,214 @@
+"""
+Tests for ProblemManager
+"""
+
+import time
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.problem_manager import Problem, ProblemManager
+
+
+def test_problem_without_platform(tmp_path):
+    problem = Problem.from_dict({'id': 1, 'title': "Two Sum", 'difficulty': "Easy",
+                                 'platform': None})
+    assert problem.platform is None
+    assert Problem(2, "3Sum", "Medium", platform=None).to_dict()['platform'] is None
+    
+    # Through the JSON journal and the binary snapshot
+    pm = ProblemManager(str(tmp_path / 'problems.json'), snapshot=True)
+    pm.add_problems([{'title': "Two Sum", 'difficulty': "Easy", 'platform': None}])
+    pm.save_problems()
+    pm = ProblemManager(str(tmp_path / 'problems.json'), snapshot=True)
+    assert pm.get_problem(1).platform is None
+
+
+def count_sequence_writes(pm):
+    writes = []
+    write_sequence = pm.storage.write_sequence
+    pm.storage.write_sequence = lambda next_id: (writes.append(next_id), write_sequence(next_id))
+    return writes
+
+
+def test_batch_reserves_ids_in_blocks(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    writes = count_sequence_writes(pm)
+    
+    with pm.batch():
+        ids = [pm.add_problem(f"Problem {i}", "Easy").id for i in range(300)]
+    
+    assert ids == list(range(1, 301))
+    assert len(writes) <= 3
+    # The unused rest of the last block is given back
+    assert pm.storage.read_sequence() == 301
+    assert pm.add_problem("Problem 300", "Easy").id == 301
+
+
+def test_batches_of_two_managers_never_share_ids(tmp_path):
+    first = ProblemManager(str(tmp_path / 'problems.json'))
+    second = ProblemManager(str(tmp_path / 'problems.json'))
+    
+    with first.batch():
+        first.add_problem("First 1", "Easy")
+        second.add_problem("Second 1", "Easy")
+        with second.batch():
+            second.add_problem("Second 2", "Easy")
+        first.add_problem("First 2", "Easy")
+    
+    ids = [p.id for p in first.problems]
+    assert len(ids) == len(set(ids)) == 4
+    third = ProblemManager(str(tmp_path / 'problems.json'))
+    assert third.add_problem("Third", "Easy").id not in ids
+
+
+def test_add_problems_when_an_entry_fills_in_a_url(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy")
+    
+    # The first entry gives problem 1 its URL, so the second no longer
+    # matches it and becomes a problem the up-front count did not expect
+    problems = pm.add_problems([
+        {'title': "Two Sum", 'difficulty': "Easy", 'url': "https://a.com/two-sum"},
+        {'title': "Two Sum", 'difficulty': "Easy", 'url': "https://b.com/two-sum"},
+    ])
+    assert [p.id for p in problems] == [1, 2]
+    assert pm.add_problem("3Sum", "Medium").id == 3
+    
+    assert [p.id for p in pm.problems] == [1, 2, 3]
+    assert sorted(pm._by_id) == [1, 2, 3]
+    reloaded = ProblemManager(str(tmp_path / 'problems.json'))
+    assert [(p.id, p.url) for p in reloaded.problems] == [
+        (1, "https://a.com/two-sum"), (2, "https://b.com/two-sum"), (3, "")]
+
+
+def test_add_problems_reuses_no_ids(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy")
+    pm.delete_problem(1)
+    
+    problems = pm.add_problems([{'title': f"Problem {i % 3}", 'difficulty': "Easy"}
+                                for i in range(10)])
+    assert [p.id for p in problems] == [2, 3, 4] * 3 + [2]
+    assert pm.add_problem("Jump Game", "Medium").id == 5
+
+
+def count_writes(pm):
+    writes = []
+    write_changes = pm.storage.write_changes
+    
+    def record(puts=(), deletes=()):
+        writes.append((sorted(p['id'] for p in puts), sorted(deletes)))
+        return write_changes(puts=puts, deletes=deletes)
+    
+    pm.storage.write_changes = record
+    return writes
+
+
+def test_batch_writes_the_dirty_set_once(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    for title in ("Two Sum", "3Sum", "Word Ladder"):
+        pm.add_problem(title, "Medium")
+    writes = count_writes(pm)
+    
+    with pm.batch():
+        pm.edit_problem(1, status="Solved")
+        pm.edit_problem(1, difficulty="Easy")
+        pm.edit_problem(2, status="In Progress")
+        pm.delete_problem(2)
+        pm.add_problem("Jump Game", "Medium")
+        assert writes == [] and pm.has_pending_changes()
+    
+    # One append: each problem once, a deleted one only as a delete
+    assert writes == [([1, 4], [2])]
+    assert not pm.has_pending_changes()
+    
+    reloaded = ProblemManager(str(tmp_path / 'problems.json'))
+    assert [(p.id, p.difficulty, p.status) for p in reloaded.problems] == [
+        (1, "Easy", "Solved"), (3, "Medium", "Not Started"), (4, "Medium", "Not Started")]
+
+
+def test_write_behind_coalesces_edits(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'), write_behind=0.05)
+    writes = count_writes(pm)
+    pm.add_problem("Two Sum", "Easy")
+    pm.edit_problem(1, status="In Progress")
+    pm.edit_problem(1, status="Solved")
+    assert writes == []
+    
+    deadline = time.monotonic() + 5
+    while not writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writes == [([1], [])]
+    assert ProblemManager(str(tmp_path / 'problems.json')).get_problem(1).status == "Solved"
+    
+    # close() writes what is still waiting and stops the timer
+    pm.write_behind = 60
+    pm.edit_problem(1, status="Reviewed")
+    pm.close()
+    assert writes == [([1], []), ([1], [])]
+    assert pm._flush_timer is None
+    assert ProblemManager(str(tmp_path / 'problems.json')).get_problem(1).status == "Reviewed"
+
+
+def test_filters_combine_with_and_and_topics_with_any_or_all(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy", ["Array", "Hash Table"])
+    pm.add_problem("Course Schedule", "Medium", ["Graph", "Topological Sort"])
+    pm.add_problem("Clone Graph", "Medium", ["Graph", "Hash Table"])
+    pm.add_problem("Word Ladder", "Hard", ["Graph", "BFS"])
+    pm.edit_problem(3, status="Solved")
+    
+    def ids(**criteria):
+        return [p.id for p in pm.filter_problems(**criteria)]
+    
+    assert ids() == [1, 2, 3, 4]
+    assert ids(difficulty="Medium") == [2, 3]
+    assert ids(difficulty="Medium", status="Solved") == [3]
+    assert ids(difficulty="Easy", status="Solved") == []
+    assert ids(topics=["Hash Table", "BFS"]) == [1, 3, 4]
+    assert ids(topics=["Graph", "Hash Table"], match='all') == [3]
+    assert ids(topics=["Graph", "Unknown"], match='all') == []
+    assert ids(difficulty="Medium", topics=["Hash Table", "Topological Sort"]) == [2, 3]
+    
+    # The indexes follow edits and deletes
+    pm.edit_problem(2, difficulty="Hard", topics=["Graph", "Hash Table"])
+    pm.delete_problem(3)
+    assert ids(difficulty="Medium") == []
+    assert ids(topics=["Graph", "Hash Table"], match='all') == [2]
+    assert ids(status="Solved") == []
+
+
+def test_urls_that_differ_in_the_query_are_different_problems(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    a_plus_b = pm.add_problem("A+B Problem", "Easy", ["Math"], "Timus",
+                              "https://acm.timus.ru/problem.aspx?space=1&num=1000")
+    sum_problem = pm.add_problem("Sum", "Medium", ["Math"], "Timus",
+                                 "https://acm.timus.ru/problem.aspx?space=1&num=1001")
+    assert (a_plus_b.id, sum_problem.id) == (1, 2)
+    assert pm.get_problem(1).difficulty == "Easy"
+    
+    # Parameter order, fragments and tracking parameters do not matter
+    same = pm.add_problem("A+B", "Hard", ["Implementation"], "Timus",
+                          "http://www.acm.timus.ru/problem.aspx?num=1000&space=1&utm_source=x#top")
+    assert same.id == 1 and len(pm.problems) == 2
+    assert (same.difficulty, same.topics) == ("Easy", ["Math", "Implementation"])
+
+
+def test_duplicate_adds_keep_the_existing_difficulty_unless_asked(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    
+    # A title-only match fills gaps but does not overwrite
+    merged = pm.add_problem("two-sum", "Hard", ["Hash Table"], "LeetCode",
+                            "https://leetcode.com/problems/two-sum/")
+    assert merged.id == 1
+    assert (merged.difficulty, merged.topics, merged.platform) == (
+        "Easy", ["Array", "Hash Table"], "LeetCode")
+    
+    [merged] = pm.add_problems([{'title': "Two Sum", 'difficulty': "Medium"}])
+    assert merged.difficulty == "Easy"
+    assert pm.add_problem("Two Sum", "Medium", overwrite=True).difficulty == "Medium"
+    assert len(pm.problems) == 1
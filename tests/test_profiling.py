@@ -0,0 +1,128 @@
+"""
+Tests for the opt-in profiling instrumentation
+"""
+
+import pstats
+import json
+import time
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules import problem_manager
+from modules.problem_manager import ProblemManager, Problem
+from utils import data_handler, profiling
+from utils.profiling import Profiler
+
+
+def test_enable_times_the_hot_paths_and_disable_restores_them(tmp_path, capsys):
+    add_problem = ProblemManager.add_problem
+    from_dict = Problem.__dict__['from_dict']
+    replay = problem_manager.replay_journal_stream
+    filename = str(tmp_path / 'problems.json')
+    data_handler.write_json(filename, [{'id': 1, 'title': "Two Sum", 'difficulty': "Easy"}])
+    size = os.path.getsize(filename)
+    
+    profiler = profiling.enable()
+    try:
+        assert profiling.enable() is profiler
+        assert ProblemManager.add_problem.__wrapped__ is add_problem
+        
+        pm = ProblemManager(filename)
+        pm.add_problem("3Sum", "Medium")
+        pm.add_problem("4Sum", "Medium")
+        pm.save_problems()
+        
+        counters = {name: counter.to_dict() for name, counter in profiler.counters.items()}
+        assert counters['ProblemManager.add_problem']['calls'] == 2
+        assert counters['ProblemManager.load_problems']['records'] == 1
+        assert counters['io.iter_json_array']['records'] == 1
+        assert counters['io.iter_json_array']['bytes'] == size
+        assert counters['JSONStore.write_all']['records'] == 3
+        for counter in counters.values():
+            assert 0 <= counter['own'] <= counter['total'] + 1e-9
+        
+        profiling.report("test")
+        err = capsys.readouterr().err
+        assert "Profile: test" in err and "ProblemManager.add_problem" in err
+        assert profiler.counters == {}
+    finally:
+        profiling.disable()
+    
+    assert profiling.profiler is None
+    assert ProblemManager.add_problem is add_problem
+    assert Problem.__dict__['from_dict'] is from_dict
+    assert problem_manager.replay_journal_stream is replay
+    assert not hasattr(data_handler.read_json, '__wrapped__')
+
+
+def test_own_time_excludes_wrapped_calls_and_generators_count_items():
+    profiler = Profiler()
+    
+    def inner():
+        time.sleep(0.02)
+    inner = profiler.wrap('inner', inner)
+    
+    def outer():
+        inner()
+        return [1, 2, 3]
+    outer = profiler.wrap('outer', outer)
+    
+    def produce(n):
+        for i in range(n):
+            inner()
+            yield i
+    produce = profiler.wrap('produce', produce)
+    
+    assert outer() == [1, 2, 3]
+    assert list(produce(2)) == [0, 1]
+    
+    counters = profiler.counters
+    assert counters['inner'].calls == 3
+    assert counters['outer'].records == 3
+    assert counters['outer'].own < counters['outer'].total - 0.015
+    assert (counters['produce'].calls, counters['produce'].records) == (1, 2)
+    assert counters['produce'].own < counters['produce'].total - 0.03
+    
+    # A generator left unfinished is still recorded once it is closed
+    items = produce(5)
+    next(items)
+    items.close()
+    assert (counters['produce'].calls, counters['produce'].records) == (2, 3)
+
+
+def test_output_is_a_chrome_trace_or_cprofile_stats(tmp_path, capsys):
+    trace_file = str(tmp_path / 'trace.json')
+    profiler = Profiler(trace_file)
+    profiler.wrap('io.work', lambda: b'data')()
+    assert profiler.write_output()
+    
+    with open(trace_file) as file:
+        trace = json.load(file)
+    [event] = trace['traceEvents']
+    assert (event['name'], event['cat'], event['ph']) == ('io.work', 'io', 'X')
+    assert event['dur'] >= 0 and event['args'] == {'bytes': 0, 'records': 0}
+    
+    stats_file = str(tmp_path / 'profile.prof')
+    profiler = Profiler(stats_file)
+    profiler.install()
+    try:
+        sorted(range(1000))
+    finally:
+        profiler.uninstall()
+    assert profiler.write_output()
+    assert pstats.Stats(stats_file).total_calls > 0
+    assert not Profiler().write_output()
+
+
+def test_enable_from_the_environment(monkeypatch):
+    try:
+        monkeypatch.setenv(profiling.ENV_VAR, '0')
+        assert profiling.enable_from() is None
+        monkeypatch.setenv(profiling.ENV_VAR, '1')
+        monkeypatch.setenv(profiling.OUTPUT_ENV_VAR, 'trace.json')
+        assert profiling.enable_from().output == 'trace.json'
+    finally:
+        profiling.disable()
@@ -0,0 +1,102 @@
+"""
+Tests for search tokenization and problem search
+"""
+
+import json
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.problem_manager import ProblemManager
+from utils.search_index import SearchIndex, SubstringIndex, tokenize
+
+
+def test_tokenize_keeps_non_ascii_words():
+    assert tokenize("Two Sum II") == ['two', 'sum', 'ii']
+    assert tokenize("Número de Islas") == ['número', 'de', 'islas']
+    assert tokenize("两数之和") == ['两数之和']
+    assert tokenize("snake_case, kebab-case") == ['snake', 'case', 'kebab', 'case']
+    assert tokenize("") == []
+
+
+def test_search_ranks_exact_before_prefix_matches():
+    index = SearchIndex()
+    index.add(1, [("binary search", 1)])
+    index.add(2, [("binary searching", 1)])
+    index.add(3, [("linear scan", 1)])
+    
+    assert index.search("binary search") == [1, 2]
+    assert index.search("Binary SEAR") == [1, 2]
+    assert index.search("tree") == []
+
+
+def test_saved_index_from_an_older_tokenizer_is_rebuilt(tmp_path):
+    index_file = tmp_path / 'problems.json.search'
+    index_file.write_text(json.dumps({'docs': {'1': ['v1', {'n': 1, 'mero': 1}]}}))
+    
+    index = SearchIndex(str(index_file))
+    assert not index.load()
+    assert index.docs == {}
+
+
+def test_search_problems_finds_titles_in_any_script(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    pm.add_problem("3Sum", "Medium", ["Array"])
+    pm.add_problem("两数之和", "Easy")
+    pm.add_problem("Número de Islas", "Medium", ["Graph"])
+    
+    assert [p.title for p in pm.search_problems("两数之和")] == ["两数之和"]
+    assert [p.title for p in pm.search_problems("之和")] == ["两数之和"]
+    assert [p.title for p in pm.search_problems("número")] == ["Número de Islas"]
+    assert [p.title for p in pm.search_problems("NÚMERO")] == ["Número de Islas"]
+    
+    # Word matches rank first, then titles that only contain the query
+    assert [p.title for p in pm.search_problems("sum")] == ["Two Sum", "3Sum"]
+    assert [p.title for p in pm.search_problems("sum", limit=1)] == ["Two Sum"]
+    
+    # The persisted index is reused after a restart
+    pm.close()
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    assert [p.title for p in pm.search_problems("islas")] == ["Número de Islas"]
+
+
+def test_substring_index_matches_a_plain_scan():
+    titles = {1: "3Sum", 2: "Two Sum II", 3: "两数之和", 4: "Straße", 5: "Summary Ranges",
+              6: "Sum of Two Integers", 7: "a"}
+    index = SubstringIndex()
+    for doc_id, title in titles.items():
+        index.add(doc_id, title)
+    index.remove(7)
+    index.add(6, "Sum of Integers")
+    titles[6] = "Sum of Integers"
+    del titles[7]
+    
+    for query in ("s", "su", "sum", "sum ", "wo sum", "um o", "数之", "STRASSE", "sumx", "a", ""):
+        expected = {doc_id for doc_id, title in titles.items()
+                    if query and query.casefold() in title.casefold()}
+        assert index.search(query) == expected, query
+
+
+class NoScan(list):
+    """A problem list that fails the test if anything iterates over it"""
+    
+    def __iter__(self):
+        raise AssertionError("search scanned every problem")
+
+
+def test_substring_search_does_not_scan_the_problems(tmp_path):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    pm.add_problem("3Sum", "Medium", ["Array"])
+    assert [p.title for p in pm.search_problems("sum")] == ["Two Sum", "3Sum"]
+    
+    pm.problems = NoScan(pm.problems)
+    pm.add_problem("4Sum", "Medium", ["Array"])
+    pm.edit_problem(2, title="3Sum Closest")
+    assert [p.title for p in pm.search_problems("sum")] == ["Two Sum", "3Sum Closest", "4Sum"]
+    assert [p.title for p in pm.search_problems("m clo")] == ["3Sum Closest"]
+    pm.delete_problem(1)
+    assert [p.title for p in pm.search_problems("sum")] == ["3Sum Closest", "4Sum"]
@@ -0,0 +1,215 @@
+"""
+Tests for the API server and client
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+import http.client
+import threading
+import asyncio
+import json
+import time
+import sys
+import os
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from main import AppData
+from server import API, Server, Client, APIError
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """
+    Records every request and answers {'count': N}
+    
+    /closing closes the connection after answering, as an idle timeout
+    would. /drop, and the first GET of /flaky, close it without answering.
+    """
+    
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    
+    def do_GET(self):
+        self.answer()
+    
+    def do_POST(self):
+        self.answer()
+    
+    def answer(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.requests.append((self.command, self.path))
+        if self.path == '/drop' or self.requests.count(('GET', '/flaky')) == 1:
+            self.close_connection = True
+            return
+        
+        payload = json.dumps({'count': len(self.requests)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.close_connection = self.path == '/closing'
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def recording_server():
+    """Client of a RecordingHandler server running in a thread"""
+    RecordingHandler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    
+    client = Client('127.0.0.1', httpd.server_address[1])
+    try:
+        yield client
+    finally:
+        client.close()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@contextmanager
+def api_server(data):
+    """Port of a Server over data, running on an event loop in a thread"""
+    server = Server(API(data), refresh_interval=0)
+    started = threading.Event()
+    state = {}
+    
+    async def serve():
+        state['loop'] = asyncio.get_running_loop()
+        state['stop'] = asyncio.Event()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        state['port'] = listener.sockets[0].getsockname()[1]
+        started.set()
+        async with listener:
+            await state['stop'].wait()
+    
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait(10)
+    try:
+        yield state['port']
+    finally:
+        state['loop'].call_soon_threadsafe(state['stop'].set)
+        thread.join()
+        server.close()
+
+
+def call(port, method, path, payload=None, headers=None):
+    """(status, ETag, decoded body) of one request on a new connection"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        body = json.dumps(payload) if payload is not None else None
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        content = response.read()
+        return response.status, response.getheader('ETag'), json.loads(content) if content else None
+    finally:
+        connection.close()
+
+
+def test_closed_connection_is_replaced_before_sending():
+    with recording_server() as client:
+        assert client.post('/closing', {'problem_id': 1}) == {'count': 1}
+        time.sleep(0.2)  # Let the server close its end
+        assert client.post('/closing', {'solved': True}) == {'count': 2}
+        
+        # Replaced before sending once it has been idle too long
+        client.idle_timeout = 0
+        assert client.post('/session/note', {'text': "idle"}) == {'count': 3}
+    
+    # Each request reached the server exactly once
+    assert RecordingHandler.requests == [
+        ('POST', '/closing'), ('POST', '/closing'), ('POST', '/session/note')]
+
+
+def test_post_is_not_resent_once_it_reached_the_server():
+    with recording_server() as client:
+        assert client.post('/session/start', {'problem_id': 1}) == {'count': 1}
+        
+        # Sent on the reused connection, then dropped without an answer
+        with pytest.raises(ConnectionError):
+            client.post('/drop', {'solved': True})
+        
+        # A GET is safe to send again
+        assert client.get('/flaky') == {'count': 4}
+    
+    assert RecordingHandler.requests == [
+        ('POST', '/session/start'), ('POST', '/drop'), ('GET', '/flaky'), ('GET', '/flaky')]
+
+
+def test_problem_routes_and_etags(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    data = AppData('eager')
+    try:
+        with api_server(data) as port:
+            status, _, problem = call(port, 'POST', '/problems',
+                                      {'title': "Two Sum", 'difficulty': "Easy", 'topics': ["Array"]})
+            assert (status, problem['id']) == (201, 1)
+            
+            # A duplicate merges into the existing problem
+            status, _, problem = call(port, 'POST', '/problems',
+                                      {'title': "two sum", 'topics': ["Hash Table"]})
+            assert (status, problem['id'], problem['topics']) == (200, 1, ["Array", "Hash Table"])
+            assert call(port, 'POST', '/problems', {'difficulty': "Easy"})[0] == 400
+            
+            status, etag, problems = call(port, 'GET', '/problems')
+            assert (status, [p['title'] for p in problems]) == (200, ["Two Sum"])
+            assert call(port, 'GET', '/problems', headers={'If-None-Match': etag}) == (304, etag, None)
+            
+            # A write changes the ETag
+            status, _, problem = call(port, 'PATCH', '/problems/1', {'difficulty': "Medium"})
+            assert (status, problem['difficulty']) == (200, "Medium")
+            status, new_etag, problems = call(port, 'GET', '/problems',
+                                              headers={'If-None-Match': etag})
+            assert status == 200 and new_etag != etag
+            assert problems[0]['difficulty'] == "Medium"
+            
+            assert call(port, 'PATCH', '/problems/1', {'id': 5})[0] == 400
+            assert call(port, 'PATCH', '/problems/1', {'status': "Done"})[0] == 400
+            assert call(port, 'DELETE', '/problems/1')[2] == {'deleted': 1}
+            assert call(port, 'GET', '/problems/1')[0] == 404
+            assert call(port, 'PUT', '/problems')[0] == 405
+            assert call(port, 'GET', '/nowhere')[0] == 404
+    finally:
+        data.close()
+
+
+def test_session_routes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    data = AppData('eager')
+    try:
+        with api_server(data) as port:
+            client = Client('127.0.0.1', port)
+            try:
+                client.post('/problems', {'title': "Two Sum", 'difficulty': "Easy"})
+                with pytest.raises(APIError) as error:
+                    client.post('/session/stop', {'solved': True})
+                assert error.value.status == 409
+                
+                active = client.post('/session/start', {'problem_id': 1})
+                assert (active['problem_id'], active['paused']) == (1, False)
+                assert client.get('/problems/1')['status'] == "In Progress"
+                with pytest.raises(APIError) as error:
+                    client.post('/session/start', {'problem_id': 1})
+                assert error.value.status == 409
+                
+                assert client.post('/session/hint')['hints_used'] == 1
+                session = client.post('/session/stop', {'solved': True})
+                assert (session['solved'], session['hints_used']) == (True, 1)
+                assert client.get('/session') is None
+                assert client.get('/problems/1')['status'] == "Solved"
+                assert [s['id'] for s in client.get('/sessions')] == [session['id']]
+                assert client.get('/stats')['total_sessions'] == 1
+            finally:
+                client.close()
+    finally:
+        data.close()
@@ -0,0 +1,150 @@
+"""
+Tests for SessionTracker
+"""
+
+import json
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.problem_manager import ProblemManager
+from modules.session_tracker import SessionTracker
+from utils.data_handler import write_json, journal_filename
+from utils import snapshot as snapshot_module
+
+
+def complete(tracker, problem_id, solved=True):
+    session = tracker.start_session(problem_id)
+    tracker.complete_session(solved=solved)
+    return session.id
+
+
+def test_iter_sessions_does_not_hide_other_writers(tmp_path):
+    data_file = str(tmp_path / 'sessions.json')
+    first = SessionTracker(data_file)
+    second = SessionTracker(data_file)
+    
+    complete(first, 1)
+    complete(second, 2)
+    
+    # Streaming storage must not mark the other tracker's session as merged
+    assert len(list(first.iter_sessions())) == 2
+    complete(first, 3)
+    first.save_sessions()
+    
+    with open(data_file) as file:
+        assert [s['problem_id'] for s in json.load(file)] == [1, 2, 3]
+    assert [s.problem_id for s in first.sessions] == [1, 2, 3]
+
+
+def test_batch_reserves_session_ids_in_blocks(tmp_path):
+    tracker = SessionTracker(str(tmp_path / 'sessions.json'))
+    writes = []
+    write_sequence = tracker.storage.write_sequence
+    tracker.storage.write_sequence = lambda next_id: (writes.append(next_id),
+                                                      write_sequence(next_id))
+    
+    with tracker.batch():
+        ids = [complete(tracker, problem_id) for problem_id in range(300)]
+    
+    assert ids == list(range(1, 301))
+    assert len(writes) <= 3
+    assert tracker.storage.read_sequence() == 301
+    assert SessionTracker(str(tmp_path / 'sessions.json')).start_session(1).id == 301
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    data_file = str(tmp_path / 'sessions.json')
+    tracker = SessionTracker(data_file)
+    tracker.start_session(1)
+    tracker.add_note("两数之和: hash map")
+    tracker.complete_session(solved=True)
+    complete(tracker, 2, solved=False)
+    
+    # Completed sessions are only appended to the journal, and the process
+    # dies in the middle of the next append
+    assert not os.path.exists(data_file)
+    with open(journal_filename(data_file), 'ab') as file:
+        file.write(b'{"op":"put","data":{"id":3,"problem_id"')
+    
+    reloaded = SessionTracker(data_file)
+    assert [(s.id, s.solved) for s in reloaded.sessions] == [(1, True), (2, False)]
+    assert reloaded.sessions[0].notes[0]['text'] == "两数之和: hash map"
+    
+    assert complete(reloaded, 3) == 3
+    assert [s.id for s in SessionTracker(data_file).sessions] == [1, 2, 3]
+
+
+def test_compaction_interrupted_before_the_journal_is_removed(tmp_path):
+    data_file = str(tmp_path / 'sessions.json')
+    tracker = SessionTracker(data_file, compact_threshold=3)
+    complete(tracker, 1)
+    complete(tracker, 2)
+    assert not os.path.exists(data_file)
+    
+    # The third entry reaches the threshold and rewrites the snapshot
+    complete(tracker, 3)
+    assert os.path.exists(data_file)
+    assert not os.path.exists(journal_filename(data_file))
+    
+    # A crash after writing the next snapshot leaves its entries in the journal too
+    complete(tracker, 4)
+    write_json(data_file, [s.to_dict() for s in tracker.sessions])
+    
+    reloaded = SessionTracker(data_file, compact_threshold=3)
+    assert [s.id for s in reloaded.sessions] == [1, 2, 3, 4]
+    assert complete(reloaded, 5) == 5
+
+
+def refuse_replacing_mapped_files(monkeypatch):
+    """Make os.replace fail over an open Snapshot as it does on Windows; returns the snapshots"""
+    opened = []
+    snapshot_init = snapshot_module.Snapshot.__init__
+    replace = os.replace
+    
+    def init(self, filename):
+        snapshot_init(self, filename)
+        opened.append((os.path.abspath(filename), self))
+    
+    def windows_replace(src, dst):
+        if any(name == os.path.abspath(dst) and not snap.closed for name, snap in opened):
+            raise PermissionError(f"{dst} is mapped by another section")
+        replace(src, dst)
+    
+    monkeypatch.setattr(snapshot_module.Snapshot, '__init__', init)
+    monkeypatch.setattr(snapshot_module.os, 'replace', windows_replace)
+    return opened
+
+
+def test_snapshots_are_unmapped_before_they_are_rebuilt(tmp_path, monkeypatch, capsys):
+    pm = ProblemManager(str(tmp_path / 'problems.json'))
+    tracker = SessionTracker(str(tmp_path / 'sessions.json'))
+    for problem_id in (1, 2):
+        pm.add_problem(f"Problem {problem_id}", "Easy")
+        complete(tracker, problem_id)
+    pm.save_problems()
+    tracker.save_sessions()
+    opened = refuse_replacing_mapped_files(monkeypatch)
+    
+    # Problems are decoded up front and leave nothing mapped
+    pm = ProblemManager(str(tmp_path / 'problems.json'), snapshot=True)
+    assert opened and all(snap.closed for _, snap in opened)
+    pm.add_problem("Problem 3", "Easy")
+    pm.save_problems()
+    assert [p.title for p in ProblemManager(str(tmp_path / 'problems.json'), snapshot=True).problems] == [
+        "Problem 1", "Problem 2", "Problem 3"]
+    
+    # Compaction rebuilds the snapshot the session table is still mapping
+    tracker = SessionTracker(str(tmp_path / 'sessions.json'), snapshot=True)
+    assert tracker.sessions.snapshot is not None
+    for problem_id in (1, 2, 3):
+        complete(tracker, problem_id)
+    tracker.save_sessions()
+    assert tracker.sessions.snapshot is not None and tracker.sessions.snapshot_rows == 5
+    assert [s.id for s in tracker.sessions] == [1, 2, 3, 4, 5]
+    assert "Warning" not in capsys.readouterr().out
+    
+    tracker.close()
+    assert all(snap.closed for _, snap in opened)
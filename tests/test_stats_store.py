@@ -0,0 +1,173 @@
+"""
+Tests for the materialized analytics view
+"""
+
+from datetime import date, datetime, timedelta
+import random
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.problem_manager import ProblemManager
+from modules.session_tracker import SessionTracker, SessionTable
+from modules import stats_store
+from modules.stats_store import StatsStore, summarize_table, merge_summaries
+from utils.data_handler import read_json
+
+TODAY = date.today()
+
+
+def open_managers(data_dir):
+    return (ProblemManager(str(data_dir / 'problems.json')),
+            SessionTracker(str(data_dir / 'sessions.json')))
+
+
+def practice(st, problem_id, solved):
+    st.start_session(problem_id)
+    st.add_hint()
+    st.complete_session(solved=solved)
+
+
+def view(stats):
+    """Everything a report reads from the store"""
+    return (stats.to_dict(TODAY), stats.solved_by_problem, stats.problem_difficulty)
+
+
+def test_incremental_updates_equal_a_full_recompute(tmp_path):
+    pm, st = open_managers(tmp_path)
+    pm.add_problem("Two Sum", "Easy", ["Array", "Hash Table"])
+    pm.add_problem("Course Schedule", "Medium", ["Graph"])
+    practice(st, 1, True)
+    
+    stats = StatsStore(pm, st, stats_file=str(tmp_path / 'user_stats.json'))
+    pm.add_problem("Word Ladder", "Hard", ["Graph", "BFS"])
+    practice(st, 3, False)
+    practice(st, 2, True)
+    pm.edit_problem(2, status="Solved", difficulty="Hard", topics=["Graph", "Topological Sort"])
+    pm.edit_problem(1, topics=["Array"])
+    practice(st, 3, True)
+    pm.delete_problem(3)
+    
+    assert view(stats) == view(StatsStore(pm, st, stats_file=str(tmp_path / 'other.json')))
+
+
+def test_saved_view_is_loaded_while_the_data_is_unchanged(tmp_path, monkeypatch):
+    pm, st = open_managers(tmp_path)
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    pm.add_problem("3Sum", "Medium", ["Array", "Two Pointers"])
+    practice(st, 1, True)
+    practice(st, 2, False)
+    stats_file = str(tmp_path / 'user_stats.json')
+    expected = view(StatsStore(pm, st, stats_file=stats_file))
+    StatsStore(pm, st, stats_file=stats_file).save(TODAY)
+    
+    def scan(*args):
+        raise AssertionError("the saved view should have been used")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(StatsStore, 'problem_indexed', scan)
+        patch.setattr(StatsStore, 'sessions_loaded', scan)
+        pm, st = open_managers(tmp_path)
+        stats = StatsStore(pm, st, stats_file=stats_file)
+    assert view(stats) == expected
+    
+    # The loaded view keeps following changes
+    pm.add_problem("4Sum", "Medium", ["Array"])
+    practice(st, 3, True)
+    assert view(stats) == view(StatsStore(pm, st, stats_file=str(tmp_path / 'other.json')))
+
+
+def test_stale_view_is_recomputed(tmp_path):
+    pm, st = open_managers(tmp_path)
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    practice(st, 1, True)
+    stats_file = str(tmp_path / 'user_stats.json')
+    StatsStore(pm, st, stats_file=stats_file).save(TODAY)
+    
+    # Another process writes after the view was saved
+    other_pm, other_st = open_managers(tmp_path)
+    other_pm.add_problem("3Sum", "Medium", ["Array"])
+    practice(other_st, 2, True)
+    
+    pm, st = open_managers(tmp_path)
+    stats = StatsStore(pm, st, stats_file=stats_file)
+    assert stats.problem_count == 2
+    assert stats.total_sessions == 2
+    assert view(stats) == view(StatsStore(pm, st, stats_file=str(tmp_path / 'other.json')))
+    
+    # A view saved with unwritten changes is never trusted
+    with pm.batch():
+        pm.add_problem("4Sum", "Medium", ["Array"])
+        stats.save(TODAY)
+    assert 'view' not in read_json(stats_file)
+
+
+def make_table(rows, seed=3):
+    """Sessions over a few months, some without a start time, problems repeating out of order"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    records = []
+    for session_id in range(1, rows + 1):
+        started = start + timedelta(minutes=rng.randrange(0, 90 * 24 * 60))
+        records.append({'id': session_id, 'problem_id': rng.randrange(1, 40),
+                        'start_time': None if rng.random() < 0.05 else started.isoformat(),
+                        'end_time': None, 'duration_seconds': rng.randrange(60, 5400),
+                        'solved': rng.random() < 0.5, 'hints_used': rng.randrange(0, 4)})
+    return SessionTable.from_records(records)
+
+
+def as_lists(summary):
+    """A summary with its dicts as item lists, so key order is compared too"""
+    return {key: list(value.items()) if isinstance(value, dict) else value
+            for key, value in summary.items()}
+
+
+def test_parallel_summary_is_identical_to_the_serial_one(monkeypatch):
+    table = make_table(1000)
+    serial = summarize_table(table)
+    assert serial['sessions'] == 1000
+    
+    # Below the threshold the table is scanned in this process
+    assert as_lists(summarize_table(table, workers=3)) == as_lists(serial)
+    
+    pools = []
+    
+    class CountingPool(stats_store.ProcessPoolExecutor):
+        def __init__(self, workers):
+            pools.append(workers)
+            super().__init__(workers)
+    
+    monkeypatch.setattr(stats_store, 'ProcessPoolExecutor', CountingPool)
+    monkeypatch.setattr(stats_store, 'PARALLEL_MIN_ROWS', 100)
+    for workers in (2, 3, 7):
+        assert as_lists(summarize_table(table, workers)) == as_lists(serial)
+    assert pools == [2, 3, 7]
+
+
+def test_merged_shards_keep_the_order_of_first_appearance():
+    table = make_table(300, seed=11)
+    columns = [getattr(table, name) for name in stats_store.SUMMARY_COLUMNS]
+    shards = [stats_store.summarize_sessions(*(stats_store._shard(column, start, start + 70)
+                                               for column in columns))
+              for start in range(0, 300, 70)]
+    assert as_lists(merge_summaries(shards)) == as_lists(summarize_table(table))
+    assert merge_summaries([])['latest'] is None
+
+
+def test_stats_store_with_workers_matches_the_serial_view(tmp_path, monkeypatch):
+    pm, st = open_managers(tmp_path)
+    for problem_id in range(1, 6):
+        pm.add_problem(f"Problem {problem_id}", ("Easy", "Medium", "Hard")[problem_id % 3])
+    with st.batch():
+        for number in range(150):
+            practice(st, number % 5 + 1, number % 3 == 0)
+    st.close()
+    
+    st = SessionTracker(str(tmp_path / 'sessions.json'), columnar=True)
+    monkeypatch.setattr(stats_store, 'PARALLEL_MIN_ROWS', 50)
+    parallel = StatsStore(pm, st, stats_file=str(tmp_path / 'parallel.json'), workers=2)
+    serial = StatsStore(pm, st, stats_file=str(tmp_path / 'serial.json'))
+    assert view(parallel) == view(serial)
+    assert parallel.total_sessions == 150
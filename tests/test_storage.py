@@ -0,0 +1,152 @@
+"""
+Tests for the storage backends
+"""
+
+from datetime import date
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.problem_manager import ProblemManager
+from modules.session_tracker import SessionTracker
+from modules.stats_store import StatsStore
+from utils.storage import SQLiteDatabase, migrate_json_to_sqlite
+
+
+def make_json_data(data_dir):
+    """Problems and sessions in JSON files, partly still in the journals"""
+    pm = ProblemManager(str(data_dir / 'problems.json'))
+    pm.add_problem("Two Sum", "Easy", ["Array", "Hash Table"], "LeetCode",
+                   "https://leetcode.com/problems/two-sum/")
+    pm.add_problem("Número de Islas", "Medium", ["Graph"])
+    pm.add_problem("Word Ladder", "Hard", ["Graph", "BFS"])
+    pm.save_problems()
+    pm.edit_problem(2, status="Solved")
+    pm.delete_problem(3)
+    
+    st = SessionTracker(str(data_dir / 'sessions.json'))
+    for problem_id, solved in ((1, True), (2, False), (1, False)):
+        st.start_session(problem_id)
+        st.add_hint()
+        st.add_note(f"note on {problem_id}")
+        st.complete_session(solved=solved, solution_code="pass")
+    return pm, st
+
+
+def test_migrate_json_to_sqlite_round_trip(tmp_path):
+    pm, st = make_json_data(tmp_path)
+    
+    counts = migrate_json_to_sqlite(str(tmp_path / 'problems.json'),
+                                    str(tmp_path / 'sessions.json'),
+                                    str(tmp_path / 'codetrack.db'))
+    assert counts == (2, 3)
+    
+    db = SQLiteDatabase(str(tmp_path / 'codetrack.db'))
+    try:
+        sql_pm = ProblemManager(str(tmp_path / 'problems.json'), storage=db.problems)
+        sql_st = SessionTracker(str(tmp_path / 'sessions.json'), storage=db.sessions)
+        
+        assert [p.to_dict() for p in sql_pm.problems] == [p.to_dict() for p in pm.problems]
+        assert [s.to_dict() for s in sql_st.sessions] == [s.to_dict() for s in st.sessions]
+        
+        # Totals and history are answered in SQL
+        assert sql_st.get_statistics() == st.get_statistics()
+        assert ([s.id for s in sql_st.get_session_history(1)]
+                == [s.id for s in st.get_session_history(1)])
+        
+        # The id sequence moves over too, so the deleted problem's id stays used
+        assert sql_pm.add_problem("Jump Game", "Medium").id == 4
+        assert sql_st.start_session(1).id == 4
+    finally:
+        db.close()
+
+
+def record_calls(monkeypatch, db, *names):
+    """Count calls of the named SQLiteDatabase query methods"""
+    calls = []
+    for name in names:
+        method = getattr(db, name)
+        
+        def wrapper(*args, name=name, method=method, **kwargs):
+            calls.append(name)
+            return method(*args, **kwargs)
+        monkeypatch.setattr(db, name, wrapper)
+    return calls
+
+
+def test_filters_and_aggregates_are_answered_in_sql(tmp_path, monkeypatch):
+    pm, st = make_json_data(tmp_path)
+    pm.add_problem("Course Schedule", "Medium", ["Graph", "Topological Sort"])
+    pm.add_problem("Two Sum", "Easy", ["Array"], "LeetCode", "https://leetcode.com/problems/two-sum-ii/")
+    pm.edit_problem(4, status="Reviewed")
+    migrate_json_to_sqlite(str(tmp_path / 'problems.json'), str(tmp_path / 'sessions.json'),
+                           str(tmp_path / 'codetrack.db'))
+    
+    db = SQLiteDatabase(str(tmp_path / 'codetrack.db'))
+    try:
+        calls = record_calls(monkeypatch, db, 'problem_ids', 'problem_aggregates',
+                             'session_aggregates')
+        sql_pm = ProblemManager(str(tmp_path / 'problems.json'), storage=db.problems)
+        sql_st = SessionTracker(str(tmp_path / 'sessions.json'), storage=db.sessions)
+        
+        today = date.today()
+        json_stats = StatsStore(pm, st, stats_file=str(tmp_path / 'json_stats.json'))
+        sql_stats = StatsStore(sql_pm, sql_st, stats_file=str(tmp_path / 'sql_stats.json'))
+        assert calls == ['problem_aggregates', 'session_aggregates']
+        assert sql_stats.to_dict(today) == json_stats.to_dict(today)
+        
+        queries = [{'difficulty': 'Medium'},
+                   {'status': 'Solved'},
+                   {'topics': ['Graph', 'Array']},
+                   {'topics': ['Graph', 'Topological Sort'], 'match': 'all'},
+                   {'difficulty': 'Medium', 'topics': ['Graph'], 'status': 'Not Started'},
+                   {'difficulty': 'Impossible'}]
+        for query in queries:
+            assert ([p.id for p in sql_pm.filter_problems(**query)]
+                    == [p.id for p in pm.filter_problems(**query)])
+        assert calls.count('problem_ids') == len(queries)
+        
+        # Written changes are still answered in SQL and agree with the deltas
+        sql_pm.edit_problem(1, status="Solved")
+        pm.edit_problem(1, status="Solved")
+        sql_st.start_session(4)
+        sql_st.complete_session(solved=True)
+        st.start_session(4)
+        st.complete_session(solved=True)
+        assert ([p.id for p in sql_pm.filter_problems(status='Solved')]
+                == [p.id for p in pm.filter_problems(status='Solved')] == [1, 2])
+        sql_view, json_view = sql_stats.to_dict(today), json_stats.to_dict(today)
+        assert sql_view.pop('last_practice_date') <= json_view.pop('last_practice_date')
+        assert sql_view == json_view
+        assert (StatsStore(sql_pm, sql_st, stats_file=str(tmp_path / 'sql_stats.json')).to_dict(today)
+                == sql_stats.to_dict(today))
+    finally:
+        db.close()
+
+
+def test_unwritten_changes_are_filtered_in_memory(tmp_path, monkeypatch):
+    make_json_data(tmp_path)
+    migrate_json_to_sqlite(str(tmp_path / 'problems.json'), str(tmp_path / 'sessions.json'),
+                           str(tmp_path / 'codetrack.db'))
+    
+    db = SQLiteDatabase(str(tmp_path / 'codetrack.db'))
+    try:
+        calls = record_calls(monkeypatch, db, 'problem_ids')
+        pm = ProblemManager(str(tmp_path / 'problems.json'), storage=db.problems)
+        with pm.batch():
+            pm.add_problem("Clone Graph", "Medium", ["Graph"])
+            assert [p.id for p in pm.filter_problems(topics=['Graph'])] == [2, 4]
+            assert calls == []
+        
+        # Another connection committing makes the loaded state stale
+        other = SQLiteDatabase(str(tmp_path / 'codetrack.db'))
+        try:
+            ProblemManager(str(tmp_path / 'problems.json'), storage=other.problems).delete_problem(2)
+        finally:
+            other.close()
+        assert [p.id for p in pm.filter_problems(topics=['Graph'])] == [2, 4]
+        assert calls == []
+    finally:
+        db.close()
@@ -0,0 +1,95 @@
+"""
+Tests for team mode
+"""
+
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from modules.session_tracker import SessionTracker
+from modules.stats_store import StatsStore
+from modules.team import Team, TeamAnalytics
+from utils.storage import JSONStore
+
+
+def practice(tracker, problem_id, solved=True):
+    tracker.start_session(problem_id)
+    tracker.complete_session(solved=solved)
+
+
+def test_stale_summary_is_rebuilt_without_writing_to_the_shard(tmp_path):
+    team = Team(str(tmp_path / 'team'))
+    pm = team.problem_manager('ana')
+    pm.add_problem("Two Sum", "Easy", ["Array"])
+    pm.add_problem("Word Ladder", "Hard", ["Graph"])
+    
+    tracker = team.session_tracker('ana')
+    practice(tracker, 1)
+    team.write_summary('ana', tracker)
+    tracker.close()
+    
+    # Sessions written without a summary, as an older CodeTrack would
+    tracker = team.session_tracker('ana')
+    practice(tracker, 2, solved=False)
+    practice(tracker, 2)
+    
+    shard = os.path.join(team.users_dir, 'ana')
+    files = {name: os.stat(os.path.join(shard, name)).st_mtime_ns for name in os.listdir(shard)}
+    
+    summary = team.summary('ana')
+    assert (summary['sessions'], summary['solved']) == (3, 2)
+    assert summary['problems'] == {1: [1, 1, 0], 2: [2, 1, 0]}
+    assert {name: os.stat(os.path.join(shard, name)).st_mtime_ns
+            for name in os.listdir(shard)} == files
+    
+    # The rebuilt summary matches the one the member's CodeTrack saves
+    saved = team.write_summary('ana', tracker)
+    assert summary == saved
+    
+    # A shard only an older CodeTrack wrote gets no files from the team report
+    os.makedirs(team.user_dir('ben'))
+    practice(SessionTracker(team.sessions_file('ben')), 1, solved=False)
+    files = sorted(os.listdir(team.user_dir('ben')))
+    rows = TeamAnalytics(pm, team.summaries()).leaderboard()
+    assert [(row['user'], row['solved'], row['sessions']) for row in rows] == [
+        ('ana', 2, 3), ('ben', 0, 1)]
+    assert sorted(os.listdir(team.user_dir('ben'))) == files
+
+
+def test_problem_statuses_are_kept_per_member(tmp_path):
+    team = Team(str(tmp_path / 'team'))
+    ana = team.problem_manager('ana')
+    ana.add_problem("Two Sum", "Easy", ["Array"])
+    ana.add_problem("Word Ladder", "Hard", ["Graph"])
+    ben = team.problem_manager('ben')
+    
+    ana.edit_problem(1, status="In Progress")
+    ana.edit_problem(1, status="Solved")
+    ana.edit_problem(2, status="Reviewed", topics=["Graph", "BFS"])
+    ben.edit_problem(2, status="In Progress")
+    ben.refresh()
+    ana.refresh()
+    
+    # Shared edits reach everyone, statuses stay with their member
+    assert ben.get_problem(2).topics == ["Graph", "BFS"]
+    assert [p.id for p in ben.filter_problems(status="Solved")] == []
+    assert [p.id for p in ben.filter_problems(status="In Progress")] == [2]
+    assert [p.id for p in ana.filter_problems(status="Solved")] == [1]
+    assert ana.get_problem(2).status == "Reviewed"
+    assert [record['status'] for record in JSONStore(team.problems_file).load()] == [
+        "Not Started", "Not Started"]
+    
+    stats = StatsStore(team.problem_manager('ben'), team.session_tracker('ben'),
+                       stats_file=str(tmp_path / 'ben_stats.json'))
+    assert dict(stats.status_counts) == {"Not Started": 1, "In Progress": 1}
+    stats = StatsStore(team.problem_manager('ana'), team.session_tracker('ana'),
+                       stats_file=str(tmp_path / 'ana_stats.json'))
+    assert dict(stats.status_counts) == {"Solved": 1, "Reviewed": 1}
+    
+    # Another process of the same member picks the statuses up
+    other = team.problem_manager('ana')
+    ana.edit_problem(1, status="Reviewed")
+    other.refresh()
+    assert other.get_problem(1).status == "Reviewed"
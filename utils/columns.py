@@ -0,0 +1,132 @@
+"""
+Column Aggregates
+Group-bys, histograms and run lengths over SessionTable columns
+
+The columns are typed arrays, so NumPy can wrap them without copying.
+When NumPy is not installed every helper falls back to a pure-Python
+loop that returns the same result. NumPy is imported on the first
+aggregate rather than at startup, since importing it takes longer than
+the rest of CodeTrack's imports together.
+"""
+
+from array import array
+
+_numpy = False  # The numpy module once imported, None if it is not installed
+
+
+def _np():
+    """NumPy, or None when it is not installed"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # NumPy is optional
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def _view(column):
+    """Zero-copy NumPy view of an array.array (or memoryview) column"""
+    np = _np()
+    dtype = np.dtype(column.typecode if isinstance(column, array) else column.format)
+    if not len(column):
+        return np.zeros(0, dtype=dtype)
+    return np.frombuffer(column, dtype=dtype)
+
+
+def column_sum(column):
+    """Sum of a numeric column, as a Python int"""
+    np = _np()
+    if np is None:
+        return sum(column)
+    return int(_view(column).sum(dtype=np.int64))
+
+
+def column_max(column, missing):
+    """Largest value in a column other than the missing placeholder, or None"""
+    np = _np()
+    if np is None:
+        return max((value for value in column if value != missing), default=None)
+    
+    values = _view(column)
+    values = values[values != missing]
+    return int(values.max()) if len(values) else None
+
+
+def day_histogram(times, missing, unit):
+    """
+    Count timestamps per day
+    
+    Args:
+        times (array): Epoch timestamps
+        missing (int): Placeholder value to skip
+        unit (int): Timestamp units per day
+    
+    Returns:
+        dict: Day number (days since the epoch) -> count, in ascending order
+    """
+    np = _np()
+    if np is None:
+        counts = {}
+        for value in times:
+            if value != missing:
+                day = value // unit
+                counts[day] = counts.get(day, 0) + 1
+        return dict(sorted(counts.items()))
+    
+    values = _view(times)
+    days, counts = np.unique(values[values != missing] // unit, return_counts=True)
+    return dict(zip(days.tolist(), counts.tolist()))
+
+
+def longest_run(numbers):
+    """Length of the longest run of consecutive integers in a sorted sequence"""
+    np = _np()
+    if np is None:
+        longest = run = 0
+        previous = None
+        for number in numbers:
+            run = run + 1 if previous is not None and number == previous + 1 else 1
+            longest = max(longest, run)
+            previous = number
+        return longest
+    
+    values = np.fromiter(numbers, dtype=np.int64)
+    if not len(values):
+        return 0
+    
+    # Runs start wherever the gap to the previous number is not 1
+    starts = np.flatnonzero(np.diff(values) != 1) + 1
+    bounds = np.concatenate(([0], starts, [len(values)]))
+    return int(np.diff(bounds).max())
+
+
+def grouped_totals(keys, values, mask):
+    """
+    Sum and count values per key over the rows where mask is set
+    
+    Args:
+        keys (array): Group key per row
+        values (array): Value per row
+        mask (array): Non-zero for rows to include
+    
+    Returns:
+        dict: Key -> [sum, count], keys in order of first appearance
+    """
+    np = _np()
+    if np is None:
+        totals = {}
+        for key, value, selected in zip(keys, values, mask):
+            if selected:
+                total = totals.setdefault(key, [0, 0])
+                total[0] += value
+                total[1] += 1
+        return totals
+    
+    selected = _view(mask) != 0
+    groups, first, inverse, counts = np.unique(_view(keys)[selected], return_index=True,
+                                               return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=_view(values)[selected], minlength=len(groups))
+    order = np.argsort(first, kind='stable')
+    return {int(groups[i]): [int(sums[i]), int(counts[i])] for i in order}
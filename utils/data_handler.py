@@ -1,11 +1,122 @@
+import gzip
 import json
+import shutil
+import time
 import os
 
+try:
+    import zstandard
+except ImportError:  # zstd-compressed backups are optional
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # The faster encoder is optional
+    orjson = None
+
+
+class StdlibEncoder:
+    """JSON encoder/decoder from the standard library"""
+    
+    name = 'json'
+    
+    def dumps(self, data, pretty=False):
+        if pretty:
+            text = json.dumps(data, indent=2, ensure_ascii=False)
+        else:
+            text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        return text.encode('utf-8')
+    
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonEncoder:
+    """orjson encoder/decoder, falling back to the standard library for data it rejects"""
+    
+    name = 'orjson'
+    
+    def dumps(self, data, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            return StdlibEncoder().dumps(data, pretty)
+    
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class JSONFormat:
+    """
+    How read_json/write_json and the journal encode data files
+    
+    Args:
+        compact (bool): Write without indentation and with short separators
+        encoder: Object with dumps(data, pretty) -> bytes and loads(bytes);
+            defaults to orjson when it is installed, else the standard library
+    """
+    
+    def __init__(self, compact=True, encoder=None):
+        self.compact = compact
+        self.encoder = encoder or (OrjsonEncoder() if orjson is not None else StdlibEncoder())
+    
+    def dumps(self, data, pretty=None):
+        return self.encoder.dumps(data, not self.compact if pretty is None else pretty)
+    
+    def loads(self, data):
+        return self.encoder.loads(data)
+
+
+class BackupPolicy:
+    """
+    How write_json backs up the file it is about to replace
+    
+    Args:
+        generations (int): Backups to keep; 0 disables backups
+        min_interval (float): Seconds that must pass since the newest backup
+            before another one is made
+        compression (str): None, 'gzip' or 'zstd' (needs the zstandard package)
+        method (str): 'link' hardlinks the old file into place as the newest
+            backup, so nothing is copied (falls back to 'copy' where links are
+            not supported); 'copy' writes a separate copy
+    """
+    
+    def __init__(self, generations=1, min_interval=0, compression=None, method='link'):
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Unknown backup compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd backups need the zstandard package")
+        if method not in ('link', 'copy'):
+            raise ValueError(f"Unknown backup method: {method}")
+        
+        self.generations = generations
+        self.min_interval = min_interval
+        self.compression = compression
+        self.method = method
+
+
+BACKUP_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+backup_policy = BackupPolicy()
+
+json_format = JSONFormat()
+
+
+def set_backup_policy(policy):
+    global backup_policy
+    backup_policy = policy
+
+
+def set_json_format(fmt):
+    global json_format
+    json_format = fmt
+
 
 def read_json(filename):
     try:
-        with open(filename, 'r') as file:
-            data = json.load(file)
+        with open(filename, 'rb') as file:
+            data = json_format.loads(file.read())
             return data
     
     except FileNotFoundError:
@@ -18,24 +129,113 @@ def read_json(filename):
     
     except json.JSONDecodeError:
         print(f"Error: {filename} is corrupted")
-        backup_file = filename + '.backup'
-        if os.path.exists(backup_file):
-            print("Restoring from backup...")
-            with open(backup_file, 'r') as file:
-                return json.load(file)
-        else:
-            return [] if 'problems' in filename or 'sessions' in filename else {}
+        # Newest generation first, skipping backups that are damaged too
+        for backup_file in backup_files(filename):
+            try:
+                with _open_backup(backup_file) as file:
+                    data = json_format.loads(file.read())
+            except (OSError, EOFError, ValueError):
+                continue
+            print(f"Restoring from backup {backup_file}...")
+            return data
+        
+        return [] if 'problems' in filename or 'sessions' in filename else {}
+
+
+# Parses a JSON array file one element at a time, so peak memory is one
+# element plus a read buffer rather than the whole document. source is a
+# filename or an open text file. A named file that does not start with an
+# array goes through read_json (and its backup recovery), an open file
+# raises ValueError; corruption after the first element raises
+# JSONDecodeError.
+def iter_json_array(source, chunk_size=65536):
+    if not isinstance(source, str):
+        yield from _stream_json_array(source, chunk_size)
+        return
+    
+    try:
+        file = open(source, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    
+    with file:
+        yield from _stream_json_array(file, chunk_size, source)
 
 
-def write_json(filename, data):
-    backup_data(filename)
+def _stream_json_array(file, chunk_size, filename=None):
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    eof = not buffer
+    pos = _skip_whitespace(buffer, 0)
     
+    if buffer[pos:pos + 1] != '[':
+        if filename is None:
+            raise ValueError("not a JSON array")
+        data = read_json(filename)
+        yield from (data if isinstance(data, list) else [])
+        return
+    pos += 1
+    expect_value = True
+    count = 0
+    
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        
+        if pos >= len(buffer) - 1 and not eof:
+            # Keep at least one character after a value in view
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        
+        char = buffer[pos:pos + 1]
+        if char == ']' and not (expect_value and count):
+            return
+        if not expect_value:
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            expect_value = True
+            continue
+        
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # A number cut off by the buffer still decodes, so wait for a delimiter
+            complete = eof or (end < len(buffer) and buffer[end] in ' \t\n\r,]')
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        
+        if not complete:
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        
+        yield value
+        count += 1
+        pos = end
+        expect_value = False
+
+
+def _skip_whitespace(text, pos):
+    while pos < len(text) and text[pos] in ' \t\n\r':
+        pos += 1
+    return pos
+
+
+def write_json(filename, data, pretty=None):
     temp_filename = filename + '.tmp'
     
     try:
-        with open(temp_filename, 'w') as file:
-            json.dump(data, file, indent=2, ensure_ascii=False)
+        with open(temp_filename, 'wb') as file:
+            file.write(json_format.dumps(data, pretty))
         
+        # The old file becomes the newest backup just before it is replaced
+        backup_data(filename)
         os.replace(temp_filename, filename)
         return True
     
@@ -46,21 +246,242 @@ def write_json(filename, data):
         return False
 
 
-def backup_data(filename):
-    if not os.path.exists(filename):
+def backup_data(filename, policy=None):
+    policy = policy or backup_policy
+    if policy.generations < 1 or not os.path.exists(filename):
         return
     
-    backup_filename = filename + '.backup'
+    newest = next(iter(backup_files(filename)), None)
+    if newest and policy.min_interval and time.time() - os.path.getmtime(newest) < policy.min_interval:
+        return  # Throttled; the existing backups stay as they are
     
     try:
-        with open(filename, 'r') as original:
-            data = original.read()
+        _rotate_backups(filename, policy.generations)
+        backup_filename = backup_name(filename, 1, policy.compression)
         
-        with open(backup_filename, 'w') as backup:
-            backup.write(data)
+        if policy.compression:
+            with open(filename, 'rb') as original, _open_backup(backup_filename, 'wb') as backup:
+                shutil.copyfileobj(original, backup)
+        elif policy.method == 'link':
+            try:
+                os.link(filename, backup_filename)
+                os.utime(backup_filename)  # Throttling goes by when the backup was taken
+            except OSError:
+                shutil.copyfile(filename, backup_filename)
+        else:
+            shutil.copyfile(filename, backup_filename)
         
         return True
     
     except Exception as e:
         print(f"Warning: Could not create backup of {filename}: {e}")
         return False
+
+
+def backup_name(filename, generation, compression=None):
+    number = '' if generation == 1 else f'.{generation}'
+    return filename + '.backup' + number + BACKUP_SUFFIXES[compression]
+
+
+def backup_files(filename):
+    """Existing backups of filename, newest generation first"""
+    generation = 1
+    while True:
+        found = [name for name in (backup_name(filename, generation, c) for c in BACKUP_SUFFIXES)
+                 if os.path.exists(name)]
+        if not found:
+            return
+        yield from found
+        generation += 1
+
+
+def _rotate_backups(filename, generations):
+    # Shift every generation up by one, dropping those past the limit
+    existing = list(backup_files(filename))
+    for name in reversed(existing):
+        generation, compression = _parse_backup_name(filename, name)
+        if generation >= generations:
+            os.remove(name)
+        else:
+            os.replace(name, backup_name(filename, generation + 1, compression))
+
+
+def _parse_backup_name(filename, name):
+    rest = name[len(filename + '.backup'):]
+    compression = None
+    for candidate, suffix in BACKUP_SUFFIXES.items():
+        if suffix and rest.endswith(suffix):
+            compression = candidate
+            rest = rest[:-len(suffix)]
+    return (int(rest[1:]) if rest else 1), compression
+
+
+def _open_backup(name, mode='rb'):
+    if name.endswith(BACKUP_SUFFIXES['gzip']):
+        return gzip.open(name, mode)
+    if name.endswith(BACKUP_SUFFIXES['zstd']):
+        if zstandard is None:
+            raise OSError(f"zstandard is needed to read {name}")
+        return zstandard.open(name, mode)
+    return open(name, mode)
+
+
+def read_jsonl(filename):
+    records = []
+    
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return records
+    
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            records.append(json_format.loads(line))
+        except json.JSONDecodeError:
+            if number == len(lines):
+                # A crash in the middle of an append leaves a torn last line
+                print(f"Warning: ignoring incomplete last entry in {filename}")
+            else:
+                print(f"Warning: skipping corrupted line {number} in {filename}")
+    
+    return records
+
+
+# Reads the complete lines after a byte offset, returning the records and
+# the offset to continue from. A torn last line is left for the next read.
+def read_jsonl_from(filename, offset=0):
+    try:
+        with open(filename, 'rb') as file:
+            file.seek(offset)
+            data = file.read()
+    except FileNotFoundError:
+        return [], 0
+    
+    end = data.rfind(b'\n') + 1
+    records = []
+    
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json_format.loads(line))
+        except json.JSONDecodeError:
+            print(f"Warning: skipping corrupted entry in {filename}")
+    
+    return records, offset + end
+
+
+def append_jsonl(filename, records):
+    lines = b''.join(json_format.dumps(record, pretty=False) + b'\n' for record in records)
+    if not lines:
+        return True
+    
+    try:
+        with open(filename, 'ab+') as file:
+            file.seek(0, os.SEEK_END)
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b'\n':
+                    # Terminate a torn line so it cannot swallow the new entries
+                    file.write(b'\n')
+            
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        
+        return True
+    
+    except Exception as e:
+        print(f"Error appending to {filename}: {e}")
+        return False
+
+
+def journal_filename(filename):
+    return filename + '.journal'
+
+
+# Journal entries are {"op": "put", "data": record} or {"op": "delete", "id": id},
+# replayed in order on top of the JSON snapshot.
+def load_journaled(filename):
+    records = read_json(filename) or []
+    ops = read_jsonl(journal_filename(filename))
+    return replay_journal(records, ops), len(ops)
+
+
+def replay_journal(records, ops):
+    if not ops:
+        return records
+    
+    positions = {record['id']: i for i, record in enumerate(records)}
+    
+    for op in ops:
+        if op.get('op') == 'put':
+            record = op['data']
+            position = positions.get(record['id'])
+            if position is None:
+                positions[record['id']] = len(records)
+                records.append(record)
+            else:
+                records[position] = record
+        elif op.get('op') == 'delete':
+            position = positions.pop(op['id'], None)
+            if position is not None:
+                records[position] = None
+    
+    return [record for record in records if record is not None]
+
+
+# Streaming counterpart of replay_journal: yields the same records in the
+# same order while holding only the journal's records in memory. key gives
+# the id of a snapshot record when they are not dicts.
+def replay_journal_stream(records, ops, key=None):
+    final = {}  # id -> last put record, or None once deleted
+    first_put = {}  # id -> index of the first put since the last delete
+    deleted = set()
+    
+    for index, op in enumerate(ops):
+        if op.get('op') == 'put':
+            record_id = op['data']['id']
+            final[record_id] = op['data']
+            first_put.setdefault(record_id, index)
+        elif op.get('op') == 'delete':
+            final[op['id']] = None
+            first_put.pop(op['id'], None)
+            deleted.add(op['id'])
+    
+    seen = set()
+    for record in records:
+        record_id = record['id'] if key is None else key(record)
+        if record_id in deleted:
+            continue  # Dropped, or re-added at the end
+        if record_id in final:
+            seen.add(record_id)
+            yield final[record_id]
+        else:
+            yield record
+    
+    appended = [record_id for record_id in first_put if record_id not in seen]
+    for record_id in sorted(appended, key=first_put.get):
+        yield final[record_id]
+
+
+def append_journal(filename, puts=(), deletes=()):
+    ops = [{'op': 'put', 'data': record} for record in puts]
+    ops.extend({'op': 'delete', 'id': record_id} for record_id in deletes)
+    return append_jsonl(journal_filename(filename), ops)
+
+
+def compact_journal(filename, records):
+    if not write_json(filename, records):
+        return False
+    
+    journal = journal_filename(filename)
+    if os.path.exists(journal):
+        os.remove(journal)
+    
+    return True
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+import re
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# Timestamps are kept in memory as integer microseconds since 1970-01-01
+# (naive wall-clock time, like the ISO strings in the data files), which
+# round-trips isoformat() output exactly. Anything that is not a plain
+# isoformat() timestamp is kept as the original string.
+def iso_to_epoch(value):
+    if value is None or len(value) not in (19, 26) or value[10:11] != 'T':
+        return value
+    
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    
+    if moment.tzinfo is not None:
+        return value
+    
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def epoch_to_iso(value):
+    if value is None or isinstance(value, str):
+        return value
+    return (EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def epoch_to_date(value):
+    """Date part (YYYY-MM-DD) of an epoch or ISO timestamp"""
+    if isinstance(value, str):
+        return value.split('T')[0]
+    return (EPOCH + timedelta(microseconds=value)).date().isoformat()
+
+
+def format_duration(seconds):
+    """Seconds as '1h 5m', '3m 20s' or '45s'"""
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+    
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    elif minutes > 0:
+        return f"{minutes}m {secs}s"
+    else:
+        return f"{secs}s"
+
+
+SCHEME_PATTERN = re.compile(r'^[a-z][a-z0-9+.-]*://')
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# Query parameters that say how a link was shared rather than which problem
+# it is (LeetCode adds envType/envId when a problem is opened from a list)
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid',
+                             'mc_eid', '_ga', 'ref', 'ref_src', 'ref_url', 'envtype', 'envid'})
+
+
+def _is_tracking_param(param):
+    name = param.split('=', 1)[0]
+    return name.startswith('utm_') or name in TRACKING_PARAMS
+
+
+# Problem URLs compare equal when they differ only in scheme, "www.",
+# letter case, fragment, trailing slashes, tracking parameters or the order
+# of the query parameters. The rest of the query is kept: some judges name
+# the problem there (acm.timus.ru/problem.aspx?num=1000).
+def normalize_url(url):
+    url = (url or '').strip().lower()
+    url = SCHEME_PATTERN.sub('', url)
+    if url.startswith('www.'):
+        url = url[4:]
+    url, _, query = url.split('#', 1)[0].partition('?')
+    url = url.rstrip('/')
+    
+    params = sorted(param for param in query.split('&') if param and not _is_tracking_param(param))
+    return url + '?' + '&'.join(params) if params else url
+
+
+# Titles compare equal when they differ only in letter case, whitespace
+# or punctuation ("Two Sum" / "two-sum" / "Two  Sum!").
+def canonical_title(title):
+    return ' '.join(WORD_PATTERN.findall((title or '').casefold()))
@@ -0,0 +1,53 @@
+"""
+File Locking
+Advisory locks that coordinate several CodeTrack processes sharing data/
+"""
+
+import threading
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks on this platform; only threads are coordinated
+    fcntl = None
+
+
+class FileLock:
+    """
+    Exclusive lock held with flock() on a lock file
+    
+    The lock is reentrant and also excludes other threads of the same
+    process, so a method holding it can call others that take it again.
+    Hold it only around short read-check-write steps, not for a whole
+    session.
+    
+    Example:
+        with store.locked():
+            ops = store.external_changes()
+            ...
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+    
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.path, 'a')
+            except OSError:
+                pass  # e.g. data/ does not exist yet, so there is nothing to protect
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
@@ -0,0 +1,435 @@
+"""
+Profiling
+Opt-in timing of the I/O, manager and analytics hot paths
+
+Nothing here runs unless profiling is switched on, with --profile on
+main.py/codetrack.py or the CODETRACK_PROFILE environment variable:
+    
+    CODETRACK_PROFILE=1 python codetrack.py report
+    python codetrack.py --profile --profile-output report.json report
+
+enable() then replaces the JSON I/O functions of utils/data_handler.py,
+the public methods of the stores, ProblemManager, SessionTracker and
+Analytics, and Problem/Session to_dict/from_dict with timed wrappers.
+Each wrapper counts calls, total time, own time (total minus the time
+spent in other wrapped calls) and the bytes/records moved. While
+profiling is off, the original functions are left in place, so there is
+no overhead at all.
+
+report() prints one table per command to stderr. The output file, if
+any, is a Chrome trace (for chrome://tracing or Perfetto) when it ends
+in .json, and otherwise cProfile statistics for pstats/snakeviz.
+"""
+
+from contextlib import contextmanager
+import functools
+import importlib
+import inspect
+import threading
+import time
+import json
+import sys
+import os
+
+ENV_VAR = 'CODETRACK_PROFILE'
+OUTPUT_ENV_VAR = 'CODETRACK_PROFILE_OUTPUT'
+
+# Trace events kept for the Chrome trace; later ones are counted and dropped
+MAX_TRACE_EVENTS = 1000000
+
+# Rows printed per summary, slowest own time first
+SUMMARY_ROWS = 25
+
+# (module, class) whose public methods are timed
+INSTRUMENTED_CLASSES = (
+    ('utils.storage', 'JSONStore'),
+    ('utils.storage', 'SQLiteProblemStore'),
+    ('utils.storage', 'SQLiteSessionStore'),
+    ('modules.problem_manager', 'ProblemManager'),
+    ('modules.session_tracker', 'SessionTracker'),
+    ('modules.analytics', 'Analytics'),
+)
+
+# Per-record conversions, timed separately to show the cost of parsing vs. building objects
+INSTRUMENTED_CONVERSIONS = (
+    ('modules.problem_manager', 'Problem'),
+    ('modules.session_tracker', 'Session'),
+)
+
+profiler = None  # The active Profiler while profiling is on
+
+
+def _file_size(filename):
+    try:
+        return os.path.getsize(filename)
+    except (OSError, TypeError):
+        return 0
+
+
+def _length(value):
+    """Number of records in a result, or 0 if it is not a collection"""
+    if isinstance(value, (str, bytes)):
+        return 0
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+# I/O counters: (args, kwargs, result, size before the call) -> (bytes, records)
+def _count_read(args, kwargs, result, before):
+    return _file_size(args[0]), _length(result)
+
+
+def _count_read_from(args, kwargs, result, before):
+    records, offset = result
+    start = args[1] if len(args) > 1 else kwargs.get('offset', 0)
+    return max(offset - start, 0), len(records)
+
+
+def _count_write(args, kwargs, result, before):
+    data = args[1] if len(args) > 1 else kwargs.get('data')
+    return _file_size(args[0]), _length(data)
+
+
+def _count_append(args, kwargs, result, before):
+    records = args[1] if len(args) > 1 else kwargs.get('records')
+    return max(_file_size(args[0]) - before, 0), _length(records)
+
+
+def _count_changes(args, kwargs, result, before):
+    puts = args[1] if len(args) > 1 else kwargs.get('puts', ())
+    deletes = args[2] if len(args) > 2 else kwargs.get('deletes', ())
+    return 0, _length(puts) + _length(deletes)
+
+
+def _count_all(args, kwargs, result, before):
+    records = args[1] if len(args) > 1 else kwargs.get('records')
+    return 0, _length(records)
+
+
+def _size_before(args, kwargs):
+    return _file_size(args[0]) if args else 0
+
+
+# data_handler function -> (counter, whether it needs the size before the call)
+IO_FUNCTIONS = {
+    'read_json': (_count_read, False),
+    'iter_json_array': (_count_read, False),
+    'read_jsonl': (_count_read, False),
+    'read_jsonl_from': (_count_read_from, False),
+    'write_json': (_count_write, False),
+    'append_jsonl': (_count_append, True),
+}
+
+def _count_problems(args, kwargs, result, before):
+    return 0, len(args[0].problems)
+
+
+def _count_sessions(args, kwargs, result, before):
+    return 0, len(args[0].sessions)
+
+
+# Method of an instrumented class -> counter; other methods count the records they return
+METHOD_COUNTERS = {
+    'write_changes': _count_changes,
+    'write_all': _count_all,
+    'load_problems': _count_problems,
+    'load_sessions': _count_sessions,
+}
+
+
+class Counter:
+    """Totals of one instrumented operation"""
+    
+    __slots__ = ('calls', 'total', 'own', 'bytes', 'records')
+    
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.bytes = 0
+        self.records = 0
+    
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """
+    Counters and trace events collected by the instrumented functions
+    
+    Calls may come from several threads (main.py loads in the
+    background); each thread keeps its own call stack for own times.
+    """
+    
+    def __init__(self, output=None):
+        self.output = output
+        self.counters = {}  # operation name -> Counter
+        self.trace = output is not None and output.endswith('.json')
+        self.events = []
+        self.dropped_events = 0
+        self.started = time.perf_counter()
+        self._origin = self.started
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches = []  # (owner, attribute, original value)
+        self._cprofile = None
+        
+        if output is not None and not self.trace:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def record(self, name, start, elapsed, own, nbytes=0, records=0):
+        """Add one call to the counters and the trace"""
+        with self._lock:
+            counter = self.counters.get(name)
+            if counter is None:
+                counter = self.counters[name] = Counter()
+            counter.calls += 1
+            counter.total += elapsed
+            counter.own += own
+            counter.bytes += nbytes
+            counter.records += records
+            
+            if self.trace:
+                if len(self.events) < MAX_TRACE_EVENTS:
+                    self.events.append((name, start, elapsed, threading.get_ident(),
+                                        nbytes, records))
+                else:
+                    self.dropped_events += 1
+    
+    def wrap(self, name, function, counter=None, size_before=False):
+        """Timed version of function, reported as name"""
+        if inspect.isgeneratorfunction(function):
+            return self._wrap_generator(name, function, counter)
+        
+        profiler = self
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            before = _size_before(args, kwargs) if size_before else 0
+            stack = profiler._stack()
+            stack.append(0.0)  # Time of the wrapped calls made from this one
+            start = time.perf_counter()
+            succeeded = False
+            try:
+                result = function(*args, **kwargs)
+                succeeded = True
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                
+                nbytes = records = 0
+                if succeeded and counter is not None:
+                    nbytes, records = counter(args, kwargs, result, before)
+                elif succeeded:
+                    records = _length(result)
+                profiler.record(name, start, elapsed, elapsed - children, nbytes, records)
+            return result
+        
+        return wrapper
+    
+    def _wrap_generator(self, name, function, counter):
+        """Timed version of a generator; only the time spent producing items counts"""
+        profiler = self
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            iterator = function(*args, **kwargs)
+            stack = profiler._stack()
+            first = None
+            elapsed = own = 0.0
+            count = 0
+            
+            try:
+                while True:
+                    stack.append(0.0)
+                    start = time.perf_counter()
+                    if first is None:
+                        first = start
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        step = time.perf_counter() - start
+                        children = stack.pop()
+                        if stack:
+                            stack[-1] += step
+                        elapsed += step
+                        own += step - children
+                    count += 1
+                    yield item
+            finally:
+                iterator.close()
+                nbytes = counter(args, kwargs, None, 0)[0] if counter is not None else 0
+                profiler.record(name, first or time.perf_counter(), elapsed, own, nbytes, count)
+        
+        return wrapper
+    
+    def patch(self, owner, attribute, value):
+        """Replace owner.attribute, to be restored by uninstall()"""
+        self._patches.append((owner, attribute, owner.__dict__[attribute]))
+        setattr(owner, attribute, value)
+    
+    def install(self):
+        """Wrap the I/O functions and the instrumented classes"""
+        from utils import data_handler
+        
+        for function_name, (counter, size_before) in IO_FUNCTIONS.items():
+            original = getattr(data_handler, function_name)
+            wrapper = self.wrap(f'io.{function_name}', original, counter, size_before)
+            
+            # Modules that imported the function by name hold their own reference
+            for module in list(sys.modules.values()):
+                if getattr(module, function_name, None) is original:
+                    self.patch(module, function_name, wrapper)
+        
+        for module_name, class_name in INSTRUMENTED_CLASSES:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            for attribute, value in list(vars(cls).items()):
+                if attribute.startswith('_') or hasattr(value, '__wrapped__'):
+                    continue  # Private helpers and context managers such as batch()/locked()
+                if inspect.isfunction(value):
+                    wrapper = self.wrap(f'{class_name}.{attribute}', value,
+                                        METHOD_COUNTERS.get(attribute))
+                    self.patch(cls, attribute, wrapper)
+        
+        for module_name, class_name in INSTRUMENTED_CONVERSIONS:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            self.patch(cls, 'to_dict', self.wrap(f'{class_name}.to_dict', cls.to_dict))
+            from_dict = vars(cls)['from_dict'].__func__
+            self.patch(cls, 'from_dict',
+                       classmethod(self.wrap(f'{class_name}.from_dict', from_dict)))
+        
+        if self._cprofile is not None:
+            self._cprofile.enable()
+    
+    def uninstall(self):
+        """Put the original functions back"""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        
+        for owner, attribute, original in reversed(self._patches):
+            setattr(owner, attribute, original)
+        self._patches = []
+    
+    def report(self, title, file=None):
+        """Print the counters since the last report and start new ones"""
+        file = file or sys.stderr
+        now = time.perf_counter()
+        with self._lock:
+            counters = self.counters
+            self.counters = {}
+            wall = now - self.started
+            self.started = now
+        
+        print(f"\nProfile: {title} ({wall * 1000:.1f} ms)", file=file)
+        if not counters:
+            print("  no instrumented calls", file=file)
+            return
+        
+        print(f"  {'operation':<40} {'calls':>8} {'total ms':>10} {'own ms':>10}"
+              f" {'bytes':>12} {'records':>9}", file=file)
+        ranked = sorted(counters.items(), key=lambda item: -item[1].own)
+        for name, counter in ranked[:SUMMARY_ROWS]:
+            print(f"  {name:<40} {counter.calls:>8} {counter.total * 1000:>10.2f}"
+                  f" {counter.own * 1000:>10.2f} {counter.bytes:>12} {counter.records:>9}",
+                  file=file)
+        if len(ranked) > SUMMARY_ROWS:
+            print(f"  ... {len(ranked) - SUMMARY_ROWS} more", file=file)
+    
+    def write_output(self):
+        """Write the Chrome trace or cProfile statistics, if an output file was given"""
+        if self.output is None:
+            return False
+        
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.output)
+        else:
+            pid = os.getpid()
+            events = [{'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid,
+                       'tid': tid, 'ts': (start - self._origin) * 1e6, 'dur': elapsed * 1e6,
+                       'args': {'bytes': nbytes, 'records': records}}
+                      for name, start, elapsed, tid, nbytes, records in self.events]
+            with open(self.output, 'w') as file:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                           'otherData': {'dropped_events': self.dropped_events}}, file)
+        
+        print(f"Profile written to {self.output}", file=sys.stderr)
+        return True
+
+
+def enable(output=None):
+    """
+    Start profiling, instrumenting the hot paths
+    
+    Args:
+        output (str, optional): Chrome trace (.json) or cProfile stats file
+            to write when finish() is called
+    
+    Returns:
+        Profiler: The active profiler
+    """
+    global profiler
+    if profiler is None:
+        profiler = Profiler(output)
+        profiler.install()
+    return profiler
+
+
+def disable():
+    """Stop profiling and remove the instrumentation"""
+    global profiler
+    if profiler is not None:
+        profiler.uninstall()
+        profiler = None
+
+
+def enable_from(flag=False, output=None):
+    """
+    Turn profiling on if the flag or CODETRACK_PROFILE asks for it
+    
+    CODETRACK_PROFILE_OUTPUT gives the output file when output is None.
+    
+    Returns:
+        Profiler: The active profiler, or None when profiling stays off
+    """
+    requested = os.environ.get(ENV_VAR, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+    if not (flag or requested):
+        return None
+    return enable(output or os.environ.get(OUTPUT_ENV_VAR) or None)
+
+
+def report(title):
+    """Print the per-command summary, if profiling is on"""
+    if profiler is not None:
+        profiler.report(title)
+
+
+def finish():
+    """Write the output file and stop profiling, if it is on"""
+    if profiler is not None:
+        try:
+            profiler.write_output()
+        finally:
+            disable()
+
+
+@contextmanager
+def command(title):
+    """Report the instrumented calls made inside the block as one command"""
+    try:
+        yield
+    finally:
+        report(title)
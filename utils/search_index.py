@@ -0,0 +1,288 @@
+"""
+Search Index
+Tokenized inverted index with prefix matching and ranked results, and a
+trigram index for plain substring matches
+"""
+
+from bisect import bisect_left, insort
+import json
+import math
+import re
+import os
+
+# Runs of letters and digits in any script, as canonical_title() splits titles
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Bumped whenever tokenize() changes, so saved indexes are rebuilt
+TOKENIZER_VERSION = 2
+
+# Score multiplier for a token that only starts with the query term
+PREFIX_MATCH_FACTOR = 0.5
+
+
+# Length of the character n-grams SubstringIndex keys titles by
+GRAM_SIZE = 3
+
+def tokenize(text):
+    """Split text into casefolded word tokens ('Número' -> ['número'])"""
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+class SearchIndex:
+    """
+    Inverted index from tokens to weighted document ids
+    
+    Documents are added with a list of (text, weight) fields and a version
+    string. The index is persisted as each document's token weights, so a
+    restart only re-tokenizes documents whose version changed.
+    """
+    
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.docs = {}  # id -> (version, {token: weight})
+        self.postings = {}  # token -> {id: weight}
+        self.vocabulary = []  # Sorted tokens, for prefix lookups
+        self.dirty = False
+    
+    def add(self, doc_id, fields, version=None):
+        """
+        Index (or re-index) a document
+        
+        Args:
+            doc_id (int): Document id
+            fields (list): (text, weight) pairs
+            version (str): Changes whenever the document content changes
+        """
+        self.remove(doc_id)
+        
+        weights = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0) + weight
+        
+        self._insert(doc_id, version, weights)
+        self.dirty = True
+    
+    def remove(self, doc_id):
+        """Drop a document from the index"""
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        
+        for token in doc[1]:
+            posting = self.postings[token]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+        
+        self.dirty = True
+    
+    def _insert(self, doc_id, version, weights):
+        self.docs[doc_id] = (version, weights)
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                insort(self.vocabulary, token)
+            posting[doc_id] = weight
+    
+    def search(self, query, limit=None):
+        """
+        Find documents matching every query term
+        
+        Each term matches tokens it is a prefix of; exact token matches
+        score higher, and rarer tokens score higher (idf).
+        
+        Args:
+            query (str): Search text
+            limit (int, optional): Maximum number of results
+        
+        Returns:
+            list: Document ids, best match first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        
+        total_docs = len(self.docs)
+        scores = None
+        
+        for term in terms:
+            term_scores = {}
+            i = bisect_left(self.vocabulary, term)
+            
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+                token = self.vocabulary[i]
+                posting = self.postings[token]
+                idf = math.log(1 + total_docs / len(posting))
+                factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+                
+                for doc_id, weight in posting.items():
+                    score = weight * idf * factor
+                    if score > term_scores.get(doc_id, 0):
+                        term_scores[doc_id] = score
+                i += 1
+            
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id]
+                          for doc_id, score in scores.items() if doc_id in term_scores}
+            
+            if not scores:
+                return []
+        
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return ranked[:limit] if limit else ranked
+    
+    def sync(self, documents, fields_for):
+        """
+        Bring the index in line with the current records
+        
+        Args:
+            documents (dict): id -> (version, record)
+            fields_for (callable): record -> list of (text, weight)
+        
+        Returns:
+            int: Number of documents (re)indexed or removed
+        """
+        changed = 0
+        
+        for doc_id in [d for d in self.docs if d not in documents]:
+            self.remove(doc_id)
+            changed += 1
+        
+        for doc_id, (version, record) in documents.items():
+            doc = self.docs.get(doc_id)
+            if doc is None or doc[0] != version:
+                self.add(doc_id, fields_for(record), version)
+                changed += 1
+        
+        return changed
+    
+    def load(self):
+        """Load the persisted index, starting empty if it is missing, unreadable or outdated"""
+        self.docs = {}
+        self.postings = {}
+        self.vocabulary = []
+        self.dirty = False
+        
+        if not self.index_file or not os.path.exists(self.index_file):
+            return False
+        
+        try:
+            with open(self.index_file, 'r') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            print(f"Warning: rebuilding unreadable search index {self.index_file}")
+            return False
+        
+        if data.get('tokenizer') != TOKENIZER_VERSION:
+            return False  # The next sync() re-indexes every document
+        
+        for doc_id, (version, weights) in data.get('docs', {}).items():
+            self.docs[int(doc_id)] = (version, weights)
+            for token, weight in weights.items():
+                self.postings.setdefault(token, {})[int(doc_id)] = weight
+        
+        self.vocabulary = sorted(self.postings)
+        return True
+    
+    def save(self):
+        """Persist the index if it changed since the last load/save"""
+        if not self.index_file or not self.dirty:
+            return False
+        
+        temp_filename = self.index_file + '.tmp'
+        data = {'tokenizer': TOKENIZER_VERSION,
+                'docs': {str(doc_id): [version, weights]
+                         for doc_id, (version, weights) in self.docs.items()}}
+        
+        try:
+            # dumps() runs the C encoder; dump() would encode chunk by chunk in Python
+            with open(temp_filename, 'w') as file:
+                file.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+            os.replace(temp_filename, self.index_file)
+        except OSError as e:
+            print(f"Warning: could not save search index {self.index_file}: {e}")
+            return False
+        
+        self.dirty = False
+        return True
+
+
+class SubstringIndex:
+    """
+    Character n-gram index answering "which texts contain this substring"
+    
+    Every position of a casefolded text contributes the GRAM_SIZE
+    characters starting there (fewer at the end). A query of up to
+    GRAM_SIZE characters matches the grams it is a prefix of; a longer one
+    intersects the postings of its own grams and checks the few candidates
+    left, so no text outside the postings is ever looked at.
+    """
+    
+    def __init__(self):
+        self.texts = {}  # id -> casefolded text
+        self.postings = {}  # gram -> ids
+        self.vocabulary = []  # Sorted grams, for prefix lookups
+    
+    @staticmethod
+    def grams(text):
+        return {text[i:i + GRAM_SIZE] for i in range(len(text))}
+    
+    def add(self, doc_id, text):
+        """Index (or re-index) a document's text"""
+        self.remove(doc_id)
+        text = text.casefold()
+        self.texts[doc_id] = text
+        for gram in self.grams(text):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = set()
+                insort(self.vocabulary, gram)
+            posting.add(doc_id)
+    
+    def remove(self, doc_id):
+        """Drop a document from the index"""
+        text = self.texts.pop(doc_id, None)
+        if text is None:
+            return
+        
+        for gram in self.grams(text):
+            posting = self.postings[gram]
+            posting.discard(doc_id)
+            if not posting:
+                del self.postings[gram]
+                del self.vocabulary[bisect_left(self.vocabulary, gram)]
+    
+    def search(self, query):
+        """
+        Ids of the documents whose text contains the query (case-insensitive)
+        
+        Returns:
+            set: Matching document ids
+        """
+        query = query.casefold()
+        if not query:
+            return set()
+        
+        if len(query) <= GRAM_SIZE:
+            ids = set()
+            i = bisect_left(self.vocabulary, query)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(query):
+                ids.update(self.postings[self.vocabulary[i]])
+                i += 1
+            return ids
+        
+        postings = []
+        for i in range(len(query) - GRAM_SIZE + 1):
+            posting = self.postings.get(query[i:i + GRAM_SIZE])
+            if not posting:
+                return set()
+            postings.append(posting)
+        
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return {doc_id for doc_id in candidates if query in self.texts[doc_id]}
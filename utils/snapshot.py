@@ -0,0 +1,172 @@
+"""
+Binary Snapshots
+Memory-mapped copy of a JSON collection for fast startup
+
+A snapshot file holds named fixed-width columns (array.array typecodes)
+and a heap of length-prefixed JSON values for strings and nested data.
+Columns are read straight out of the mapping without decoding, and heap
+values are decoded one at a time on demand.
+
+Layout:
+    MAGIC
+    heap values     4-byte little-endian length + UTF-8 JSON, back to back
+    columns         8-byte aligned raw array data
+    header          JSON: {"meta": ..., "columns": {name: [typecode, offset, count]}}
+    footer          8-byte header offset + MAGIC
+
+The meta dict carries the stamp of the JSON file the snapshot was built
+from; open_snapshot() ignores a snapshot whose stamp no longer matches.
+
+A mapped file cannot be replaced on Windows, so readers close() their
+Snapshot before a new snapshot is written over it.
+"""
+
+from array import array
+import json
+import mmap
+import struct
+import os
+
+MAGIC = b'CTSNAP01'
+LENGTH = struct.Struct('<I')
+FOOTER = struct.Struct('<Q8s')
+
+
+class SnapshotWriter:
+    """Writes a snapshot: heap values first, then columns and header"""
+    
+    def __init__(self, filename, stamp):
+        self.filename = filename
+        self.stamp = stamp
+        self._temp_filename = filename + '.tmp'
+        self._file = open(self._temp_filename, 'wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+    
+    def add(self, value):
+        """Append a JSON value to the heap, returning its offset"""
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        offset = self._offset
+        self._file.write(LENGTH.pack(len(data)))
+        self._file.write(data)
+        self._offset += LENGTH.size + len(data)
+        return offset
+    
+    def finish(self, columns, meta=None):
+        """
+        Write the columns and header and move the snapshot into place
+        
+        Args:
+            columns (dict): name -> array.array
+            meta (dict, optional): Extra JSON data stored in the header
+        """
+        directory = {}
+        for name, column in columns.items():
+            padding = -self._offset % 8
+            self._file.write(b'\0' * padding)
+            self._offset += padding
+            
+            directory[name] = [column.typecode, self._offset, len(column)]
+            data = column.tobytes()
+            self._file.write(data)
+            self._offset += len(data)
+        
+        meta = dict(meta or {}, stamp=self.stamp)
+        header = json.dumps({'meta': meta, 'columns': directory},
+                            ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._file.write(header)
+        self._file.write(FOOTER.pack(self._offset, MAGIC))
+        self._file.close()
+        os.replace(self._temp_filename, self.filename)
+    
+    def abort(self):
+        """Discard a partly written snapshot"""
+        self._file.close()
+        if os.path.exists(self._temp_filename):
+            os.remove(self._temp_filename)
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file
+    
+    Calling the snapshot with a heap offset decodes that value, so it can
+    be used directly as a lazy field reader. close() (or leaving a with
+    block) unmaps the file; columns handed out before stop working.
+    """
+    
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            size = len(self._map)
+            if size < len(MAGIC) + FOOTER.size or self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{filename} is not a snapshot")
+            header_offset, magic = FOOTER.unpack_from(self._map, size - FOOTER.size)
+            if magic != MAGIC:
+                raise ValueError(f"{filename} is truncated")
+            
+            header = json.loads(self._map[header_offset:size - FOOTER.size])
+            self.meta = header['meta']
+            self._columns = header['columns']
+        except (ValueError, KeyError):
+            self._map.close()
+            raise
+        self._view = memoryview(self._map)
+        self._exports = []  # Column views handed out, released by close()
+    
+    def column(self, name):
+        """Zero-copy, read-only sequence over a column"""
+        typecode, offset, count = self._columns[name]
+        width = array(typecode).itemsize
+        column = self._view[offset:offset + count * width].cast(typecode)
+        self._exports.append(column)
+        return column
+    
+    @property
+    def closed(self):
+        return self._map.closed
+    
+    def close(self):
+        """Unmap the file"""
+        if self._map.closed:
+            return
+        
+        try:
+            for view in self._exports:
+                view.release()
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # Something still exports a column (e.g. a NumPy array over it);
+            # the mapping goes away once that is collected
+            pass
+        self._exports = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __call__(self, offset):
+        (length,) = LENGTH.unpack_from(self._map, offset)
+        start = offset + LENGTH.size
+        return json.loads(self._map[start:start + length])
+
+
+def open_snapshot(filename, stamp):
+    """Snapshot built from the JSON file with this stamp, or None"""
+    if stamp is None:
+        return None
+    
+    try:
+        snapshot = Snapshot(filename)
+    except (OSError, ValueError, KeyError):
+        return None
+    
+    if snapshot.meta.get('stamp') != stamp:
+        snapshot.close()
+        return None
+    return snapshot
@@ -0,0 +1,723 @@
+"""
+Storage Backends
+Pluggable persistence for the problem and session collections
+
+Every store exposes the same interface used by ProblemManager and
+SessionTracker:
+    
+    load()                          -> list of record dicts
+    load_stream()                   -> the same records, streamed one at a time
+    iter_records()                  -> the current records, streamed without
+                                       changing what external_changes() reports
+    write_changes(puts, deletes)    -> persist changed/deleted records
+    write_all(records)              -> replace the whole collection
+    needs_compaction(total, pending=0)
+                                    -> whether write_all should run now
+    read_sequence() / write_sequence(next_id)
+                                    -> id high-water mark, so ids are never reused
+                                       (managers reserve ID_BLOCK_SIZE ids at a
+                                       time inside a batch)
+    locked()                        -> inter-process lock (utils/locking.py)
+    external_changes()              -> journal entries other processes wrote since
+                                       this store last read or wrote; None if the
+                                       collection has to be reloaded instead
+
+Several processes may share one data directory. Managers take locked()
+only around a read-check-write step: they apply external_changes() to
+their in-memory state, then write their own changes, so concurrent
+writers to different records do not lose each other's writes.
+
+Session stores also offer load_lazy(heavy_fields), which leaves large
+fields on disk and returns a reader to fetch them on first access.
+
+Stores with supports_snapshots = True can also keep a memory-mapped
+binary copy of the snapshot (see utils/snapshot.py); the managers build
+it and apply read_journal() on top:
+    
+    open_snapshot()                 -> Snapshot, or None if missing or stale
+    snapshot_writer()               -> SnapshotWriter for a fresh snapshot (None without JSON)
+    iter_snapshot_records()         -> records of the JSON snapshot alone
+    read_journal()                  -> journal entries since that snapshot
+
+JSONStore keeps the original snapshot-plus-journal JSON files.
+SQLiteDatabase keeps both collections in one SQLite file and answers
+queries in SQL (supports_queries = True): session history and totals,
+filter_problems and the aggregates StatsStore starts from. Its stores'
+is_current() tells whether the database still matches what the manager
+loaded, i.e. no other process committed since; the managers only query
+when it does and they have no unwritten changes, so the answers are the
+same as from memory.
+"""
+
+import json
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+from utils.data_handler import (read_json, read_jsonl_from, iter_json_array, replay_journal,
+                                replay_journal_stream, append_journal, compact_journal,
+                                journal_filename)
+from utils.locking import FileLock
+from utils.snapshot import SnapshotWriter, open_snapshot
+
+# Ids a manager reserves in the stored sequence at once inside batch(); the
+# unused rest is given back when the batch is written
+ID_BLOCK_SIZE = 256
+
+
+class JSONStore:
+    """JSON snapshot plus an append-only journal of changes"""
+    
+    supports_queries = False
+    supports_snapshots = True
+    
+    def __init__(self, data_file, compact_threshold=1000):
+        self.data_file = data_file
+        self.compact_threshold = compact_threshold  # Min journal entries before compaction
+        self.journal_entries = 0
+        self.sequence_file = data_file + '.seq'
+        self.hot_file = data_file + '.hot'
+        self.heavy_file = data_file + '.heavy'
+        self.snapshot_file = data_file + '.snap'
+        self.lock = FileLock(data_file + '.lock')
+        self._loaded_stamp = None  # Snapshot stamp as of the last read or write
+        self._journal_offset = 0  # Journal bytes already reflected in memory
+        self.heavy_fields = None  # Set once load_lazy() is used
+    
+    def load(self):
+        """Load the snapshot and replay the journal"""
+        ops = self.read_journal()
+        return replay_journal(read_json(self.data_file) or [], ops)
+    
+    def load_stream(self):
+        """
+        Stream the snapshot with the journal applied, one record at a time
+        
+        Only the journal is read up front. Raises json.JSONDecodeError if the
+        snapshot turns out to be corrupted part way through; load() falls
+        back to the backup instead.
+        """
+        ops = self.read_journal()
+        return replay_journal_stream(self.iter_snapshot_records(), ops)
+    
+    def iter_records(self):
+        """
+        Stream the current records without marking the journal as read
+        
+        Unlike load_stream(), external_changes() still reports the entries
+        other processes appended since the last load or write, so a manager
+        can scan storage without missing them at its next merge.
+        """
+        ops, _ = read_jsonl_from(journal_filename(self.data_file))
+        return replay_journal_stream(self.iter_snapshot_records(), ops)
+    
+    def open_snapshot(self):
+        """Binary snapshot of the current JSON snapshot, or None if missing or stale"""
+        return open_snapshot(self.snapshot_file, self._snapshot_stamp())
+    
+    def snapshot_writer(self):
+        """Writer for a binary snapshot of the current JSON snapshot, or None if there is none"""
+        stamp = self._snapshot_stamp()
+        return SnapshotWriter(self.snapshot_file, stamp) if stamp is not None else None
+    
+    def iter_snapshot_records(self):
+        """Stream the JSON snapshot without the journal"""
+        return iter_json_array(self.data_file)
+    
+    def read_journal(self):
+        """Journal entries to replay on top of the snapshot"""
+        self._loaded_stamp = self._snapshot_stamp()
+        ops, self._journal_offset = read_jsonl_from(journal_filename(self.data_file))
+        self.journal_entries = len(ops)
+        return ops
+    
+    def locked(self):
+        """Lock shared with other processes using the same data file"""
+        return self.lock
+    
+    def data_stamp(self):
+        """Snapshot stamp and journal offset of the records last read or written"""
+        return [self._loaded_stamp, self._journal_offset]
+    
+    def external_changes(self):
+        """
+        Journal entries other processes appended since this store last read or wrote
+        
+        Call with locked() held. Returns None when another process compacted
+        the collection in the meantime, so it has to be reloaded.
+        """
+        if self._snapshot_stamp() != self._loaded_stamp:
+            return None
+        
+        ops, self._journal_offset = read_jsonl_from(journal_filename(self.data_file),
+                                                    self._journal_offset)
+        self.journal_entries += len(ops)
+        return ops
+    
+    def load_lazy(self, heavy_fields):
+        """
+        Load records with their heavy fields left on disk
+        
+        The snapshot is split once into a hot file (the other fields plus a
+        byte offset per record) and a heavy file (one JSON line of heavy
+        fields per record). Later loads only parse the hot file while the
+        snapshot is unchanged. Records replayed from the journal stay whole.
+        
+        Returns:
+            tuple: (records, reader) - records carrying a 'heavy_ref' key left
+                their heavy fields out, reader(ref) returns those fields
+        """
+        self.heavy_fields = tuple(heavy_fields)
+        
+        records = self._read_hot()
+        if records is None:
+            try:
+                records = self._write_split(iter_json_array(self.data_file))
+            except json.JSONDecodeError:
+                records = self._write_split(read_json(self.data_file) or [])
+        
+        ops = self.read_journal()
+        return replay_journal(records, ops), HeavyFieldReader(self.heavy_file)
+    
+    def _snapshot_stamp(self):
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _read_hot(self):
+        """Hot records, or None if the split is missing or older than the snapshot"""
+        try:
+            with open(self.hot_file, 'r') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        if data.get('snapshot') != self._snapshot_stamp():
+            return None
+        return data['records']
+    
+    def _write_split(self, records):
+        """Write the hot/heavy split of records, returning the hot records"""
+        hot_records = []
+        offset = 0
+        
+        try:
+            with open(self.heavy_file + '.tmp', 'wb') as heavy:
+                for record in records:
+                    hot = dict(record)
+                    fields = {f: hot.pop(f) for f in self.heavy_fields if f in hot}
+                    line = (json.dumps(fields, ensure_ascii=False) + '\n').encode('utf-8')
+                    heavy.write(line)
+                    hot['heavy_ref'] = offset
+                    offset += len(line)
+                    hot_records.append(hot)
+            
+            with open(self.hot_file + '.tmp', 'w') as hot_file:
+                json.dump({'snapshot': self._snapshot_stamp(), 'records': hot_records},
+                          hot_file, separators=(',', ':'), ensure_ascii=False)
+            
+            os.replace(self.heavy_file + '.tmp', self.heavy_file)
+            os.replace(self.hot_file + '.tmp', self.hot_file)
+        
+        except OSError as e:
+            print(f"Warning: could not split {self.data_file} for lazy loading: {e}")
+            return records
+        
+        return hot_records
+    
+    def write_changes(self, puts=(), deletes=()):
+        """Append changed and deleted records to the journal"""
+        puts = list(puts)
+        deletes = list(deletes)
+        if append_journal(self.data_file, puts=puts, deletes=deletes):
+            self.journal_entries += len(puts) + len(deletes)
+            # Callers merged external_changes() under the lock first
+            self._journal_offset = os.path.getsize(journal_filename(self.data_file))
+    
+    def write_all(self, records):
+        """Rewrite the snapshot and clear the journal"""
+        if compact_journal(self.data_file, records):
+            self.journal_entries = 0
+            self._loaded_stamp = self._snapshot_stamp()
+            self._journal_offset = 0
+            if self.heavy_fields:
+                self._write_split(records)
+            return True
+        return False
+    
+    def needs_compaction(self, total, pending=0):
+        """
+        Whether the journal has outgrown the snapshot
+        
+        Compaction waits until the journal is larger than both
+        compact_threshold and the collection, keeping it amortized O(1).
+        pending counts entries about to be appended, so a caller can
+        rewrite once instead of appending and then compacting.
+        """
+        return self.journal_entries + pending >= max(self.compact_threshold, total)
+    
+    def read_sequence(self):
+        """Persisted next id, or 0 if none has been stored yet"""
+        try:
+            with open(self.sequence_file, 'r') as file:
+                return int(file.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+    
+    def write_sequence(self, next_id):
+        """Durably store the next id to hand out"""
+        temp_filename = self.sequence_file + '.tmp'
+        with open(temp_filename, 'w') as file:
+            file.write(str(next_id))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.sequence_file)
+
+
+class HeavyFieldReader:
+    """Reads one record's heavy fields from a split heavy file by byte offset"""
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = None
+    
+    def __call__(self, offset):
+        if self._file is None:
+            self._file = open(self.filename, 'rb')
+        self._file.seek(offset)
+        return json.loads(self._file.readline())
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS problems (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    platform TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'Not Started',
+    date_added TEXT,
+    date_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_problems_difficulty ON problems(difficulty);
+CREATE INDEX IF NOT EXISTS idx_problems_status ON problems(status);
+
+CREATE TABLE IF NOT EXISTS problem_topics (
+    problem_id INTEGER NOT NULL REFERENCES problems(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (problem_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_problem_topics_topic ON problem_topics(topic);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    problem_id INTEGER NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    pauses TEXT NOT NULL DEFAULT '[]',
+    solved INTEGER NOT NULL DEFAULT 0,
+    hints_used INTEGER NOT NULL DEFAULT 0,
+    notes TEXT NOT NULL DEFAULT '[]',
+    solution_code TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_problem_id ON sessions(problem_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class SQLiteDatabase:
+    """SQLite file holding problems, their topics and sessions"""
+    
+    def __init__(self, db_file='data/codetrack.db'):
+        import sqlite3  # Only once a database is in use, so JSON-only runs skip the import
+        
+        self.db_file = db_file
+        # Write-behind flushes run on a timer thread; callers hold their own locks
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.lock = FileLock(db_file + '.lock')
+        self.problems = SQLiteProblemStore(self)
+        self.sessions = SQLiteSessionStore(self)
+    
+    def close(self):
+        self.conn.close()
+    
+    def data_version(self):
+        """Changes whenever another connection commits to the database"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def read_meta(self, key, default=0):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+    
+    def write_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def session_ids_for_problem(self, problem_id):
+        rows = self.conn.execute(
+            "SELECT id FROM sessions WHERE problem_id = ? ORDER BY id", (problem_id,))
+        return [row[0] for row in rows]
+    
+    def session_totals(self):
+        """(total sessions, solved sessions, total seconds, total hints)"""
+        row = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(solved), 0), COALESCE(SUM(duration_seconds), 0),"
+            " COALESCE(SUM(hints_used), 0) FROM sessions").fetchone()
+        return tuple(row)
+    
+    def problem_ids(self, difficulty=None, status=None, topics=None, match='any'):
+        """Ids of the problems matching every given criterion, ascending (see filter_problems)"""
+        clauses = []
+        params = []
+        if difficulty:
+            clauses.append("difficulty = ?")
+            params.append(difficulty)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if topics:
+            topics = list(dict.fromkeys(topics))
+            placeholders = ', '.join('?' * len(topics))
+            if match == 'all':
+                clauses.append(f"id IN (SELECT problem_id FROM problem_topics WHERE topic IN"
+                               f" ({placeholders}) GROUP BY problem_id"
+                               f" HAVING COUNT(DISTINCT topic) = ?)")
+                params.extend(topics)
+                params.append(len(topics))
+            else:
+                clauses.append(f"id IN (SELECT problem_id FROM problem_topics"
+                               f" WHERE topic IN ({placeholders}))")
+                params.extend(topics)
+        
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        rows = self.conn.execute(f"SELECT id FROM problems{where} ORDER BY id", params)
+        return [row[0] for row in rows]
+    
+    def problem_aggregates(self, solved_statuses):
+        """
+        Problem counts behind the analytics report
+        
+        Args:
+            solved_statuses (tuple): Statuses that count as solved
+        
+        Returns:
+            dict: 'statuses' [(status, count)], 'difficulties' and 'topics'
+                [(name, total, solved)] in order of first appearance, and
+                'difficulty_of' {problem id: difficulty}
+        """
+        solved = f"status IN ({', '.join('?' * len(solved_statuses))})"
+        conn = self.conn
+        return {
+            'statuses': conn.execute(
+                "SELECT status, COUNT(*) FROM problems GROUP BY status ORDER BY MIN(id)").fetchall(),
+            'difficulties': conn.execute(
+                f"SELECT difficulty, COUNT(*), SUM({solved}) FROM problems"
+                " GROUP BY difficulty ORDER BY MIN(id)", solved_statuses).fetchall(),
+            # A topic is first seen at its lowest (problem id, position)
+            'topics': conn.execute(
+                f"SELECT topic, COUNT(*), SUM({solved}) FROM problem_topics"
+                " JOIN problems ON problems.id = problem_topics.problem_id"
+                " GROUP BY topic ORDER BY MIN(problem_id * 1048576 + position)",
+                solved_statuses).fetchall(),
+            'difficulty_of': dict(conn.execute("SELECT id, difficulty FROM problems"))
+        }
+    
+    def session_aggregates(self):
+        """
+        Session counts behind the analytics report
+        
+        Returns:
+            dict: 'totals' as session_totals(), 'days' [(YYYY-MM-DD, sessions)]
+                by the date part of the start time, 'latest' start time and
+                'solved_by_problem' [(problem id, solved seconds, solved sessions)]
+                in order of first appearance
+        """
+        conn = self.conn
+        return {
+            'totals': self.session_totals(),
+            'days': conn.execute(
+                "SELECT CASE WHEN instr(start_time, 'T') > 0"
+                " THEN substr(start_time, 1, instr(start_time, 'T') - 1) ELSE start_time END AS day,"
+                " COUNT(*) FROM sessions WHERE start_time != '' GROUP BY day ORDER BY day").fetchall(),
+            'latest': conn.execute(
+                "SELECT MAX(start_time) FROM sessions WHERE start_time != ''").fetchone()[0],
+            'solved_by_problem': conn.execute(
+                "SELECT problem_id, SUM(duration_seconds), COUNT(*) FROM sessions WHERE solved"
+                " GROUP BY problem_id ORDER BY MIN(id)").fetchall()
+        }
+
+
+class SQLiteProblemStore:
+    """Problem collection inside a SQLiteDatabase"""
+    
+    supports_queries = True
+    supports_snapshots = False
+    sequence_key = 'problems_next_id'
+    
+    def __init__(self, db):
+        self.db = db
+        self._seen_version = None  # data_version as of the last load
+    
+    def load(self):
+        return list(self.load_stream())
+    
+    def load_stream(self):
+        self._seen_version = self.db.data_version()
+        return self.iter_records()
+    
+    def iter_records(self):
+        conn = self.db.conn
+        topics = {}
+        for problem_id, topic in conn.execute(
+                "SELECT problem_id, topic FROM problem_topics ORDER BY problem_id, position"):
+            topics.setdefault(problem_id, []).append(topic)
+        
+        rows = conn.execute(
+            "SELECT id, title, difficulty, platform, url, status, date_added, date_modified"
+            " FROM problems ORDER BY id")
+        
+        for row in rows:
+            yield {
+                'id': row[0],
+                'title': row[1],
+                'difficulty': row[2],
+                'topics': topics.get(row[0], []),
+                'platform': row[3],
+                'url': row[4],
+                'status': row[5],
+                'date_added': row[6],
+                'date_modified': row[7]
+            }
+    
+    def _insert(self, records):
+        conn = self.db.conn
+        records = list(records)
+        conn.executemany(
+            "INSERT OR REPLACE INTO problems"
+            " (id, title, difficulty, platform, url, status, date_added, date_modified)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r['id'], r['title'], r['difficulty'], r.get('platform', ''), r.get('url', ''),
+              r.get('status', 'Not Started'), r.get('date_added'), r.get('date_modified'))
+             for r in records])
+        conn.executemany(
+            "DELETE FROM problem_topics WHERE problem_id = ?", [(r['id'],) for r in records])
+        conn.executemany(
+            "INSERT INTO problem_topics (problem_id, position, topic) VALUES (?, ?, ?)",
+            [(r['id'], i, topic) for r in records for i, topic in enumerate(r.get('topics', []))])
+    
+    def write_changes(self, puts=(), deletes=()):
+        with self.db.conn:
+            self._insert(puts)
+            self.db.conn.executemany(
+                "DELETE FROM problems WHERE id = ?", [(i,) for i in deletes])
+    
+    def write_all(self, records):
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM problem_topics")
+            self.db.conn.execute("DELETE FROM problems")
+            self._insert(records)
+        return True
+    
+    def needs_compaction(self, total, pending=0):
+        return False
+    
+    def locked(self):
+        return self.db.lock
+    
+    def external_changes(self):
+        """None (reload) if another process committed since the last load, else []"""
+        version = self.db.data_version()
+        if version != self._seen_version:
+            self._seen_version = version
+            return None
+        return []
+    
+    def is_current(self):
+        """Whether no other process committed since the last load, so queries match it"""
+        return self.db.data_version() == self._seen_version
+    
+    def data_stamp(self):
+        """None: data_version is per connection, so nothing to compare a saved view with"""
+        return None
+    
+    def read_sequence(self):
+        return self.db.read_meta(self.sequence_key)
+    
+    def write_sequence(self, next_id):
+        self.db.write_meta(self.sequence_key, next_id)
+
+
+class SQLiteSessionStore:
+    """Session collection inside a SQLiteDatabase"""
+    
+    supports_queries = True
+    supports_snapshots = False
+    sequence_key = 'sessions_next_id'
+    
+    def __init__(self, db):
+        self.db = db
+        self._seen_version = None  # data_version as of the last load
+    
+    def load(self):
+        return list(self.load_stream())
+    
+    def load_stream(self):
+        self._seen_version = self.db.data_version()
+        return self.iter_records()
+    
+    def iter_records(self):
+        rows = self.db.conn.execute(
+            "SELECT id, problem_id, start_time, end_time, duration_seconds, pauses,"
+            " solved, hints_used, notes, solution_code FROM sessions ORDER BY id")
+        
+        for row in rows:
+            yield {
+                'id': row[0],
+                'problem_id': row[1],
+                'start_time': row[2],
+                'end_time': row[3],
+                'duration_seconds': row[4],
+                'pauses': json.loads(row[5]),
+                'solved': bool(row[6]),
+                'hints_used': row[7],
+                'notes': json.loads(row[8]),
+                'solution_code': row[9]
+            }
+    
+    def load_lazy(self, heavy_fields):
+        """Load sessions without heavy columns; reader(id) fetches them"""
+        heavy_fields = tuple(heavy_fields)
+        self._seen_version = self.db.data_version()
+        rows = self.db.conn.execute(
+            "SELECT id, problem_id, start_time, end_time, duration_seconds, pauses,"
+            " solved, hints_used FROM sessions ORDER BY id")
+        
+        records = [{
+            'id': row[0],
+            'problem_id': row[1],
+            'start_time': row[2],
+            'end_time': row[3],
+            'duration_seconds': row[4],
+            'pauses': json.loads(row[5]),
+            'solved': bool(row[6]),
+            'hints_used': row[7],
+            'heavy_ref': row[0]
+        } for row in rows]
+        
+        def reader(session_id):
+            row = self.db.conn.execute(
+                f"SELECT {', '.join(heavy_fields)} FROM sessions WHERE id = ?",
+                (session_id,)).fetchone()
+            fields = dict(zip(heavy_fields, row))
+            if 'notes' in fields:
+                fields['notes'] = json.loads(fields['notes'])
+            return fields
+        
+        return records, reader
+    
+    def _insert(self, records):
+        self.db.conn.executemany(
+            "INSERT OR REPLACE INTO sessions"
+            " (id, problem_id, start_time, end_time, duration_seconds, pauses,"
+            " solved, hints_used, notes, solution_code)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(r['id'], r['problem_id'], r.get('start_time'), r.get('end_time'),
+              r.get('duration_seconds', 0), json.dumps(r.get('pauses', [])),
+              int(bool(r.get('solved', False))), r.get('hints_used', 0),
+              json.dumps(r.get('notes', []), ensure_ascii=False), r.get('solution_code', ''))
+             for r in records])
+    
+    def write_changes(self, puts=(), deletes=()):
+        with self.db.conn:
+            self._insert(puts)
+            self.db.conn.executemany(
+                "DELETE FROM sessions WHERE id = ?", [(i,) for i in deletes])
+    
+    def write_all(self, records):
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM sessions")
+            self._insert(records)
+        return True
+    
+    def needs_compaction(self, total, pending=0):
+        return False
+    
+    def locked(self):
+        return self.db.lock
+    
+    def external_changes(self):
+        """None (reload) if another process committed since the last load, else []"""
+        version = self.db.data_version()
+        if version != self._seen_version:
+            self._seen_version = version
+            return None
+        return []
+    
+    def is_current(self):
+        """Whether no other process committed since the last load, so queries match it"""
+        return self.db.data_version() == self._seen_version
+    
+    def data_stamp(self):
+        """None: data_version is per connection, so nothing to compare a saved view with"""
+        return None
+    
+    def read_sequence(self):
+        return self.db.read_meta(self.sequence_key)
+    
+    def write_sequence(self, next_id):
+        self.db.write_meta(self.sequence_key, next_id)
+
+
+def migrate_json_to_sqlite(problems_file='data/problems.json',
+                           sessions_file='data/sessions.json',
+                           db_file='data/codetrack.db'):
+    """
+    One-shot copy of the JSON data files into a SQLite database
+    
+    Args:
+        problems_file (str): Problems JSON snapshot (its journal is replayed too)
+        sessions_file (str): Sessions JSON snapshot (its journal is replayed too)
+        db_file (str): SQLite file to create or overwrite
+    
+    Returns:
+        tuple: (problems migrated, sessions migrated)
+    """
+    problem_store = JSONStore(problems_file)
+    session_store = JSONStore(sessions_file)
+    problems = problem_store.load()
+    sessions = session_store.load()
+    
+    db = SQLiteDatabase(db_file)
+    try:
+        db.problems.write_all(problems)
+        db.sessions.write_all(sessions)
+        db.problems.write_sequence(problem_store.read_sequence())
+        db.sessions.write_sequence(session_store.read_sequence())
+    finally:
+        db.close()
+    
+    return len(problems), len(sessions)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) not in (0, 3):
+        print("Usage: python utils/storage.py [problems.json sessions.json codetrack.db]")
+        sys.exit(1)
+    
+    problem_count, session_count = migrate_json_to_sqlite(*args)
+    print(f"Migrated {problem_count} problems and {session_count} sessions")